@@ -0,0 +1,266 @@
+"""Asyncio (ASGI) front end with the same API contract as flask_server.py.
+
+Connections are handled on one event loop, so slow clients cost a
+coroutine rather than a worker thread. Tokenizing, inference and the text
+features run in a thread pool; concurrent single-review requests are
+coalesced by the micro-batcher (enabled by default here), so a burst of
+requests becomes a few model calls.
+
+Run it with uvicorn when installed, or with the small built-in HTTP/1.1
+server otherwise:
+
+    uvicorn asgi_server:app --host 0.0.0.0 --port 8000
+    python asgi_server.py --port 8000
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+# Waiting threads are what the micro-batcher coalesces, so turn it on by default
+os.environ.setdefault('MICRO_BATCH_ENABLED', '1')
+
+import flask_server  # noqa: E402  (reads the environment at import time)
+
+ASGI_EXECUTOR_THREADS = int(os.environ.get('ASGI_EXECUTOR_THREADS', 64))
+ALLOWED_ORIGINS = ("https://movie-sentiment-predictor.vercel.app", "http://localhost:3000")
+MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 1024 * 1024))
+
+executor = ThreadPoolExecutor(max_workers=ASGI_EXECUTOR_THREADS, thread_name_prefix='asgi-inference')
+
+ERROR_FALLBACK = {
+    'sentiment': 'neutral',
+    'confidence': 0.5,
+    'key_phrases': ['Error in analysis'],
+    'aspect_analysis': {}
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ConnectionResetError('client disconnected')
+        body.extend(message.get('body', b''))
+        if len(body) > MAX_BODY_BYTES:
+            raise BadRequest('Request body too large')
+        if not message.get('more_body'):
+            return bytes(body)
+
+
+async def read_json(receive):
+    body = await read_body(receive)
+    started = flask_server.metrics.start()
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise BadRequest('Request body must be JSON')
+    flask_server.metrics.observe('parse', started)
+    if not isinstance(data, dict):
+        raise BadRequest('Request body must be a JSON object')
+    return data
+
+
+async def send_json(send, payload, status=200, origin=None):
+    started = flask_server.metrics.start()
+    body = json.dumps(payload).encode('utf8')
+    flask_server.metrics.observe('serialize', started)
+    await send_body(send, body, b'application/json', status, origin)
+
+
+async def send_body(send, body, content_type, status=200, origin=None):
+    headers = [(b'content-type', content_type), (b'content-length', str(len(body)).encode())]
+    headers += cors_headers(origin)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def cors_headers(origin):
+    if origin not in ALLOWED_ORIGINS:
+        return []
+    return [(b'access-control-allow-origin', origin.encode()),
+            (b'access-control-allow-headers', b'content-type'),
+            (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+            (b'vary', b'origin')]
+
+
+async def run_in_executor(function, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+
+async def analyze(receive):
+    data = await read_json(receive)
+    review_text = data.get('review', '')
+    if not review_text:
+        return {'error': 'Review text is required'}, 400
+    try:
+        return await run_in_executor(flask_server.analyze_review, review_text, data.get('lightweight', False)), 200
+    except Exception as e:
+        print(f"Error analyzing sentiment: {e}")
+        flask_server.metrics.count('error_fallback')
+        return dict(ERROR_FALLBACK, error=str(e), method='error_fallback'), 500
+
+
+async def analyze_lightweight(receive):
+    data = await read_json(receive)
+    review_text = data.get('review', '')
+    if not review_text:
+        return {'error': 'Review text is required'}, 400
+    try:
+        flask_server.metrics.count('lightweight')
+        return await run_in_executor(flask_server.lightweight_analyze, review_text), 200
+    except Exception as e:
+        print(f"Error in lightweight analysis: {e}")
+        return dict(ERROR_FALLBACK, error=str(e)), 500
+
+
+async def health(receive):
+    return flask_server.health_status(), 200
+
+
+async def metrics(receive):
+    # Plain text (Prometheus exposition format) instead of JSON
+    return flask_server.metrics.render(), 200
+
+
+async def ready(receive):
+    is_ready = flask_server.model is not None and flask_server.tokenizer is not None
+    if not is_ready:
+        # One background load however many probes arrive; the event loop keeps serving
+        flask_server.start_background_startup()
+    return {
+        'ready': is_ready,
+        'model_loading': flask_server.MODEL_LOADING,
+        'inference_backend': flask_server.INFERENCE_BACKEND,
+        'timings': flask_server.startup_timings
+    }, 200 if is_ready else 503
+
+
+ROUTES = {
+    ('POST', '/analyze'): analyze,
+    ('POST', '/analyze/lightweight'): analyze_lightweight,
+    ('GET', '/health'): health,
+    ('GET', '/metrics'): metrics,
+    ('GET', '/ready'): ready
+}
+
+
+async def app(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    origin = dict(scope.get('headers', [])).get(b'origin', b'').decode('latin-1') or None
+    method, path = scope['method'], scope['path'].rstrip('/') or '/'
+    if method == 'OPTIONS':
+        headers = cors_headers(origin) + [(b'content-length', b'0')]
+        await send({'type': 'http.response.start', 'status': 204, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        allowed = any(route_path == path for _, route_path in ROUTES)
+        status = 405 if allowed else 404
+        await send_json(send, {'error': HTTPStatus(status).phrase}, status, origin)
+        return
+    try:
+        payload, status = await handler(receive)
+    except BadRequest as e:
+        payload, status = {'error': str(e)}, 400
+    except ConnectionResetError:
+        return
+    if isinstance(payload, str):
+        await send_body(send, payload.encode('utf8'), b'text/plain; version=0.0.4', status, origin)
+        return
+    await send_json(send, payload, status, origin)
+
+
+# Minimal HTTP/1.1 server for running without uvicorn (Content-Length bodies, keep-alive)
+
+async def _handle_connection(reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+            header_map = dict(headers)
+            body = await reader.readexactly(int(header_map.get(b'content-length', b'0')))
+            path, _, query = target.partition('?')
+            scope = {'type': 'http', 'http_version': version.split('/')[-1], 'method': method.upper(),
+                     'path': path, 'query_string': query.encode('latin-1'), 'headers': headers}
+
+            async def receive():
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+
+            response = {}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    response.update(message)
+                else:
+                    status = response['status']
+                    head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}".encode('latin-1')]
+                    head += [name + b': ' + value for name, value in response.get('headers', [])]
+                    writer.write(b'\r\n'.join(head) + b'\r\n\r\n' + message.get('body', b''))
+
+            await app(scope, receive, send)
+            await writer.drain()
+            if header_map.get(b'connection', b'').lower() == b'close' or version == 'HTTP/1.0':
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, backlog=4096):
+    server = await asyncio.start_server(_handle_connection, host, port, backlog=backlog)
+    print(f"Serving on http://{host}:{port} (built-in asyncio server)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the sentiment API on asyncio")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--builtin', action='store_true', help="Use the built-in server even if uvicorn is installed")
+    args = parser.parse_args()
+
+    if not args.builtin:
+        try:
+            import uvicorn
+            uvicorn.run(app, host=args.host, port=args.port, backlog=4096)
+            return
+        except ImportError:
+            print("uvicorn is not installed, using the built-in server")
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
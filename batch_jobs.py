@@ -0,0 +1,278 @@
+"""Server-side batch jobs for large CSV/JSONL review uploads.
+
+Uploaded files are written to ``jobs_dir`` and tracked in a SQLite database.
+A background runner claims queued jobs with a renewable lease, scores rows
+in chunks through the batched model path and stores each chunk's results
+together with the job's progress in one transaction. After a restart (or if
+the owning worker dies and its lease expires) the job resumes from the last
+stored row.
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+JOB_FORMATS = ('csv', 'jsonl')
+RESULT_COLUMNS = ['row', 'movie_title', 'review', 'sentiment', 'confidence', 'method', 'error']
+
+# Reviews can be long; the csv module's default field limit is 128 KB
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def detect_format(filename, content_type=''):
+    """'jsonl' for .jsonl/.ndjson uploads or NDJSON content types, else 'csv'"""
+    name = (filename or '').lower()
+    if name.endswith(('.jsonl', '.ndjson')) or 'ndjson' in (content_type or '') or 'jsonl' in (content_type or ''):
+        return 'jsonl'
+    return 'csv'
+
+
+def detect_columns(fieldnames):
+    """Pick the review and title columns the same way BatchAnalysis.tsx does"""
+    review_field = next((f for f in fieldnames if 'review' in f.lower() or 'text' in f.lower()), None)
+    title_field = next((f for f in fieldnames if 'title' in f.lower() or 'movie' in f.lower()), None)
+    return review_field, title_field
+
+
+def iter_rows(path, input_format, review_field=None, title_field=None, start=0):
+    """Yield (row_index, movie_title, review) from an uploaded file, skipping ``start`` rows"""
+    with open(path, 'r', encoding='utf8', errors='replace', newline='') as f:
+        if input_format == 'csv':
+            records = csv.DictReader(f)
+        else:
+            records = (line for line in f if line.strip())
+        for index, record in enumerate(records):
+            if index < start:
+                continue
+            if input_format == 'csv':
+                review = record.get(review_field) or ''
+                title = record.get(title_field) if title_field else None
+            else:
+                try:
+                    item = json.loads(record)
+                except ValueError:
+                    item = record.strip()
+                if isinstance(item, dict):
+                    review = item.get('review') or item.get('text') or ''
+                    title = item.get('movieTitle') or item.get('title')
+                else:
+                    review, title = (item if isinstance(item, str) else ''), None
+            yield index, title or f"Review #{index + 1}", review
+
+
+def inspect_upload(path, input_format):
+    """Return (total_rows, review_field, title_field) for a saved upload"""
+    review_field = title_field = None
+    if input_format == 'csv':
+        with open(path, 'r', encoding='utf8', errors='replace', newline='') as f:
+            fieldnames = csv.DictReader(f).fieldnames or []
+        review_field, title_field = detect_columns(fieldnames)
+        if review_field is None:
+            raise ValueError('Could not find a review column in the CSV file')
+    total_rows = sum(1 for _ in iter_rows(path, input_format, review_field, title_field))
+    return total_rows, review_field, title_field
+
+
+class JobStore:
+    """SQLite-backed job and result storage, safe across threads and forks"""
+
+    def __init__(self, db_path, jobs_dir):
+        self.db_path = db_path
+        self.jobs_dir = jobs_dir
+        self._local = threading.local()
+        os.makedirs(jobs_dir, exist_ok=True)
+        with self._connect() as db:
+            db.executescript('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    input_path TEXT NOT NULL,
+                    input_format TEXT NOT NULL,
+                    review_field TEXT,
+                    title_field TEXT,
+                    total_rows INTEGER NOT NULL,
+                    processed_rows INTEGER NOT NULL DEFAULT 0,
+                    owner TEXT,
+                    lease_until REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS results (
+                    job_id TEXT NOT NULL,
+                    row_index INTEGER NOT NULL,
+                    movie_title TEXT,
+                    review TEXT,
+                    sentiment TEXT,
+                    confidence REAL,
+                    method TEXT,
+                    error TEXT,
+                    result TEXT,
+                    PRIMARY KEY (job_id, row_index)
+                );
+            ''')
+
+    def _connect(self):
+        # One connection per thread and process
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def create_job(self, input_path, input_format, total_rows, review_field=None, title_field=None, job_id=None):
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                'INSERT INTO jobs (id, status, input_path, input_format, review_field, title_field, '
+                'total_rows, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, 'queued', input_path, input_format, review_field, title_field, total_rows, now, now)
+            )
+        return self.get_job(job_id)
+
+    def get_job(self, job_id):
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim_next_job(self, owner, lease_seconds):
+        """Atomically take a queued job, or a running one whose lease expired"""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = db.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND lease_until < ?))",
+                (owner, now + lease_seconds, now, row['id'], now)
+            ).rowcount
+        return self.get_job(row['id']) if claimed else None
+
+    def save_chunk(self, job_id, rows, owner, lease_seconds):
+        """Store a chunk of results and advance progress in one transaction
+
+        Returns False if another worker has taken over the job.
+        """
+        now = time.time()
+        with self._connect() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO results (job_id, row_index, movie_title, review, sentiment, '
+                'confidence, method, error, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(job_id, index, title, review, result.get('sentiment'), result.get('confidence'),
+                  result.get('method'), result.get('error'), json.dumps(result))
+                 for index, title, review, result in rows]
+            )
+            return db.execute(
+                'UPDATE jobs SET processed_rows = ?, lease_until = ?, updated_at = ? '
+                'WHERE id = ? AND owner = ?',
+                (rows[-1][0] + 1, now + lease_seconds, now, job_id, owner)
+            ).rowcount == 1
+
+    def finish_job(self, job_id, status, error=None):
+        with self._connect() as db:
+            db.execute(
+                'UPDATE jobs SET status = ?, error = ?, lease_until = 0, updated_at = ? WHERE id = ?',
+                (status, error, time.time(), job_id)
+            )
+
+    def get_results(self, job_id, offset=0, limit=100):
+        rows = self._connect().execute(
+            'SELECT row_index, movie_title, review, result FROM results WHERE job_id = ? '
+            'ORDER BY row_index LIMIT ? OFFSET ?',
+            (job_id, limit, offset)
+        ).fetchall()
+        return [dict(json.loads(row['result']), row=row['row_index'], movieTitle=row['movie_title'])
+                for row in rows]
+
+    def iter_results_csv(self, job_id, batch_size=1000):
+        """Yield the job's results as CSV text, a batch of rows at a time"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(RESULT_COLUMNS)
+        last_index = -1
+        while True:
+            rows = self._connect().execute(
+                'SELECT row_index, movie_title, review, sentiment, confidence, method, error '
+                'FROM results WHERE job_id = ? AND row_index > ? ORDER BY row_index LIMIT ?',
+                (job_id, last_index, batch_size)
+            ).fetchall()
+            for row in rows:
+                writer.writerow(list(row))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            if len(rows) < batch_size:
+                break
+            last_index = rows[-1]['row_index']
+
+
+class JobRunner:
+    """Background thread that processes stored jobs chunk by chunk"""
+
+    def __init__(self, store, score_fn, chunk_size=256, poll_interval=2.0, lease_seconds=120.0):
+        self.store = store
+        self.score_fn = score_fn
+        self.chunk_size = max(1, int(chunk_size))
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.pid = os.getpid()
+        self.owner = f"{self.pid}-{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='batch-jobs', daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Wake the runner immediately (e.g. after a new upload)"""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                job = self.store.claim_next_job(self.owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                print(f"Error claiming batch job: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            try:
+                self._process(job)
+            except Exception as e:
+                print(f"Batch job {job['id']} failed: {e}")
+                self.store.finish_job(job['id'], 'failed', str(e))
+
+    def _process(self, job):
+        rows = iter_rows(job['input_path'], job['input_format'], job['review_field'],
+                         job['title_field'], start=job['processed_rows'])
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                if not self._score_chunk(job['id'], chunk):
+                    return
+                chunk = []
+        if chunk and not self._score_chunk(job['id'], chunk):
+            return
+        self.store.finish_job(job['id'], 'completed')
+
+    def _score_chunk(self, job_id, chunk):
+        results = self.score_fn([review for _, _, review in chunk])
+        rows = [(index, title, review, result) for (index, title, review), result in zip(chunk, results)]
+        if not self.store.save_chunk(job_id, rows, self.owner, self.lease_seconds):
+            print(f"Batch job {job_id} was taken over by another worker")
+            return False
+        return True
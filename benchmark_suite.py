@@ -0,0 +1,285 @@
+"""Reproducible benchmarks for the serving hot paths, compared against a baseline.
+
+Every benchmark runs on a synthetic IMDB-like corpus generated from a fixed
+seed, so two runs on the same machine see exactly the same reviews. Covered:
+
+    tokenize_pad        texts_to_sequences + padding with the serving tokenizer
+    model_forward_bN    model.predict on N padded reviews (N = 1 .. 256)
+    key_phrases         extract_key_phrases
+    aspects             analyze_sentiment_aspects
+    lightweight         lightweight_analyze
+    http_analyze        POST /analyze end to end through the Flask test client
+
+Each benchmark is calibrated so a round lasts at least ``--min-round-time``,
+then timed over ``--rounds`` rounds; times are reported per review. Results
+are written as JSON and compared with a stored baseline: a benchmark whose
+median is more than ``--threshold`` slower fails the run (exit status 1).
+The result cache is disabled so every call does the full work.
+
+    python benchmark_suite.py --save-baseline          # on the reference commit
+    python benchmark_suite.py                          # after a change
+    INFERENCE_BACKEND=numpy python benchmark_suite.py --only tokenize_pad,model_forward
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Configure flask_server before it is imported: no cached results, jobs kept out of the tree
+os.environ['RESULT_CACHE_MAX_ENTRIES'] = '0'
+os.environ.pop('RESULT_CACHE_DB', None)
+os.environ.setdefault('JOBS_DIR', os.path.join(tempfile.gettempdir(), 'sentiment-benchmark-jobs'))
+
+from text_analysis import NEGATIVE_WORDS, NEUTRAL_WORDS, POSITIVE_WORDS, SERVER_ASPECTS  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(RESULTS_DIR, 'latest.json')
+DEFAULT_BATCH_SIZES = (1, 8, 32, 64, 128, 256)
+DEFAULT_THRESHOLD = 0.25  # Fail when the median gets 25% slower than the baseline
+MIN_REGRESSION_SECONDS = 2e-6  # Ignore slowdowns smaller than this per review (timer noise)
+CORPUS_SIZE = 512
+CORPUS_SEED = 1234
+HTTP_REVIEWS = 64  # Requests per round of http_analyze
+
+FILLER_WORDS = (
+    'the', 'a', 'and', 'of', 'to', 'is', 'it', 'in', 'this', 'that', 'was', 'with', 'for', 'but',
+    'movie', 'film', 'one', 'just', 'all', 'like', 'even', 'time', 'really', 'see', 'story', 'much',
+    'could', 'first', 'people', 'watch', 'would', 'make', 'way', 'think', 'seen', 'many', 'life',
+    'scene', 'end', 'show', 'back', 'still', 'man', 'never', 'years', 'part', 'something', 'minutes',
+    'little', 'actually', 'series', 'thing', 'quite', 'old', 'world', 'ending', 'though', 'music',
+    'horror', 'comedy', 'war', 'family', 'friends', 'night', 'girl', 'book', 'original', 'version'
+)
+
+
+def synthetic_review(rng):
+    """One review: log-normal length (median ~175 words, like IMDB), leaning positive or negative"""
+    length = int(min(1000, max(8, rng.lognormvariate(5.16, 0.75))))
+    polarity = rng.choice((POSITIVE_WORDS, NEGATIVE_WORDS))
+    other = NEGATIVE_WORDS if polarity is POSITIVE_WORDS else POSITIVE_WORDS
+    aspect_words = [word for words in SERVER_ASPECTS.values() for word in words]
+    pools = ((sorted(polarity), 0.08), (sorted(other), 0.02), (sorted(NEUTRAL_WORDS), 0.02),
+             (aspect_words, 0.06), (FILLER_WORDS, 0.82))
+    sentences, sentence = [], []
+    for _ in range(length):
+        pick = rng.random()
+        for words, share in pools:
+            pick -= share
+            if pick <= 0:
+                break
+        sentence.append(rng.choice(words))
+        if len(sentence) >= rng.randint(6, 24):
+            sentences.append(' '.join(sentence).capitalize() + rng.choice('..!?'))
+            sentence = []
+    if sentence:
+        sentences.append(' '.join(sentence).capitalize() + '.')
+    if rng.random() < 0.3:
+        sentences.append(f"{rng.randint(1, 10)}/10.")
+    # IMDB dumps keep the HTML line breaks between paragraphs
+    return ' '.join(text + ('<br /><br />' if rng.random() < 0.15 else '') for text in sentences)
+
+
+def synthetic_corpus(size=CORPUS_SIZE, seed=CORPUS_SEED):
+    rng = random.Random(seed)
+    return [synthetic_review(rng) for _ in range(size)]
+
+
+def measure(function, items, rounds, min_round_time):
+    """Per-item seconds over ``rounds`` rounds of a calibrated number of calls"""
+    function()  # Warm up caches, lazy loads and traced graphs
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_round_time / elapsed) + 1))
+    timings = [elapsed / number / items]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number / items)
+    return {
+        'items': items,
+        'calls_per_round': number,
+        'rounds': rounds,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.fmean(timings),
+        'stdev_s': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'items_per_s': 1.0 / statistics.median(timings)
+    }
+
+
+def build_benchmarks(server, corpus, batch_sizes):
+    """{name: (function, reviews per call)} in run order"""
+    tokenizer = server.get_tokenizer()
+    model = server.get_model()
+    if tokenizer is None or model is None:
+        raise SystemExit("The model or tokenizer could not be loaded; see the messages above")
+    maxlen = server.MAX_SEQUENCE_LENGTH
+    padded = tokenizer.pad(tokenizer.texts_to_sequences(corpus), maxlen=maxlen)
+    scores = model.predict_scores(padded)
+
+    benchmarks = {'tokenize_pad': (lambda: tokenizer.pad(tokenizer.texts_to_sequences(corpus), maxlen=maxlen),
+                                   len(corpus))}
+    for batch_size in batch_sizes:
+        batch = padded[:batch_size]
+        if len(batch) < batch_size:
+            batch = padded[[index % len(padded) for index in range(batch_size)]]
+        benchmarks[f'model_forward_b{batch_size}'] = (lambda batch=batch: model.predict(batch), batch_size)
+
+    labels = [server.label_sentiment(float(score)) for score in scores]
+    benchmarks['key_phrases'] = (
+        lambda: [server.extract_key_phrases(text, label) for text, label in zip(corpus, labels)], len(corpus))
+    benchmarks['aspects'] = (
+        lambda: [server.analyze_sentiment_aspects(text, float(score)) for text, score in zip(corpus, scores)],
+        len(corpus))
+    benchmarks['lightweight'] = (lambda: [server.lightweight_analyze(text) for text in corpus], len(corpus))
+
+    client = server.app.test_client()
+    requests = [json.dumps({'review': text}) for text in corpus[:HTTP_REVIEWS]]
+
+    def http_analyze():
+        for body in requests:
+            response = client.post('/analyze', data=body, content_type='application/json')
+            if response.status_code != 200:
+                raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)}")
+    benchmarks['http_analyze'] = (http_analyze, len(requests))
+    return benchmarks
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Rows of (name, baseline median, current median, change, status); status is 'REGRESSION' on failure"""
+    rows = []
+    for name, result in results['benchmarks'].items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            rows.append((name, None, result['median_s'], None, 'new'))
+            continue
+        change = result['median_s'] / reference['median_s'] - 1
+        slower_by = result['median_s'] - reference['median_s']
+        if change > threshold and slower_by > MIN_REGRESSION_SECONDS:
+            status = 'REGRESSION'
+        elif change < -threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((name, reference['median_s'], result['median_s'], change, status))
+    return rows
+
+
+def _us(seconds):
+    return '-' if seconds is None else f"{seconds * 1e6:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tokenizing, inference, text features and /analyze")
+    parser.add_argument('--only', help="Comma-separated benchmark name prefixes to run")
+    parser.add_argument('--batch-sizes', default=','.join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument('--corpus-size', type=int, default=CORPUS_SIZE)
+    parser.add_argument('--seed', type=int, default=CORPUS_SEED)
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--min-round-time', type=float, default=0.2, help="Seconds per timed round")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write this run's results")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Also store this run as the baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown of the median before a benchmark fails (0.25 = 25%%)")
+    parser.add_argument('--write-corpus', help="Write the synthetic corpus as JSONL and exit")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.corpus_size, args.seed)
+    if args.write_corpus:
+        with open(args.write_corpus, 'w', encoding='utf8') as f:
+            for review in corpus:
+                f.write(json.dumps({'review': review}) + '\n')
+        print(f"Wrote {len(corpus)} reviews to {args.write_corpus}")
+        return
+
+    import numpy as np
+
+    import flask_server
+
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',') if size.strip()]
+    benchmarks = build_benchmarks(flask_server, corpus, batch_sizes)
+    prefixes = [prefix.strip() for prefix in args.only.split(',')] if args.only else None
+
+    lengths = sorted(len(review.split()) for review in corpus)
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_revision': git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'inference_backend': flask_server.INFERENCE_BACKEND,
+            'model_version': flask_server.MODEL_VERSION
+        },
+        'corpus': {'size': len(corpus), 'seed': args.seed, 'median_words': lengths[len(lengths) // 2],
+                   'max_words': lengths[-1]},
+        'benchmarks': {}
+    }
+    print(f"{'benchmark':<22}{'median us/review':>18}{'min':>10}{'stdev':>10}{'reviews/s':>12}")
+    for name, (function, items) in benchmarks.items():
+        if prefixes and not any(name.startswith(prefix) for prefix in prefixes):
+            continue
+        result = results['benchmarks'][name] = measure(function, items, args.rounds, args.min_round_time)
+        print(f"{name:<22}{_us(result['median_s']):>18}{_us(result['min_s']):>10}"
+              f"{_us(result['stdev_s']):>10}{result['items_per_s']:>12.0f}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf8') as f:
+            baseline = json.load(f)
+        for key in ('inference_backend', 'cpu_count', 'python'):
+            if baseline['environment'].get(key) != results['environment'][key]:
+                print(f"Warning: baseline {key} is {baseline['environment'].get(key)!r}, "
+                      f"this run {results['environment'][key]!r}")
+        print(f"\nCompared with {args.baseline} ({baseline.get('git_revision') or 'unknown revision'}), "
+              f"threshold {args.threshold:.0%}:")
+        print(f"{'benchmark':<22}{'baseline us':>14}{'current us':>14}{'change':>10}  status")
+        for name, before, after, change, status in compare(results, baseline, args.threshold):
+            change_text = '-' if change is None else f"{change:+.1%}"
+            print(f"{name:<22}{_us(before):>14}{_us(after):>14}{change_text:>10}  {status}")
+            if status == 'REGRESSION':
+                regressions.append(name)
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}; store one with --save-baseline")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""Offline bulk scoring of review dumps (CSV, JSONL or Parquet).
+
+Rows are read in chunks and scored by a pool of worker processes, each of
+which imports flask_server once and so uses the same model, tokenizer,
+thresholds and key-phrase/aspect logic as the API. Results are appended to
+the output file in input order, and a checkpoint next to it records how far
+the output is complete, so an interrupted run picks up where it stopped.
+
+    python bulk_score.py IMDB_Dataset.csv scored.jsonl --workers 4
+    python bulk_score.py reviews.parquet scored.csv --review-column text
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_jobs import RESULT_COLUMNS, detect_columns, iter_rows
+
+STAGES = ('read', 'tokenize', 'predict', 'features', 'write')
+
+_server = None
+
+
+def input_format_for(path):
+    name = path.lower()
+    if name.endswith('.parquet'):
+        return 'parquet'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def iter_parquet_rows(path, review_field, title_field, start=0, batch_size=10000):
+    """Yield (row_index, movie_title, review) from a Parquet file (needs pyarrow)"""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    if review_field is None:
+        review_field, title_field = detect_columns(parquet_file.schema_arrow.names)
+        if review_field is None:
+            raise ValueError('Could not find a review column in the Parquet file')
+    columns = [review_field] + ([title_field] if title_field else [])
+    index = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        if index + batch.num_rows <= start:
+            index += batch.num_rows
+            continue
+        data = batch.to_pydict()
+        titles = data[title_field] if title_field else [None] * batch.num_rows
+        for review, title in zip(data[review_field], titles):
+            if index >= start:
+                yield index, title or f"Review #{index + 1}", review or ''
+            index += 1
+
+
+def open_rows(path, input_format, review_field=None, title_field=None, start=0):
+    if input_format == 'parquet':
+        return iter_parquet_rows(path, review_field, title_field, start)
+    if input_format == 'csv' and review_field is None:
+        with open(path, 'r', encoding='utf8', errors='replace', newline='') as f:
+            detected_review, detected_title = detect_columns(csv.DictReader(f).fieldnames or [])
+        review_field = detected_review
+        title_field = title_field or detected_title
+        if review_field is None:
+            raise ValueError('Could not find a review column in the CSV file')
+    return iter_rows(path, input_format, review_field, title_field, start)
+
+
+def iter_chunks(rows, chunk_size, timings):
+    chunk = []
+    started = time.perf_counter()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            timings['read'] += time.perf_counter() - started
+            yield chunk
+            chunk = []
+            started = time.perf_counter()
+    timings['read'] += time.perf_counter() - started
+    if chunk:
+        yield chunk
+
+
+def init_worker(backend):
+    """Load the model and tokenizer once per worker process"""
+    global _server
+    os.environ['INFERENCE_BACKEND'] = backend
+    # Every row is scored once, so the per-process result cache would only use memory
+    os.environ.setdefault('RESULT_CACHE_MAX_ENTRIES', '0')
+    import flask_server
+    _server = flask_server
+    _server.get_model()
+    _server.get_tokenizer()
+
+
+def score_chunk(chunk):
+    """Score one chunk of (row_index, movie_title, review); returns (rows, stage timings)"""
+    server = _server
+    texts = [review if isinstance(review, str) else '' for _, _, review in chunk]
+    valid = [i for i, text in enumerate(texts) if text.strip()]
+    timings = dict.fromkeys(('tokenize', 'predict', 'features'), 0.0)
+    results = [{'error': 'Review text is required'} for _ in chunk]
+
+    model = server.get_model()
+    tokenizer = server.get_tokenizer()
+    if valid and model and tokenizer:
+        started = time.perf_counter()
+        padded = tokenizer.encode_batch([texts[i] for i in valid], maxlen=server.MAX_SEQUENCE_LENGTH)
+        timings['tokenize'] = time.perf_counter() - started
+        started = time.perf_counter()
+        scores = server.run_model(padded)
+        timings['predict'] = time.perf_counter() - started
+        started = time.perf_counter()
+        for i, score in zip(valid, scores):
+            results[i] = server.build_analysis(texts[i], score, 'full_model')
+        timings['features'] = time.perf_counter() - started
+    elif valid:
+        # Same fallback as the API when the model cannot be loaded
+        started = time.perf_counter()
+        for i in valid:
+            results[i] = server.lightweight_analyze(texts[i])
+        timings['features'] = time.perf_counter() - started
+
+    rows = [(index, title, review, result) for (index, title, review), result in zip(chunk, results)]
+    return rows, timings
+
+
+class ResultWriter:
+    """Append results to a CSV or JSONL file and checkpoint after each chunk"""
+
+    def __init__(self, path, resume):
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint'
+        self.format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        self.rows_done = 0
+        offset = 0
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf8') as f:
+                checkpoint = json.load(f)
+            self.rows_done = checkpoint['rows_done']
+            offset = checkpoint['offset']
+        self._file = open(path, 'a+' if offset else 'w', encoding='utf8', newline='')
+        if offset:
+            # Drop anything written after the last checkpoint
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        self._csv = csv.writer(self._file) if self.format == 'csv' else None
+        if self._csv and not offset:
+            self._csv.writerow(RESULT_COLUMNS + ['key_phrases', 'aspect_analysis'])
+
+    def write(self, rows):
+        for index, title, review, result in rows:
+            if self._csv:
+                self._csv.writerow([
+                    index, title, review, result.get('sentiment'), result.get('confidence'),
+                    result.get('method'), result.get('error'),
+                    '; '.join(result.get('key_phrases', [])),
+                    json.dumps(result.get('aspect_analysis', {}))
+                ])
+            else:
+                self._file.write(json.dumps(dict(result, row=index, movieTitle=title)) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.rows_done = rows[-1][0] + 1
+        checkpoint = {'rows_done': self.rows_done, 'offset': self._file.tell()}
+        with open(self.checkpoint_path + '.tmp', 'w', encoding='utf8') as f:
+            json.dump(checkpoint, f)
+        os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+
+    def close(self, completed):
+        self._file.close()
+        if completed and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+
+def run(args):
+    input_format = args.format or input_format_for(args.input)
+    writer = ResultWriter(args.output, resume=not args.restart)
+    if writer.rows_done:
+        print(f"Resuming after {writer.rows_done} rows from {writer.checkpoint_path}")
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    rows = open_rows(args.input, input_format, args.review_column, args.title_column, start=writer.rows_done)
+    chunks = iter_chunks(rows, args.chunk_size, timings)
+    scored = 0
+    completed = False
+    started = time.perf_counter()
+    last_report = started
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                 initargs=(args.backend,)) as pool:
+            # Bounded window of chunks in flight keeps memory flat on huge inputs
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(score_chunk, chunk))
+                while len(pending) >= args.workers * 2:
+                    scored += write_next(pending, writer, timings)
+                if time.perf_counter() - last_report >= args.report_every:
+                    last_report = time.perf_counter()
+                    print_progress(scored, last_report - started)
+            while pending:
+                scored += write_next(pending, writer, timings)
+        completed = True
+    finally:
+        writer.close(completed)
+
+    elapsed = time.perf_counter() - started
+    print_report(scored, elapsed, timings, args.workers)
+
+
+def write_next(pending, writer, timings):
+    rows, chunk_timings = pending.popleft().result()
+    for stage, seconds in chunk_timings.items():
+        timings[stage] += seconds
+    started = time.perf_counter()
+    writer.write(rows)
+    timings['write'] += time.perf_counter() - started
+    return len(rows)
+
+
+def print_progress(scored, elapsed):
+    print(f"{scored} reviews scored, {scored / max(elapsed, 1e-9):.1f} reviews/s")
+
+
+def print_report(scored, elapsed, timings, workers):
+    print(f"Scored {scored} reviews in {elapsed:.1f} s ({scored / max(elapsed, 1e-9):.1f} reviews/s, "
+          f"{workers} workers)")
+    for stage in STAGES:
+        # Worker stages are summed across processes
+        where = 'main' if stage in ('read', 'write') else 'workers'
+        print(f"  {stage:<9} {timings[stage]:8.2f} s ({where})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a review dump with the sentiment model")
+    parser.add_argument('input', help="CSV, JSONL or Parquet file of reviews")
+    parser.add_argument('output', help="Output file (.csv or .jsonl)")
+    parser.add_argument('--format', choices=('csv', 'jsonl', 'parquet'), help="Input format (default: from extension)")
+    parser.add_argument('--review-column', help="Review column (default: first column containing 'review' or 'text')")
+    parser.add_argument('--title-column', help="Title column (default: first column containing 'title' or 'movie')")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=512, help="Reviews per worker task")
+    parser.add_argument('--backend', default=os.environ.get('INFERENCE_BACKEND', 'numpy'),
+                        help="Inference backend for the workers (keras, numpy or tflite)")
+    parser.add_argument('--restart', action='store_true', help="Ignore any checkpoint and start over")
+    parser.add_argument('--report-every', type=float, default=10.0, help="Seconds between progress lines")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Standalone replacement for Keras ``Tokenizer.texts_to_sequences``.
+
+The vocabulary is exported once from ``tokenizer.pkl`` into a small JSON
+file. Encoding then needs only a precompiled ``str.translate`` table, one
+``split`` and a dict lookup per word, and batches are written straight into
+a preallocated, pre-padded int32 matrix.
+
+    python fast_tokenizer.py export python/tokenizer.pkl python/vocab.json
+    python fast_tokenizer.py verify python/tokenizer.pkl [--csv IMDB_Dataset.csv]
+"""
+import argparse
+import json
+import pickle
+import time
+
+import numpy as np
+
+MAX_SEQUENCE_LENGTH = 200  # Must match the padding used at training time
+VOCAB_FORMAT = 'fast-tokenizer/1'
+KERAS_DEFAULT_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+# Reviews used by the parity check when no IMDB CSV is given
+SAMPLE_REVIEWS = [
+    "I absolutely loved this movie! The acting was superb and the plot kept me engaged throughout. The cinematography was breathtaking and the musical score perfectly complemented the emotional scenes. Definitely one of the best films I've seen this year, and I would highly recommend it to anyone who appreciates thoughtful storytelling.",
+    "This movie was a complete waste of time and money. The plot made no sense, the characters were poorly developed, and the acting was terrible. The special effects looked cheap and the dialogue was cringe-worthy. I found myself checking my watch repeatedly, waiting for it to end. Save yourself the disappointment and skip this one.",
+    "The movie had some good moments and the lead actor gave a decent performance, but overall it fell short of my expectations. The first half was engaging but the story lost its way in the second half. Some scenes were beautifully shot, while others felt rushed. It's not terrible, but I wouldn't go out of my way to recommend it.",
+    "This movie was fantastic and amazing",
+    "A trilling adventure with stunning visual",
+    "A visual masterpiece",
+    "Overall long and slow",
+    "One of the other reviewers has mentioned that after watching just 1 Oz episode you'll be hooked.<br /><br />They are right, as this is exactly what happened with me.",
+    "So-so...   not\tgreat,\nnot awful; 7/10 -- \"meh\" (would NOT watch again)!!",
+    "Café society déjà vu — ÜBER long, 10/10?",
+    ""
+]
+
+
+class _KerasUnpickler(pickle.Unpickler):
+    """Unpickler that remaps old keras module paths to tensorflow.keras"""
+
+    def find_class(self, module, name):
+        if module.startswith('keras.src.'):
+            module = 'tensorflow.keras' + module[9:]
+        elif module.startswith('keras.'):
+            module = 'tensorflow.' + module
+        return super().find_class(module, name)
+
+
+def load_keras_tokenizer(path):
+    """Load a pickled Keras Tokenizer, remapping module paths if needed"""
+    try:
+        import joblib
+        return joblib.load(path)
+    except Exception as e:
+        print(f"Using compatibility mode to load tokenizer... Error: {e}")
+        with open(path, 'rb') as f:
+            return _KerasUnpickler(f).load()
+
+
+class FastTokenizer:
+    """Produce the same integer sequences as a fitted Keras Tokenizer"""
+
+    def __init__(self, word_index, num_words=None, filters=KERAS_DEFAULT_FILTERS,
+                 lower=True, split=' ', oov_index=None):
+        self.num_words = num_words
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.oov_index = oov_index
+        # Words at or beyond num_words never reach the model: Keras either
+        # drops them or maps them to the OOV index, same as an unknown word.
+        # Non-dict vocabularies (e.g. memory-mapped) are already trimmed.
+        if num_words and isinstance(word_index, dict):
+            word_index = {word: index for word, index in word_index.items() if index < num_words}
+        self.word_index = word_index
+        self._table = str.maketrans({c: split for c in filters})
+
+    @classmethod
+    def from_keras(cls, keras_tokenizer):
+        """Build from a fitted ``tensorflow.keras.preprocessing.text.Tokenizer``"""
+        if getattr(keras_tokenizer, 'char_level', False):
+            raise ValueError("Character-level tokenizers are not supported")
+        oov_token = getattr(keras_tokenizer, 'oov_token', None)
+        oov_index = keras_tokenizer.word_index.get(oov_token) if oov_token is not None else None
+        return cls(
+            dict(keras_tokenizer.word_index),
+            num_words=keras_tokenizer.num_words,
+            filters=keras_tokenizer.filters,
+            lower=keras_tokenizer.lower,
+            split=keras_tokenizer.split,
+            oov_index=oov_index
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a vocabulary written by :meth:`save`"""
+        with open(path, 'r', encoding='utf8') as f:
+            data = json.load(f)
+        if data.get('format') != VOCAB_FORMAT:
+            raise ValueError(f"{path} is not a {VOCAB_FORMAT} vocabulary")
+        return cls(
+            data['word_index'],
+            num_words=data['num_words'],
+            filters=data['filters'],
+            lower=data['lower'],
+            split=data['split'],
+            oov_index=data['oov_index']
+        )
+
+    def save(self, path):
+        """Write the compact vocabulary (only indices below num_words)"""
+        with open(path, 'w', encoding='utf8') as f:
+            json.dump({
+                'format': VOCAB_FORMAT,
+                'num_words': self.num_words,
+                'filters': self.filters,
+                'lower': self.lower,
+                'split': self.split,
+                'oov_index': self.oov_index,
+                'word_index': dict(self.word_index.items())
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    def encode(self, text):
+        """Integer sequence for one text, identical to ``texts_to_sequences``"""
+        if self.lower:
+            text = text.lower()
+        words = text.translate(self._table).split(self.split)
+        lookup = self.word_index.get
+        if self.oov_index is None:
+            # Indices start at 1, so unknown words and empty splits drop out
+            return [index for index in map(lookup, words) if index]
+        oov_index = self.oov_index
+        return [lookup(word, oov_index) for word in words if word]
+
+    def texts_to_sequences(self, texts):
+        """Keras-compatible list-of-lists API"""
+        return [self.encode(text) for text in texts]
+
+    @staticmethod
+    def pad(sequences, maxlen=MAX_SEQUENCE_LENGTH):
+        """Pre-padded, pre-truncated int32 matrix (``pad_sequences`` defaults)"""
+        padded = np.zeros((len(sequences), maxlen), dtype=np.int32)
+        for row, sequence in enumerate(sequences):
+            if sequence:
+                sequence = sequence[-maxlen:]
+                padded[row, maxlen - len(sequence):] = sequence
+        return padded
+
+    def encode_batch(self, texts, maxlen=MAX_SEQUENCE_LENGTH):
+        """Encode straight into a pre-padded, pre-truncated int32 matrix
+
+        Equivalent to ``pad_sequences(texts_to_sequences(texts), maxlen)``.
+        """
+        return self.pad(self.texts_to_sequences(texts), maxlen)
+
+
+def check_parity(keras_tokenizer, texts, maxlen=MAX_SEQUENCE_LENGTH):
+    """Assert FastTokenizer matches Keras on ``texts``; return the mismatch count"""
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    fast = FastTokenizer.from_keras(keras_tokenizer)
+    expected = keras_tokenizer.texts_to_sequences(texts)
+    actual = fast.texts_to_sequences(texts)
+    mismatches = sum(1 for a, b in zip(expected, actual) if list(a) != list(b))
+    assert mismatches == 0, f"{mismatches} of {len(texts)} sequences differ from Keras"
+    assert np.array_equal(pad_sequences(expected, maxlen=maxlen), fast.encode_batch(texts, maxlen)), \
+        "Padded batch differs from Keras pad_sequences"
+    return mismatches
+
+
+def _read_reviews(csv_path, limit):
+    import csv
+    with open(csv_path, newline='', encoding='utf8') as f:
+        reader = csv.DictReader(f)
+        return [row['review'] for _, row in zip(range(limit), reader)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and verify the fast tokenizer vocabulary")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Write the compact vocabulary from tokenizer.pkl")
+    export_parser.add_argument('tokenizer_path')
+    export_parser.add_argument('vocab_path')
+
+    verify_parser = subparsers.add_parser('verify', help="Check parity and speed against the Keras tokenizer")
+    verify_parser.add_argument('tokenizer_path')
+    verify_parser.add_argument('--csv', help="IMDB-style CSV with a 'review' column")
+    verify_parser.add_argument('--limit', type=int, default=5000)
+    args = parser.parse_args()
+
+    keras_tokenizer = load_keras_tokenizer(args.tokenizer_path)
+
+    if args.command == 'export':
+        fast = FastTokenizer.from_keras(keras_tokenizer)
+        fast.save(args.vocab_path)
+        print(f"Wrote {len(fast.word_index)} words to {args.vocab_path}")
+        return
+
+    texts = _read_reviews(args.csv, args.limit) if args.csv else SAMPLE_REVIEWS
+    check_parity(keras_tokenizer, texts)
+    print(f"Parity OK on {len(texts)} reviews")
+
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    fast = FastTokenizer.from_keras(keras_tokenizer)
+    started = time.perf_counter()
+    pad_sequences(keras_tokenizer.texts_to_sequences(texts), maxlen=MAX_SEQUENCE_LENGTH)
+    keras_time = time.perf_counter() - started
+    started = time.perf_counter()
+    fast.encode_batch(texts)
+    fast_time = time.perf_counter() - started
+    print(f"Keras: {keras_time * 1000:.1f} ms, fast: {fast_time * 1000:.1f} ms "
+          f"({keras_time / max(fast_time, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
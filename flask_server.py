@@ -20,38 +20,56 @@ except ImportError as e:
     import numpy as np
     print(f"Reinstalled NumPy version: {np.__version__}")
 
+# Inference backend: 'keras' (TensorFlow), 'numpy' (TensorFlow-free LSTM engine)
+# or 'tflite' (converted model on the TFLite interpreter, see tflite_engine.py)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras').lower()
+
 # Now import other dependencies with better error handling
 try:
-    import tensorflow as tf
-    print(f"TensorFlow version: {tf.__version__}")
-    
-    # Configure TensorFlow to use less memory
-    physical_devices = tf.config.list_physical_devices('GPU')
-    if physical_devices:
-        for device in physical_devices:
-            tf.config.experimental.set_memory_growth(device, True)
-    
-    # Limit TensorFlow to use only necessary memory
-    gpus = tf.config.experimental.list_physical_devices('GPU')
-    if gpus:
-        try:
-            for gpu in gpus:
-                tf.config.experimental.set_virtual_device_configuration(
-                    gpu,
-                    [tf.config.experimental.VirtualDeviceConfiguration(memory_limit=1024)]
-                )
-        except RuntimeError as e:
-            print(f"Virtual device configuration error: {e}")
+    if INFERENCE_BACKEND == 'keras':
+        import tensorflow as tf
+        print(f"TensorFlow version: {tf.__version__}")
+        
+        # Configure TensorFlow to use less memory
+        physical_devices = tf.config.list_physical_devices('GPU')
+        if physical_devices:
+            for device in physical_devices:
+                tf.config.experimental.set_memory_growth(device, True)
+        
+        # Limit TensorFlow to use only necessary memory
+        gpus = tf.config.experimental.list_physical_devices('GPU')
+        if gpus:
+            try:
+                for gpu in gpus:
+                    tf.config.experimental.set_virtual_device_configuration(
+                        gpu,
+                        [tf.config.experimental.VirtualDeviceConfiguration(memory_limit=1024)]
+                    )
+            except RuntimeError as e:
+                print(f"Virtual device configuration error: {e}")
     
     import joblib
     import pickle
-    from tensorflow.keras.preprocessing.sequence import pad_sequences
-    import re
-    from collections import Counter
     import json
-    from flask import Flask, request, jsonify
+    from flask import Flask, request, jsonify, Response, stream_with_context
     from flask_cors import CORS
     import gc  # For garbage collection
+    import threading
+    import time
+    import multiprocessing
+    from micro_batcher import MicroBatcher
+    from inference_pool import InferencePool
+    from inference_engine import InferenceEngine, load_keras_model
+    from numpy_lstm import NumpyLSTMEngine, read_manifest
+    from tflite_engine import TFLiteEngine, ensure_tflite
+    from fast_tokenizer import FastTokenizer
+    from mmap_vocab import load_tokenizer as load_mmap_tokenizer
+    from result_cache import ResultCache
+    from process_memory import process_memory
+    from metrics import Metrics
+    from quantize_model import weights_dir_for
+    from text_analysis import AnalyzedText, as_analyzed
+    from batch_jobs import JobStore, JobRunner, detect_format, inspect_upload
 except ImportError as e:
     print(f"Error importing dependencies: {e}")
     raise
@@ -88,116 +106,277 @@ CORS(app, origins=[
 # Define paths to model and tokenizer files
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "python", "model.h5")
 TOKENIZER_PATH = os.path.join(os.path.dirname(__file__), "python", "tokenizer.pkl")
+VOCAB_PATH = os.environ.get('VOCAB_PATH', os.path.join(os.path.dirname(__file__), "python", "vocab.json"))
+MMAP_VOCAB_PATH = os.environ.get('MMAP_VOCAB_PATH', os.path.join(os.path.dirname(__file__), "python", "vocab.bin"))
+MODEL_WEIGHTS_DIR = os.environ.get('MODEL_WEIGHTS_DIR', os.path.join(os.path.dirname(__file__), "python", "model_weights"))
+# NumPy backend weight precision: none (float32), float16 or int8 (see quantize_model.py)
+MODEL_QUANTIZATION = os.environ.get('MODEL_QUANTIZATION', 'none').lower()
+SERVING_WEIGHTS_DIR = weights_dir_for(MODEL_WEIGHTS_DIR, MODEL_QUANTIZATION)
+# Vocabulary-pruned weights and tokenizer written by prune_vocab.py (NumPy backend only)
+PRUNED_MODEL_DIR = os.environ.get('PRUNED_MODEL_DIR', '')
+if PRUNED_MODEL_DIR and INFERENCE_BACKEND != 'numpy':
+    print(f"PRUNED_MODEL_DIR needs INFERENCE_BACKEND=numpy, ignoring it for {INFERENCE_BACKEND}")
+    PRUNED_MODEL_DIR = ''
+if PRUNED_MODEL_DIR:
+    SERVING_WEIGHTS_DIR = PRUNED_MODEL_DIR
 
 # Global variables for model and tokenizer
 model = None
 tokenizer = None
+model_lock = threading.Lock()
+tokenizer_lock = threading.Lock()
+
+# "eager" loads and warms up the model when the server starts (before
+# gunicorn forks with --preload; an inference pool is started by each
+# worker instead); "lazy" waits for the first request
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'lazy').lower()
+# Dummy batch sizes run at warmup so no request pays for first-use setup
+WARMUP_BATCH_SIZES = tuple(
+    int(size) for size in os.environ.get('WARMUP_BATCH_SIZES', '1,8,64').split(',') if size.strip()
+)
+startup_timings = {}
+startup_thread = None
+startup_lock = threading.Lock()
+
+def load_keras_engine():
+    """Load model.h5 with TensorFlow and wrap it in the tf.function engine"""
+    # Serve through a traced tf.function instead of model.predict
+    return InferenceEngine(
+        load_keras_model(MODEL_PATH),
+        max_sequence_length=MAX_SEQUENCE_LENGTH,
+        batch_size=PREDICT_BATCH_SIZE
+    )
+
+def export_numpy_weights():
+    """Make sure SERVING_WEIGHTS_DIR holds a current export of model.h5; returns whether it does
+    
+    The export is quantized if MODEL_QUANTIZATION is set and is written
+    again whenever model.h5 changes. It runs at import in the serving
+    process, so with --preload the gunicorn master writes it once before
+    the workers fork and map it; without --preload concurrent workers may
+    each write it, which is safe since an export never rewrites mapped files.
+    """
+    source = file_signature(MODEL_PATH)
+    quantization = None if MODEL_QUANTIZATION == 'none' else MODEL_QUANTIZATION
+    try:
+        manifest = read_manifest(SERVING_WEIGHTS_DIR)
+        if manifest.get('quantization') == quantization and (
+                manifest.get('source') in (source, None) or source == 'missing'):
+            return True
+        print("Memory-mapped weights are out of date for model.h5, exporting again")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Exporting the model weights again, the current export is unreadable... Error: {e}")
+    if source == 'missing':
+        return False
+    
+    try:
+        engine = NumpyLSTMEngine.from_h5(MODEL_PATH)
+        if quantization:
+            engine = engine.quantize(quantization)
+        engine.save_weights(SERVING_WEIGHTS_DIR, source=source)
+    except Exception as e:
+        print(f"Could not export model weights: {e}")
+        return False
+    print("Model weights exported for memory mapping to", SERVING_WEIGHTS_DIR)
+    return True
+
+def load_numpy_engine():
+    """Serve the model without TensorFlow from memory-mapped weights
+    
+    The .npy export (see export_numpy_weights) is mapped read-only, so the
+    master (with --preload) and every worker share one copy of the weights.
+    If it cannot be written, the engine is built from model.h5 in memory.
+    """
+    options = dict(max_sequence_length=MAX_SEQUENCE_LENGTH, batch_size=PREDICT_BATCH_SIZE,
+                   length_buckets=LENGTH_BUCKETS)
+    if PRUNED_MODEL_DIR:
+        # Pruned rows only match the remapped vocabulary next to them, never model.h5
+        engine = NumpyLSTMEngine.from_weights(PRUNED_MODEL_DIR, **options)
+        print("Pruned model weights memory-mapped from", PRUNED_MODEL_DIR)
+        return engine
+    if export_numpy_weights():
+        try:
+            engine = NumpyLSTMEngine.from_weights(SERVING_WEIGHTS_DIR, **options)
+            print("Model weights memory-mapped from", SERVING_WEIGHTS_DIR)
+            return engine
+        except Exception as e:
+            print(f"Failed to map model weights, using model.h5... Error: {e}")
+    
+    engine = NumpyLSTMEngine.from_h5(MODEL_PATH, **options)
+    print("Model loaded into the NumPy engine from", MODEL_PATH)
+    if MODEL_QUANTIZATION != 'none':
+        engine = engine.quantize(MODEL_QUANTIZATION)
+        print(f"Model weights quantized to {MODEL_QUANTIZATION}")
+    return engine
+
+def load_tflite_engine():
+    """Serve the model on TFLite interpreters, one set per request thread
+    
+    model.h5 is converted once per batch size and cached next to it; the
+    conversion needs TensorFlow, serving only needs tflite_runtime.
+    """
+    engine = TFLiteEngine.from_h5(
+        MODEL_PATH,
+        batch_sizes=TFLITE_BATCH_SIZES,
+        num_threads=TFLITE_THREADS,
+        max_sequence_length=MAX_SEQUENCE_LENGTH,
+        batch_size=PREDICT_BATCH_SIZE
+    )
+    print(f"TFLite model loaded for batch sizes {engine.batch_sizes} ({engine.num_threads} threads)")
+    return engine
+
+def prepare_inference_pool():
+    """Write the model files the pool processes load, so they are not all converting at once"""
+    if INFERENCE_BACKEND == 'tflite':
+        ensure_tflite(MODEL_PATH, TFLITE_BATCH_SIZES + (PREDICT_BATCH_SIZE,), MAX_SEQUENCE_LENGTH)
+    elif INFERENCE_BACKEND == 'numpy' and not PRUNED_MODEL_DIR:
+        # Same quantized, up-to-date export load_numpy_engine maps; workers
+        # build it from model.h5 themselves only if it cannot be written
+        export_numpy_weights()
+
+def load_inference_pool():
+    """Start worker processes that own the model instead of loading it here"""
+    prepare_inference_pool()
+    pool = InferencePool(
+        INFERENCE_BACKEND,
+        MODEL_PATH,
+        weights_dir=SERVING_WEIGHTS_DIR,
+        size=INFERENCE_POOL_SIZE,
+        threads=INFERENCE_POOL_THREADS,
+        max_pending=INFERENCE_POOL_MAX_PENDING,
+        timeout=INFERENCE_POOL_TIMEOUT,
+        max_sequence_length=MAX_SEQUENCE_LENGTH,
+        batch_size=PREDICT_BATCH_SIZE,
+        length_buckets=LENGTH_BUCKETS,
+        quantization=None if PRUNED_MODEL_DIR else MODEL_QUANTIZATION
+    )
+    print(f"Started {pool.size} inference worker processes ({pool.threads} threads each)")
+    return pool
+
+MODEL_LOADERS = {
+    'keras': load_keras_engine,
+    'numpy': load_numpy_engine,
+    'tflite': load_tflite_engine
+}
 
-# Lazy loading function for model - only load when needed
 def get_model():
+    """Load and warm up the model once; concurrent callers wait on the lock"""
     global model
+    # An inference pool inherited across a fork has no live workers here
+    if model is not None and getattr(model, 'pid', os.getpid()) != os.getpid():
+        model = None
     if model is None:
+        with model_lock:
+            if model is None:
+                try:
+                    started = time.perf_counter()
+                    loader = load_inference_pool if INFERENCE_POOL_SIZE > 0 else MODEL_LOADERS[INFERENCE_BACKEND]
+                    engine = loader()
+                    startup_timings['model_load_s'] = round(time.perf_counter() - started, 4)
+                    started = time.perf_counter()
+                    engine.warmup(batch_sizes=WARMUP_BATCH_SIZES)
+                    startup_timings['warmup_s'] = round(time.perf_counter() - started, 4)
+                    model = engine
+                except Exception as e:
+                    print(f"Failed to load model: {e}")
+                    startup_timings['model_error'] = str(e)
+                    return None
+    return model
+
+def load_keras_tokenizer():
+    """Unpickle the Keras tokenizer from tokenizer.pkl"""
+    try:
+        keras_tokenizer = joblib.load(TOKENIZER_PATH)
+        print("Tokenizer loaded successfully from", TOKENIZER_PATH)
+    except Exception as e:
+        print(f"Using compatibility mode to load tokenizer... Error: {e}")
         try:
-            # First attempt: try loading with standard method
-            model = tf.keras.models.load_model(MODEL_PATH)
-            print("Model loaded successfully from", MODEL_PATH)
-        except ValueError as e:
-            # Second attempt: use custom object scope to ignore incompatible parameters
-            print(f"Using compatibility mode to load model... Error: {e}")
-            
-            # Custom LSTM layer that ignores the time_major parameter
-            class CompatibleLSTM(tf.keras.layers.LSTM):
-                def __init__(self, *args, **kwargs):
-                    # Remove incompatible parameters
-                    if 'time_major' in kwargs:
-                        del kwargs['time_major']
-                    super().__init__(*args, **kwargs)
-            
-            # Load with custom objects
-            model = tf.keras.models.load_model(
-                MODEL_PATH, 
-                custom_objects={'LSTM': CompatibleLSTM}
-            )
-            print("Model loaded with compatibility mode from", MODEL_PATH)
+            # Try to load with custom unpickler
+            with open(TOKENIZER_PATH, 'rb') as f:
+                keras_tokenizer = CustomUnpickler(f).load()
+            print("Tokenizer loaded with custom unpickler from", TOKENIZER_PATH)
+        except Exception as e2:
+            print(f"Failed to load tokenizer with custom unpickler: {e2}")
+            # As a last resort, recreate a basic tokenizer
+            try:
+                from tensorflow.keras.preprocessing.text import Tokenizer
+                print("Creating a new tokenizer. This may not match the original exactly.")
+                keras_tokenizer = Tokenizer(num_words=5000)
+            except Exception as e3:
+                print(f"Failed to create new tokenizer: {e3}")
+                return None
+    return keras_tokenizer
+
+def load_tokenizer():
+    """Load the tokenizer from the fastest available artifact"""
+    if PRUNED_MODEL_DIR:
+        # Must be the remapped vocabulary written with the pruned weights
+        pruned_vocab_path = os.path.join(PRUNED_MODEL_DIR, 'vocab.json')
+        try:
+            tokenizer = FastTokenizer.load(pruned_vocab_path)
+            print("Pruned tokenizer vocabulary loaded from", pruned_vocab_path)
+            return tokenizer
         except Exception as e:
-            print(f"Failed to load model: {e}")
+            print(f"Error loading pruned tokenizer vocabulary: {e}")
             return None
-    return model
+    
+    # Memory-mapped vocabulary is shared read-only by every worker
+    if os.path.exists(MMAP_VOCAB_PATH):
+        try:
+            tokenizer = load_mmap_tokenizer(MMAP_VOCAB_PATH)
+            print("Tokenizer vocabulary memory-mapped from", MMAP_VOCAB_PATH)
+            return tokenizer
+        except Exception as e:
+            print(f"Failed to map tokenizer vocabulary, trying vocab.json... Error: {e}")
+    
+    # Otherwise prefer the exported vocabulary: no pickle, no Keras import
+    if os.path.exists(VOCAB_PATH):
+        try:
+            tokenizer = FastTokenizer.load(VOCAB_PATH)
+            print("Tokenizer vocabulary loaded from", VOCAB_PATH)
+            return tokenizer
+        except Exception as e:
+            print(f"Failed to load tokenizer vocabulary, using tokenizer.pkl... Error: {e}")
+    
+    keras_tokenizer = load_keras_tokenizer()
+    if keras_tokenizer is None:
+        return None
+    tokenizer = FastTokenizer.from_keras(keras_tokenizer)
+    if not tokenizer.word_index:
+        # The empty last-resort tokenizer: exporting it would outlive the pickle problem
+        print("Tokenizer vocabulary is empty, not exporting it to", VOCAB_PATH)
+        return tokenizer
+    
+    # Export the vocabulary so later starts skip the pickle
+    try:
+        tokenizer.save(VOCAB_PATH)
+        print("Tokenizer vocabulary exported to", VOCAB_PATH)
+    except OSError as e:
+        print(f"Could not export tokenizer vocabulary: {e}")
+    return tokenizer
 
-# Lazy loading function for tokenizer
 def get_tokenizer():
+    """Load the tokenizer once; concurrent callers wait on the lock"""
     global tokenizer
     if tokenizer is None:
-        try:
-            tokenizer = joblib.load(TOKENIZER_PATH)
-            print("Tokenizer loaded successfully from", TOKENIZER_PATH)
-        except Exception as e:
-            print(f"Using compatibility mode to load tokenizer... Error: {e}")
-            try:
-                # Try to load with custom unpickler
-                with open(TOKENIZER_PATH, 'rb') as f:
-                    tokenizer = CustomUnpickler(f).load()
-                print("Tokenizer loaded with custom unpickler from", TOKENIZER_PATH)
-            except Exception as e2:
-                print(f"Failed to load tokenizer with custom unpickler: {e2}")
-                # As a last resort, recreate a basic tokenizer
-                try:
-                    from tensorflow.keras.preprocessing.text import Tokenizer
-                    print("Creating a new tokenizer. This may not match the original exactly.")
-                    tokenizer = Tokenizer(num_words=5000)
-                except Exception as e3:
-                    print(f"Failed to create new tokenizer: {e3}")
-                    return None
+        with tokenizer_lock:
+            if tokenizer is None:
+                started = time.perf_counter()
+                tokenizer = load_tokenizer()
+                startup_timings['tokenizer_load_s'] = round(time.perf_counter() - started, 4)
     return tokenizer
 
-def clean_text(text):
-    """Clean and preprocess text for word cloud"""
-    # Remove special characters and numbers
-    text = re.sub(r'[^a-zA-Z\s]', '', text.lower())
-    # Remove common English stopwords
-    stopwords = {'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 
-                'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against', 'between',
-                'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to',
-                'from', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again',
-                'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how',
-                'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such',
-                'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's',
-                't', 'can', 'will', 'just', 'don', 'should', 'now', 'movie', 'film', 'watch'}
-    return ' '.join(word for word in text.split() if word not in stopwords)
-
 def extract_key_phrases(text, sentiment):
     """Extract key phrases that contribute to sentiment"""
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-    
-    # Get word counts
-    word_counts = Counter(words)
-    
-    # Positive and negative sentiment words
-    positive_words = {'good', 'great', 'excellent', 'amazing', 'wonderful', 'best', 'love', 
-                     'awesome', 'fantastic', 'enjoyed', 'favorite', 'perfect', 'brilliant',
-                     'superb', 'outstanding', 'masterpiece', 'beautiful', 'recommend'}
-    
-    negative_words = {'bad', 'worst', 'terrible', 'awful', 'boring', 'waste', 'poor', 
-                     'disappointing', 'horrible', 'hate', 'stupid', 'ridiculous', 'worse',
-                     'dull', 'mediocre', 'fails', 'avoid', 'mess', 'disaster'}
-    
-    neutral_words = {'okay', 'average', 'decent', 'fine', 'alright', 'fair', 'moderate',
-                    'passable', 'acceptable', 'ordinary', 'standard', 'middle', 'mixed',
-                    'balanced', 'neutral', 'so-so', 'neither', 'somewhat'}
-    
-    # Find matching sentiment words
-    if sentiment == "positive":
-        target_words = positive_words
-    elif sentiment == "negative":
-        target_words = negative_words
-    else:  # neutral
-        target_words = neutral_words
-        
-    found_words = [word for word in words if word in target_words]
+    analyzed = as_analyzed(text)
     
-    # Get most common words (excluding stopwords)
-    common_words = [word for word, count in word_counts.most_common(10)]
+    # Find matching sentiment words (neutral for anything else)
+    found_words = analyzed.lexicon_hits.get(sentiment, analyzed.lexicon_hits['neutral'])
+    
+    # Get most common words (excluding stopwords and the words found above)
+    common_words = analyzed.common_words(10, covered=found_words)
     
     # Combine results
     key_phrases = list(set(found_words + common_words))[:5]
@@ -209,30 +388,17 @@ def extract_key_phrases(text, sentiment):
 
 def analyze_sentiment_aspects(text, sentiment_score):
     """Analyze different aspects of sentiment in the text"""
-    # Clean the text
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-    
-    # Define aspect categories and their associated words
-    aspects = {
-        'Emotional Impact': ['emotional', 'moving', 'touching', 'powerful', 'sad', 'happy', 'feel', 'felt', 'heart', 'tears'],
-        'Acting Quality': ['acting', 'actor', 'actress', 'performance', 'cast', 'played', 'role', 'character'],
-        'Plot & Story': ['plot', 'story', 'script', 'screenplay', 'narrative', 'writing', 'written', 'storyline'],
-        'Visual Elements': ['visual', 'effects', 'cinematography', 'beautiful', 'stunning', 'cgi', 'scene', 'scenes'],
-        'Direction': ['director', 'directed', 'direction', 'filmmaker', 'vision', 'pacing', 'editing']
-    }
+    analyzed = as_analyzed(text)
     
     # Calculate aspect scores
     aspect_scores = {}
-    for aspect, keywords in aspects.items():
-        # Count how many aspect keywords appear in the text
-        matches = sum(1 for word in words if word in keywords)
-        if matches > 0:
+    for aspect, matches in analyzed.aspect_hits.items():
+        if matches:
             # Adjust the aspect score based on the overall sentiment
             # This is a simple approach - could be more sophisticated
             aspect_scores[aspect] = {
                 'score': sentiment_score,
-                'keywords': [word for word in words if word in keywords][:3]  # Top 3 matching keywords
+                'keywords': matches[:3]  # Top 3 matching keywords
             }
     
     # If no aspects were found, return a default message
@@ -243,26 +409,237 @@ def analyze_sentiment_aspects(text, sentiment_score):
 
 # Define global constants
 MAX_SEQUENCE_LENGTH = 200  # Adjust based on your model's requirements
+PREDICT_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_SIZE', 64))  # Rows per model.predict step
+# NumPy backend: run each review over only its length bucket instead of all
+# MAX_SEQUENCE_LENGTH steps (same scores, see numpy_lstm.py); empty disables
+LENGTH_BUCKETS = tuple(
+    int(size) for size in os.environ.get('LENGTH_BUCKETS', '32,64,128,200').split(',') if size.strip()
+)
+MAX_BATCH_REVIEWS = int(os.environ.get('MAX_BATCH_REVIEWS', 5000))  # Upper bound for /analyze/batch
+
+# Micro-batching of concurrent /analyze requests (disabled unless MICRO_BATCH_ENABLED=1)
+MICRO_BATCH_ENABLED = os.environ.get('MICRO_BATCH_ENABLED', '0') == '1'
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64))
+MICRO_BATCH_WAIT_MS = float(os.environ.get('MICRO_BATCH_WAIT_MS', 5))
+MICRO_BATCH_TIMEOUT = float(os.environ.get('MICRO_BATCH_TIMEOUT', 30))  # Seconds a caller waits for its result
+micro_batcher = None
+micro_batcher_lock = threading.Lock()
+
+# Dedicated model-owning processes (0 keeps inference in the request thread)
+INFERENCE_POOL_SIZE = int(os.environ.get('INFERENCE_POOL_SIZE', 0))
+INFERENCE_POOL_THREADS = int(os.environ.get('INFERENCE_POOL_THREADS', 1))  # BLAS/TF threads per process
+INFERENCE_POOL_MAX_PENDING = int(os.environ.get('INFERENCE_POOL_MAX_PENDING', 0))  # 0 means 4 per process
+INFERENCE_POOL_TIMEOUT = float(os.environ.get('INFERENCE_POOL_TIMEOUT', 30))  # Seconds a request waits
+
+# TFLite backend: interpreter threads (XNNPACK) and the batch sizes converted
+TFLITE_THREADS = int(os.environ.get('TFLITE_THREADS', 1))
+TFLITE_BATCH_SIZES = tuple(
+    int(size) for size in os.environ.get('TFLITE_BATCH_SIZES', '1,8,64').split(',') if size.strip()
+)
+
+def file_signature(path):
+    """Cheap version tag for an artifact: size and modification time"""
+    try:
+        stat = os.stat(path)
+        return f"{stat.st_size:x}-{int(stat.st_mtime):x}"
+    except OSError:
+        return 'missing'
+
+# Result cache keyed on normalized review, method and model version
+MODEL_VERSION = os.environ.get('MODEL_VERSION') or file_signature(MODEL_PATH)
+if MODEL_QUANTIZATION != 'none' and INFERENCE_BACKEND == 'numpy':
+    MODEL_VERSION += f"-{MODEL_QUANTIZATION}"
+if PRUNED_MODEL_DIR:
+    MODEL_VERSION += f"-pruned-{file_signature(os.path.join(PRUNED_MODEL_DIR, 'remap.npy'))}"
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 2048)),
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get('RESULT_CACHE_TTL', 3600)),
+    disk_path=os.environ.get('RESULT_CACHE_DB') or None
+)
+
+# Per-stage latency histograms and outcome counters served on /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+metrics = Metrics(enabled=METRICS_ENABLED)
+
+# Background jobs for large CSV/JSONL uploads (see batch_jobs.py)
+JOBS_DIR = os.environ.get('JOBS_DIR', os.path.join(os.path.dirname(__file__), "jobs"))
+JOBS_DB = os.environ.get('JOBS_DB', os.path.join(JOBS_DIR, "jobs.sqlite3"))
+JOB_CHUNK_SIZE = int(os.environ.get('JOB_CHUNK_SIZE', 256))  # Reviews scored and saved per step
+JOB_RESULTS_PAGE_SIZE = 100  # Default page size for GET /jobs/<id>
+job_store = None
+job_runner = None
+job_runner_lock = threading.Lock()
+
+def label_sentiment(sentiment_score):
+    """Map a sentiment score to the positive/neutral/negative label"""
+    if sentiment_score > 0.66:
+        return 'positive'
+    elif sentiment_score < 0.33:
+        return 'negative'
+    return 'neutral'
+
+def build_analysis(text, sentiment_score, method):
+    """Assemble the response payload for a single scored review"""
+    started = metrics.start()
+    analyzed = as_analyzed(text)
+    started = metrics.observe('text_analysis', started)
+    sentiment = label_sentiment(sentiment_score)
+    key_phrases = extract_key_phrases(analyzed, sentiment)
+    started = metrics.observe('key_phrases', started)
+    aspect_analysis = analyze_sentiment_aspects(analyzed, sentiment_score)
+    metrics.observe('aspects', started)
+    return {
+        'sentiment': sentiment,
+        'confidence': sentiment_score,
+        'key_phrases': key_phrases,
+        'aspect_analysis': aspect_analysis,
+        'method': method
+    }
+
+def run_model(padded_sequences):
+    """Run the loaded model over a padded matrix and return one score per row"""
+    # The engine splits the matrix into PREDICT_BATCH_SIZE chunks
+    if 'first_inference_s' not in startup_timings:
+        started = time.perf_counter()
+        scores = get_model().predict_scores(padded_sequences)
+        startup_timings['first_inference_s'] = round(time.perf_counter() - started, 4)
+        return [float(score) for score in scores]
+    started = metrics.start()
+    scores = get_model().predict_scores(padded_sequences)
+    metrics.observe('forward', started)
+    return [float(score) for score in scores]
+
+def get_micro_batcher():
+    """Create the request coalescer on first use (after gunicorn has forked)"""
+    global micro_batcher
+    if micro_batcher is None and MICRO_BATCH_ENABLED:
+        with micro_batcher_lock:
+            if micro_batcher is None:
+                micro_batcher = MicroBatcher(
+                    run_model,
+                    max_batch_size=MICRO_BATCH_MAX_SIZE,
+                    max_wait_ms=MICRO_BATCH_WAIT_MS
+                )
+    return micro_batcher
+
+def predict_sentiment_scores(review_texts):
+    """Score a list of reviews with a single vectorized forward pass"""
+    model = get_model()
+    tokenizer = get_tokenizer()
+    if not model or not tokenizer:
+        return None
+    
+    # Tokenize every review, then pad them into a single matrix
+    started = metrics.start()
+    sequences = tokenizer.texts_to_sequences(review_texts)
+    started = metrics.observe('tokenize', started)
+    padded_sequences = tokenizer.pad(sequences, maxlen=MAX_SEQUENCE_LENGTH)
+    metrics.observe('pad', started)
+    
+    # Single reviews share a forward pass with concurrent requests when enabled
+    batcher = get_micro_batcher()
+    if batcher is not None and len(review_texts) == 1:
+        return [batcher.predict(padded_sequences[0], timeout=MICRO_BATCH_TIMEOUT)]
+    
+    return run_model(padded_sequences)
+
+def analyze_with_model(review_texts):
+    """Full-model analyses for a list of reviews, reusing cached results
+    
+    Only cache misses (deduplicated) go through the model. Returns None when
+    the model or tokenizer is unavailable.
+    """
+    keys = [ResultCache.make_key(text, 'full_model', MODEL_VERSION) for text in review_texts]
+    results = [result_cache.get(key) for key in keys]
+    
+    pending = {}
+    for key, text, result in zip(keys, review_texts, results):
+        if result is None:
+            pending.setdefault(key, text)
+    if not pending:
+        return results
+    
+    scores = predict_sentiment_scores(list(pending.values()))
+    if scores is None:
+        return None
+    
+    fresh = {}
+    for (key, text), score in zip(pending.items(), scores):
+        fresh[key] = build_analysis(text, score, 'full_model')
+        result_cache.put(key, fresh[key])
+    return [result if result is not None else fresh[key] for key, result in zip(keys, results)]
+
+def analyze_review(review_text, use_lightweight=False):
+    """Analyze one review with the model, falling back to lightweight analysis"""
+    # Use lightweight analysis if requested or if we're having memory issues
+    if use_lightweight:
+        metrics.count('lightweight')
+        return lightweight_analyze(review_text)
+    
+    # Try to use the full model
+    try:
+        # Lazy load model and tokenizer only when needed
+        results = analyze_with_model([review_text])
+        
+        if results is None:
+            print("Model or tokenizer not available, falling back to lightweight analysis")
+            metrics.count('lightweight')
+            return lightweight_analyze(review_text)
+        
+        # Return the results
+        metrics.count('full_model')
+        return results[0]
+    
+    except Exception as e:
+        print(f"Error using full model, falling back to lightweight analysis: {e}")
+        metrics.count('lightweight')
+        return lightweight_analyze(review_text)
+
+def analyze_reviews(review_texts, use_lightweight=False):
+    """Analyze many reviews at once, falling back to lightweight analysis
+    
+    Returns one result per input (an error entry for empty reviews) and the
+    method used for the non-empty ones.
+    """
+    valid_indices = [i for i, text in enumerate(review_texts)
+                     if isinstance(text, str) and text.strip()]
+    valid_texts = [review_texts[i] for i in valid_indices]
+    
+    analyses = None
+    method = 'lightweight'
+    if valid_texts and not use_lightweight:
+        try:
+            analyses = analyze_with_model(valid_texts)
+            if analyses is None:
+                print("Model or tokenizer not available, falling back to lightweight analysis")
+            else:
+                method = 'full_model'
+        except Exception as e:
+            print(f"Error using full model for batch, falling back to lightweight analysis: {e}")
+            analyses = None
+    
+    metrics.count(method, len(valid_texts))
+    results = [{'error': 'Review text is required'} for _ in review_texts]
+    for position, index in enumerate(valid_indices):
+        if analyses is None:
+            results[index] = lightweight_analyze(valid_texts[position])
+        else:
+            results[index] = analyses[position]
+    return results, method
 
 # Add a lightweight fallback analyzer that doesn't use the full model
 def lightweight_analyze(text):
     """A lightweight sentiment analysis that doesn't use the full model"""
-    # Simple word-based sentiment analysis
-    positive_words = {'good', 'great', 'excellent', 'amazing', 'wonderful', 'best', 'love', 
-                     'awesome', 'fantastic', 'enjoyed', 'favorite', 'perfect', 'brilliant',
-                     'superb', 'outstanding', 'masterpiece', 'beautiful', 'recommend'}
+    cache_key = ResultCache.make_key(text, 'lightweight', MODEL_VERSION)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    negative_words = {'bad', 'worst', 'terrible', 'awful', 'boring', 'waste', 'poor', 
-                     'disappointing', 'horrible', 'hate', 'stupid', 'ridiculous', 'worse',
-                     'dull', 'mediocre', 'fails', 'avoid', 'mess', 'disaster'}
-    
-    # Clean and tokenize text
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-    
-    # Count positive and negative words
-    positive_count = sum(1 for word in words if word in positive_words)
-    negative_count = sum(1 for word in words if word in negative_words)
+    # Simple word-based sentiment analysis over the shared lexicons
+    analyzed = AnalyzedText(text)
+    positive_count = len(analyzed.lexicon_hits['positive'])
+    negative_count = len(analyzed.lexicon_hits['negative'])
     
     # Calculate sentiment score
     total_count = positive_count + negative_count
@@ -271,88 +648,37 @@ def lightweight_analyze(text):
     else:
         sentiment_score = positive_count / total_count
     
-    # Determine sentiment label
-    if sentiment_score > 0.66:
-        sentiment = 'positive'
-    elif sentiment_score < 0.33:
-        sentiment = 'negative'
-    else:
-        sentiment = 'neutral'
-    
-    return {
-        'sentiment': sentiment,
-        'confidence': sentiment_score,
-        'key_phrases': extract_key_phrases(text, sentiment),
-        'aspect_analysis': analyze_sentiment_aspects(text, sentiment_score),
-        'method': 'lightweight'
-    }
+    result = build_analysis(analyzed, sentiment_score, 'lightweight')
+    result_cache.put(cache_key, result)
+    return result
+
+def timed_jsonify(payload):
+    """jsonify, recorded as the serialize stage"""
+    started = metrics.start()
+    response = jsonify(payload)
+    metrics.observe('serialize', started)
+    return response
 
 # Add a parameter to the analyze route to allow fallback mode
 @app.route('/analyze', methods=['POST'])
 def analyze():
     try:
         # Get the review data from the request
+        started = metrics.start()
         data = request.json
         review_text = data.get('review', '')
         movie_title = data.get('movieTitle', '')
         use_lightweight = data.get('lightweight', False)
+        metrics.observe('parse', started)
         
         if not review_text:
             return jsonify({'error': 'Review text is required'}), 400
         
-        # Use lightweight analysis if requested or if we're having memory issues
-        if use_lightweight:
-            return jsonify(lightweight_analyze(review_text))
-        
-        # Try to use the full model
-        try:
-            # Lazy load model and tokenizer only when needed
-            model = get_model()
-            tokenizer = get_tokenizer()
-            
-            if not model or not tokenizer:
-                print("Model or tokenizer not available, falling back to lightweight analysis")
-                return jsonify(lightweight_analyze(review_text))
-            
-            # Tokenize and pad the sequence
-            sequences = tokenizer.texts_to_sequences([review_text])
-            padded_sequences = pad_sequences(sequences, maxlen=MAX_SEQUENCE_LENGTH)
-            
-            # Make prediction with reduced verbosity
-            prediction = model.predict(padded_sequences, verbose=0)[0]
-            
-            # Interpret the prediction
-            sentiment_score = float(prediction[0])  # Assuming first output is sentiment score
-            
-            # Determine sentiment label
-            if sentiment_score > 0.66:
-                sentiment = 'positive'
-            elif sentiment_score < 0.33:
-                sentiment = 'negative'
-            else:
-                sentiment = 'neutral'
-                
-            # Extract key phrases
-            key_phrases = extract_key_phrases(review_text, sentiment)
-            
-            # Analyze aspects
-            aspect_analysis = analyze_sentiment_aspects(review_text, sentiment_score)
-            
-            # Return the results
-            return jsonify({
-                'sentiment': sentiment,
-                'confidence': sentiment_score,
-                'key_phrases': key_phrases,
-                'aspect_analysis': aspect_analysis,
-                'method': 'full_model'
-            })
-        
-        except Exception as e:
-            print(f"Error using full model, falling back to lightweight analysis: {e}")
-            return jsonify(lightweight_analyze(review_text))
+        return timed_jsonify(analyze_review(review_text, use_lightweight))
             
     except Exception as e:
         print(f"Error analyzing sentiment: {e}")
+        metrics.count('error_fallback')
         # Fallback to a simpler analysis method if everything fails
         return jsonify({
             'sentiment': 'neutral',
@@ -366,17 +692,98 @@ def analyze():
         # Force garbage collection to free memory
         gc.collect()
 
+# Batch endpoint: score many reviews with one forward pass
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    try:
+        started = metrics.start()
+        data = request.json or {}
+        reviews = data.get('reviews', [])
+        use_lightweight = data.get('lightweight', False)
+        metrics.observe('parse', started)
+        
+        if not isinstance(reviews, list) or not reviews:
+            return jsonify({'error': 'A non-empty list of reviews is required'}), 400
+        if len(reviews) > MAX_BATCH_REVIEWS:
+            return jsonify({'error': f'At most {MAX_BATCH_REVIEWS} reviews are accepted per batch'}), 413
+        
+        # Accept plain strings or {"review": ..., "movieTitle": ...} objects
+        review_texts = [
+            (item.get('review', '') if isinstance(item, dict) else item) or ''
+            for item in reviews
+        ]
+        results, method = analyze_reviews(review_texts, use_lightweight)
+        
+        return timed_jsonify({
+            'results': results,
+            'count': len(results),
+            'method': method
+        })
+    except Exception as e:
+        print(f"Error analyzing batch: {e}")
+        metrics.count('error_fallback')
+        return jsonify({'error': str(e), 'method': 'error_fallback'}), 500
+    finally:
+        gc.collect()
+
+def parse_review_line(line):
+    """Review text from one NDJSON line: a JSON object, a JSON string or plain text"""
+    line = line.decode('utf8', errors='replace') if isinstance(line, bytes) else line
+    line = line.strip()
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return line
+    if isinstance(item, dict):
+        return item.get('review', '') or ''
+    return item if isinstance(item, str) else line
+
+def stream_reviews(lines, use_lightweight=False, chunk_size=PREDICT_BATCH_SIZE):
+    """Yield one NDJSON result per input line, scoring a chunk at a time
+    
+    Input is pulled only as results are sent, so at most one chunk of
+    reviews and results is held in memory whatever the input size.
+    """
+    chunk = []
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        chunk.append(parse_review_line(line))
+        if len(chunk) < chunk_size:
+            continue
+        for result in analyze_reviews(chunk, use_lightweight)[0]:
+            yield json.dumps(dict(result, index=index)) + '\n'
+            index += 1
+        chunk = []
+    if chunk:
+        for result in analyze_reviews(chunk, use_lightweight)[0]:
+            yield json.dumps(dict(result, index=index)) + '\n'
+            index += 1
+
+# Streaming endpoint: newline-delimited reviews in, one JSON result per line out
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    use_lightweight = request.args.get('lightweight', '0').lower() in ('1', 'true')
+    return Response(
+        stream_with_context(stream_reviews(request.stream, use_lightweight)),
+        mimetype='application/x-ndjson'
+    )
+
 # Add a new endpoint for lightweight analysis only
 @app.route('/analyze/lightweight', methods=['POST'])
 def analyze_lightweight():
     try:
+        started = metrics.start()
         data = request.json
         review_text = data.get('review', '')
+        metrics.observe('parse', started)
         
         if not review_text:
             return jsonify({'error': 'Review text is required'}), 400
-            
-        return jsonify(lightweight_analyze(review_text))
+        
+        metrics.count('lightweight')
+        return timed_jsonify(lightweight_analyze(review_text))
     except Exception as e:
         print(f"Error in lightweight analysis: {e}")
         return jsonify({
@@ -387,41 +794,204 @@ def analyze_lightweight():
             'error': str(e)
         }), 500
 
+def get_job_runner():
+    """Start the job store and runner in this worker process on first use
+    
+    Returns None when the store cannot be opened (e.g. JOBS_DIR is not
+    writable); only the /jobs routes depend on it.
+    """
+    global job_store, job_runner
+    if job_runner is None or job_runner.pid != os.getpid():
+        with job_runner_lock:
+            if job_runner is None or job_runner.pid != os.getpid():
+                try:
+                    job_store = JobStore(JOBS_DB, JOBS_DIR)
+                    job_runner = JobRunner(job_store, lambda texts: analyze_reviews(texts)[0],
+                                           chunk_size=JOB_CHUNK_SIZE)
+                except Exception as e:
+                    print(f"Batch jobs unavailable, could not open the job store in {JOBS_DIR}: {e}")
+                    job_store = job_runner = None
+    return job_runner
+
+def jobs_unavailable():
+    return jsonify({'error': 'Batch jobs are unavailable: the job store could not be opened'}), 503
+
+def job_status(job):
+    progress = job['processed_rows'] / job['total_rows'] if job['total_rows'] else 1.0
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'total_rows': job['total_rows'],
+        'processed_rows': job['processed_rows'],
+        'progress': round(progress, 4),
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+
+# Submit a CSV or JSONL file for background analysis
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    runner = get_job_runner()
+    if runner is None:
+        return jobs_unavailable()
+    try:
+        upload = request.files.get('file')
+        job_id = os.urandom(16).hex()
+        if upload is not None:
+            input_format = detect_format(upload.filename, upload.mimetype)
+            input_path = os.path.join(JOBS_DIR, f"{job_id}.{input_format}")
+            upload.save(input_path)
+        else:
+            # Raw request body, streamed to disk
+            input_format = detect_format(request.args.get('filename'), request.content_type)
+            input_path = os.path.join(JOBS_DIR, f"{job_id}.{input_format}")
+            with open(input_path, 'wb') as f:
+                while True:
+                    block = request.stream.read(1024 * 1024)
+                    if not block:
+                        break
+                    f.write(block)
+        
+        try:
+            total_rows, review_field, title_field = inspect_upload(input_path, input_format)
+        except ValueError as e:
+            os.remove(input_path)
+            return jsonify({'error': str(e)}), 400
+        if total_rows == 0:
+            os.remove(input_path)
+            return jsonify({'error': 'The uploaded file contains no reviews'}), 400
+        
+        job = job_store.create_job(input_path, input_format, total_rows, review_field, title_field, job_id)
+        runner.notify()
+        return jsonify(job_status(job)), 202
+    except Exception as e:
+        print(f"Error creating batch job: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Job status with a page of the results stored so far
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    if get_job_runner() is None:
+        return jobs_unavailable()
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(max(1, request.args.get('limit', JOB_RESULTS_PAGE_SIZE, type=int)), 1000)
+    status = job_status(job)
+    status['results'] = job_store.get_results(job_id, offset, limit)
+    status['offset'] = offset
+    return jsonify(status)
+
+# Download all results of a finished job as CSV
+@app.route('/jobs/<job_id>/results.csv', methods=['GET'])
+def get_job_results_csv(job_id):
+    if get_job_runner() is None:
+        return jobs_unavailable()
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'completed':
+        return jsonify(dict(job_status(job), error='Job has not completed yet')), 409
+    return Response(
+        stream_with_context(job_store.iter_results_csv(job_id)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="sentiment-{job_id}.csv"'}
+    )
+
+def startup():
+    """Load the tokenizer and model and warm up the model; returns readiness"""
+    started = time.perf_counter()
+    ready = get_tokenizer() is not None and get_model() is not None
+    startup_timings.setdefault('startup_s', round(time.perf_counter() - started, 4))
+    return ready
+
+def start_background_startup(resume_jobs=False):
+    """Run startup() once in a background thread (used by /ready probes)
+    
+    With ``resume_jobs`` the thread then starts this worker's job runner,
+    which picks up unfinished jobs. Probes only reach forked workers, so the
+    runner never starts in the gunicorn master (see the eager startup below).
+    """
+    global startup_thread
+    
+    def run():
+        startup()
+        if resume_jobs:
+            # A broken job store is logged and only affects /jobs
+            get_job_runner()
+    
+    with startup_lock:
+        if startup_thread is None:
+            startup_thread = threading.Thread(target=run, name='model-startup', daemon=True)
+            startup_thread.start()
+
+# Readiness probe: 200 only once the model is loaded and warmed up
+@app.route('/ready', methods=['GET'])
+def ready_check():
+    is_ready = model is not None and tokenizer is not None
+    # The first probe in each worker loads the model if needed and resumes unfinished jobs
+    start_background_startup(resume_jobs=True)
+    return jsonify({
+        'ready': is_ready,
+        'model_loading': MODEL_LOADING,
+        'inference_backend': INFERENCE_BACKEND,
+        'timings': startup_timings
+    }), 200 if is_ready else 503
+
+# Stage latency histograms and outcome counters for Prometheus
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Simple health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({
+    return jsonify(health_status())
+
+def health_status():
+    """Payload of the /health endpoint (shared with asgi_server.py)"""
+    return {
         'status': 'ok', 
         'model_loaded': model is not None, 
+        'inference_backend': INFERENCE_BACKEND,
+        'model_quantization': MODEL_QUANTIZATION,
+        'pruned_model_dir': PRUNED_MODEL_DIR or None,
+        'model_version': MODEL_VERSION,
+        'result_cache': result_cache.stats(),
         'tokenizer_loaded': tokenizer is not None,
+        'startup_timings': startup_timings,
+        'inference_pool': model.stats() if isinstance(model, InferencePool) else {'size': INFERENCE_POOL_SIZE},
+        'length_buckets': model.bucket_stats() if isinstance(model, NumpyLSTMEngine) else {'buckets': list(LENGTH_BUCKETS)},
+        'tflite': model.stats() if isinstance(model, TFLiteEngine) else {'threads': TFLITE_THREADS},
+        'micro_batching': micro_batcher.stats() if micro_batcher is not None else {'enabled': MICRO_BATCH_ENABLED},
+        'metrics': metrics.stats(),
         'memory_info': {
             'gc_count': gc.get_count(),
-            'gc_threshold': gc.get_threshold()
+            'gc_threshold': gc.get_threshold(),
+            # RSS/PSS of the worker that served this request
+            'process': process_memory()
         }
-    })
+    }
+
+# Spawned helper processes re-import this module; only the server exports and loads eagerly
+if INFERENCE_BACKEND == 'numpy' and not PRUNED_MODEL_DIR and multiprocessing.parent_process() is None:
+    export_numpy_weights()
+
+# With --preload this runs in the gunicorn master before it forks: load what the
+# workers share, but start no threads there (the job runner starts in each worker)
+if MODEL_LOADING == 'eager' and multiprocessing.parent_process() is None:
+    if INFERENCE_POOL_SIZE > 0:
+        # Nor an inference pool: each worker starts its own on the first probe or
+        # request, and one started here would keep its model processes idle
+        prepare_inference_pool()
+        if get_tokenizer() is None:
+            print("Eager startup failed to load the tokenizer")
+    elif not startup():
+        print("Eager startup failed, requests will use lightweight analysis until the model loads")
+    print(f"Startup timings: {startup_timings}")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
-
-## 4. Make sure the Flask server is properly configured:
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from python.api import analyze_sentiment  # Import your sentiment analysis function
-
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    data = request.json
-    review = data.get('review', '')
-    movie_title = data.get('movieTitle', '')
-    
-    # Call your sentiment analysis function
-    result = analyze_sentiment(review)
-    
-    return jsonify(result)
-
-if __name__ == '__main__':
-    app.run(debug=True)
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+MAX_SEQUENCE_LENGTH = 200  # Must match the padding used at training time
+DEFAULT_BATCH_SIZE = 64
+
+
+def load_keras_model(model_path):
+    """Load model.h5, ignoring LSTM arguments newer Keras versions reject"""
+    import tensorflow as tf
+
+    try:
+        # First attempt: try loading with standard method
+        model = tf.keras.models.load_model(model_path)
+        print("Model loaded successfully from", model_path)
+        return model
+    except ValueError as e:
+        # Second attempt: use custom object scope to ignore incompatible parameters
+        print(f"Using compatibility mode to load model... Error: {e}")
+
+    # Custom LSTM layer that ignores the time_major parameter
+    class CompatibleLSTM(tf.keras.layers.LSTM):
+        def __init__(self, *args, **kwargs):
+            # Remove incompatible parameters
+            kwargs.pop('time_major', None)
+            super().__init__(*args, **kwargs)
+
+    model = tf.keras.models.load_model(model_path, custom_objects={'LSTM': CompatibleLSTM})
+    print("Model loaded with compatibility mode from", model_path)
+    return model
+
+
+class InferenceEngine:
+    """Run a loaded Keras model through a traced tf.function.
+
+    ``model.predict`` builds a data adapter, a callback list and a progress
+    bar on every call, which dominates the cost of scoring a single review.
+    The engine traces the forward pass once for an int32 input of shape
+    ``(None, max_sequence_length)`` and calls the concrete graph directly.
+    Set ``INFERENCE_USE_PREDICT=1`` (or ``use_predict=True``) to go back to
+    ``model.predict`` for comparison.
+    """
+
+    def __init__(self, model, max_sequence_length=MAX_SEQUENCE_LENGTH,
+                 batch_size=DEFAULT_BATCH_SIZE, use_predict=None):
+        import tensorflow as tf
+
+        self.model = model
+        self.max_sequence_length = max_sequence_length
+        self.batch_size = max(1, int(batch_size))
+        if use_predict is None:
+            use_predict = os.environ.get('INFERENCE_USE_PREDICT', '0') == '1'
+        self.use_predict = use_predict
+        self._tf = tf
+        self._forward = tf.function(
+            lambda sequences: model(sequences, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, max_sequence_length), dtype=tf.int32)]
+        )
+
+    def warmup(self, batch_sizes=(1,)):
+        """Trace the graph and run dummy batches so the first request is fast"""
+        for size in batch_sizes:
+            self.predict_scores(np.zeros((size, self.max_sequence_length), dtype=np.int32))
+
+    def predict_scores(self, padded_sequences):
+        """Return one float score per row of a padded sequence matrix"""
+        padded_sequences = np.asarray(padded_sequences, dtype=np.int32)
+        if padded_sequences.ndim == 1:
+            padded_sequences = padded_sequences[np.newaxis, :]
+        if len(padded_sequences) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        if self.use_predict:
+            predictions = self.model.predict(padded_sequences, batch_size=self.batch_size, verbose=0)
+            return np.asarray(predictions)[:, 0]
+
+        scores = []
+        for start in range(0, len(padded_sequences), self.batch_size):
+            chunk = self._tf.constant(padded_sequences[start:start + self.batch_size])
+            scores.append(self._forward(chunk).numpy()[:, 0])
+        return np.concatenate(scores)
+
+    def predict(self, padded_sequences, batch_size=None, verbose=0):
+        """Drop-in replacement for ``model.predict`` returning shape (N, 1)
+
+        ``batch_size`` and ``verbose`` are accepted for call-site compatibility;
+        chunking always follows the engine's own ``batch_size``.
+        """
+        return self.predict_scores(padded_sequences)[:, np.newaxis]
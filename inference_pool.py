@@ -0,0 +1,332 @@
+"""Model-owning worker processes that score padded batches off the request threads.
+
+Request threads put tokenized, padded matrices on a shared queue and wait on
+a Future; a fixed number of spawned worker processes each load the model
+once and take work from that queue. A collector thread in the serving
+process resolves the Futures as results come back and restarts workers
+that die; the batch a dead worker was scoring fails at once. Workers that
+die before loading the model are restarted with exponential backoff, and
+after ``max_load_failures`` in a row the pool stops restarting them; once
+no worker is left, ``submit`` raises ``PoolUnavailable``. When more than
+``max_pending`` batches are in flight, ``submit`` raises ``PoolSaturated``
+so the caller can fall back to cheaper analysis.
+
+Each worker limits its BLAS/OpenMP and TensorFlow thread pools to
+``threads`` so ``size * threads`` can be matched to the available cores.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Environment variables read by the BLAS/OpenMP runtimes when they start
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+MAX_RESTART_DELAY = 30.0  # Seconds; the backoff after repeated load failures is capped here
+IDLE = -1  # In-flight slot value while a worker is not scoring anything
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when the pool already has ``max_pending`` batches in flight"""
+
+
+class PoolUnavailable(RuntimeError):
+    """Raised when every worker has died and the pool has given up restarting them"""
+
+
+def load_engine(backend, model_path, weights_dir, max_sequence_length, batch_size, threads, length_buckets=None,
+                quantization=None):
+    """Load an inference engine inside a worker process
+
+    ``quantization`` ('none', 'float16' or 'int8') is the precision the
+    NumPy backend must serve; exported weights of another precision are an
+    error rather than a silent mismatch. None serves whatever
+    ``weights_dir`` holds (e.g. pruned weights).
+    """
+    options = dict(max_sequence_length=max_sequence_length, batch_size=batch_size)
+    if backend == 'keras':
+        import tensorflow as tf
+        from inference_engine import InferenceEngine, load_keras_model
+
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        return InferenceEngine(load_keras_model(model_path), **options)
+
+    if backend == 'tflite':
+        from tflite_engine import TFLiteEngine
+        return TFLiteEngine.from_h5(model_path, num_threads=threads, **options)
+
+    from numpy_lstm import NumpyLSTMEngine
+    options['length_buckets'] = length_buckets
+    expected = None if quantization == 'none' else quantization
+    if weights_dir and os.path.exists(os.path.join(weights_dir, 'manifest.json')):
+        engine = NumpyLSTMEngine.from_weights(weights_dir, **options)
+        if quantization is not None and engine.quantization != expected:
+            raise ValueError(f"{weights_dir} holds {engine.quantization or 'float32'} weights, "
+                             f"expected {expected or 'float32'}")
+        return engine
+    # No export to map: build the same weights in this process
+    engine = NumpyLSTMEngine.from_h5(model_path, **options)
+    return engine.quantize(expected) if expected else engine
+
+
+def _worker_main(loader_args, requests, results, current):
+    # Runs in a spawned process: nothing is inherited but the arguments
+    try:
+        engine = load_engine(*loader_args)
+        engine.warmup()
+    except Exception as e:
+        results.put(('failed', os.getpid(), str(e)))
+        return
+    results.put(('ready', os.getpid(), None))
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, padded_sequences = item
+        # Lets the parent fail this request at once if the process dies mid-batch
+        current.value = request_id
+        try:
+            scores, error = engine.predict_scores(padded_sequences), None
+        except Exception as e:
+            scores, error = None, str(e)
+        current.value = IDLE
+        results.put((request_id, scores, error))
+
+
+class InferencePool:
+    """Fixed pool of model-owning processes with the engine interface.
+
+    ``predict_scores`` and ``warmup`` behave like ``InferenceEngine``, so
+    the pool can stand in for a loaded model.
+    """
+
+    def __init__(self, backend, model_path, weights_dir=None, size=2, threads=1,
+                 max_pending=None, timeout=30.0, max_sequence_length=200, batch_size=64,
+                 length_buckets=None, max_load_failures=5, quantization=None):
+        self.size = max(1, int(size))
+        self.threads = max(1, int(threads))
+        self.max_pending = int(max_pending) if max_pending else self.size * 4
+        self.timeout = timeout
+        self.max_load_failures = max(1, int(max_load_failures))
+        self.max_sequence_length = max_sequence_length
+        self.pid = os.getpid()
+        self._loader_args = (backend, model_path, weights_dir, max_sequence_length, batch_size, self.threads,
+                             length_buckets, quantization)
+        self._context = multiprocessing.get_context('spawn')
+        self._requests = self._context.Queue()
+        self._results = self._context.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._ready = threading.Event()
+        self._running = True
+        self._ready_pids = set()
+        self._load_failures = 0  # Consecutive workers that died before becoming ready
+        self._restart_at = 0.0
+        self._failure = None  # Set once the pool has given up; submit then raises
+        self._last_error = None
+        self._counters = {'submitted': 0, 'completed': 0, 'errors': 0, 'saturated': 0,
+                          'timeouts': 0, 'restarts': 0, 'ready_workers': 0, 'load_failures': 0,
+                          'lost_batches': 0}
+        self._workers = [self._start_worker() for _ in range(self.size)]
+        self._collector = threading.Thread(target=self._collect, name='inference-pool', daemon=True)
+        self._collector.start()
+
+    def _start_worker(self):
+        """(process, in-flight slot) for a new worker"""
+        current = self._context.RawValue('q', IDLE)
+        # Spawned children read the thread limits from the environment at startup
+        saved = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+        os.environ.update({name: str(self.threads) for name in THREAD_ENV_VARS})
+        try:
+            process = self._context.Process(
+                target=_worker_main,
+                args=(self._loader_args, self._requests, self._results, current),
+                name='inference-worker',
+                daemon=True
+            )
+            process.start()
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        return process, current
+
+    def _collect(self):
+        next_check = 0.0
+        while self._running:
+            try:
+                request_id, scores, error = self._results.get(timeout=1.0)
+            except queue.Empty:
+                request_id = None
+            except (EOFError, OSError):
+                break
+            # Checked on a clock, not only when idle, so a busy pool still notices deaths
+            if time.monotonic() >= next_check:
+                self._restart_dead_workers()
+                next_check = time.monotonic() + 1.0
+            if request_id is None:
+                continue
+
+            if request_id in ('ready', 'failed'):
+                with self._lock:
+                    if request_id == 'ready':
+                        self._ready_pids.add(scores)
+                        self._load_failures = 0
+                        self._counters['ready_workers'] += 1
+                        self._ready.set()
+                    else:
+                        self._last_error = error
+                        print(f"Inference worker {scores} failed to load the model: {error}")
+                continue
+
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+                if error is None:
+                    self._counters['completed'] += 1
+                else:
+                    self._counters['errors'] += 1
+            if future is None or future.done():
+                continue
+            if error is None:
+                future.set_result(scores)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    def _restart_dead_workers(self):
+        for i, (process, current) in enumerate(self._workers):
+            if not self._running or process is None or process.is_alive():
+                continue
+            with self._lock:
+                # Fail the batch the worker was scoring instead of letting it time out
+                future = self._pending.pop(current.value, None) if current.value != IDLE else None
+                current.value = IDLE
+                if future is not None:
+                    self._counters['lost_batches'] += 1
+                if process.pid in self._ready_pids:
+                    self._ready_pids.discard(process.pid)
+                    self._counters['ready_workers'] = max(0, self._counters['ready_workers'] - 1)
+                else:
+                    self._load_failures += 1
+                    self._counters['load_failures'] += 1
+                    self._restart_at = time.monotonic() + min(MAX_RESTART_DELAY, 2.0 ** (self._load_failures - 1))
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError(f'Inference worker {process.pid} died while scoring this batch'))
+            print(f"Inference worker {process.pid} exited ({process.exitcode})")
+            self._workers[i] = (None, current)
+
+        if all(process is not None for process, _ in self._workers):
+            return
+        with self._lock:
+            load_failures, restart_at, last_error = self._load_failures, self._restart_at, self._last_error
+        if load_failures >= self.max_load_failures:
+            # Loading keeps failing (bad model path, missing TensorFlow): stop the crash loop
+            if all(process is None for process, _ in self._workers):
+                self._fail_pool(f"{load_failures} inference workers in a row failed to load the model"
+                                f" (last error: {last_error})")
+            return
+        if time.monotonic() < restart_at:
+            return
+        for i, (process, _) in enumerate(self._workers):
+            if process is None:
+                print(f"Restarting inference worker {i}")
+                with self._lock:
+                    self._counters['restarts'] += 1
+                self._workers[i] = self._start_worker()
+
+    def _fail_pool(self, reason):
+        """Give up: ``submit`` raises from now on and every waiting batch fails"""
+        with self._lock:
+            if self._failure is not None:
+                return
+            self._failure = reason
+            pending, self._pending = self._pending, {}
+        print(f"Inference pool unavailable: {reason}")
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(PoolUnavailable(reason))
+
+    def submit(self, padded_sequences):
+        """Queue a padded matrix and return a Future for its scores"""
+        if not self._running:
+            raise RuntimeError('InferencePool has been shut down')
+        future = Future()
+        with self._lock:
+            if self._failure is not None:
+                raise PoolUnavailable(self._failure)
+            if len(self._pending) >= self.max_pending:
+                self._counters['saturated'] += 1
+                raise PoolSaturated(f'{len(self._pending)} batches already waiting for inference')
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            self._counters['submitted'] += 1
+        self._requests.put((request_id, padded_sequences))
+        return future
+
+    def predict_scores(self, padded_sequences, timeout=None):
+        """Blocking helper: submit a batch and wait up to ``timeout`` seconds"""
+        future = self.submit(padded_sequences)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            # Forget the request so a lost result does not hold a pending slot
+            with self._lock:
+                self._counters['timeouts'] += 1
+                for request_id, pending in list(self._pending.items()):
+                    if pending is future:
+                        del self._pending[request_id]
+            raise
+
+    def warmup(self, batch_sizes=(1,), timeout=None):
+        """Wait until a worker has loaded the model, then run dummy batches"""
+        import numpy as np
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while not self._ready.wait(min(1.0, max(0.0, deadline - time.monotonic()))):
+            if self._failure is not None:
+                raise PoolUnavailable(self._failure)
+            if time.monotonic() >= deadline:
+                raise TimeoutError('No inference worker became ready')
+        for size in batch_sizes:
+            self.predict_scores(np.zeros((size, self.max_sequence_length), dtype=np.int32))
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._counters,
+                size=self.size,
+                threads_per_worker=self.threads,
+                pending=len(self._pending),
+                max_pending=self.max_pending,
+                timeout_s=self.timeout,
+                workers_alive=sum(1 for process, _ in self._workers if process is not None and process.is_alive()),
+                healthy=self._failure is None,
+                failure=self._failure
+            )
+
+    def shutdown(self, timeout=5.0):
+        """Stop the workers and fail any batches still waiting"""
+        if not self._running:
+            return
+        self._running = False
+        for _ in self._workers:
+            self._requests.put(None)
+        deadline = time.time() + timeout
+        for process, _ in self._workers:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError('InferencePool has been shut down'))
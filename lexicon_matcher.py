@@ -0,0 +1,85 @@
+"""Single-scan matcher for sentiment and aspect vocabularies.
+
+Every term of every category is compiled into one inverted index keyed on
+the term's first token. Multi-word terms ("special effects") and hyphenated
+ones ("so-so") are stored as token tuples, so matching a review is one
+left-to-right pass over its tokens whatever the size of the lexicons.
+
+Lexicon files are JSON objects mapping a group name to categories:
+
+    {
+      "sentiment": {"positive": ["good", ...], "negative": [...], "neutral": [...]},
+      "aspects": {"Acting Quality": ["acting", "lead actor", ...], ...}
+    }
+"""
+import json
+import re
+from collections import namedtuple
+
+# Terms are matched on letter runs; hyphens and whitespace separate tokens
+TERM_SPLIT_PATTERN = re.compile(r'[^a-z]+')
+
+LexiconHit = namedtuple('LexiconHit', ['group', 'category', 'term', 'position', 'length'])
+
+
+def term_tokens(term):
+    """Token tuple for a lexicon term: 'So-so' -> ('so', 'so')"""
+    return tuple(token for token in TERM_SPLIT_PATTERN.split(term.lower()) if token)
+
+
+class LexiconMatcher:
+    """Match many categorized terms against a token list in one pass"""
+
+    def __init__(self, groups):
+        # first token -> [(tokens, term, ((group, category), ...)), ...] longest first
+        self._index = {}
+        entries = {}
+        for group, categories in groups.items():
+            for category, terms in categories.items():
+                for term in terms:
+                    tokens = term_tokens(term)
+                    if not tokens:
+                        continue
+                    key = (tokens, term)
+                    entries.setdefault(key, [])
+                    if (group, category) not in entries[key]:
+                        entries[key].append((group, category))
+
+        for (tokens, term), labels in entries.items():
+            self._index.setdefault(tokens[0], []).append((tokens, term, tuple(labels)))
+        for candidates in self._index.values():
+            candidates.sort(key=lambda candidate: len(candidate[0]), reverse=True)
+
+        self.groups = {group: tuple(categories) for group, categories in groups.items()}
+        self.term_count = len(entries)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf8') as f:
+            return cls(json.load(f))
+
+    def match(self, tokens):
+        """Return LexiconHits in text order
+
+        At each position the longest matching term wins within a category,
+        so "special effects" is not also counted as "effects".
+        """
+        hits = []
+        covered_until = {}
+        index = self._index
+        token_count = len(tokens)
+        for position, token in enumerate(tokens):
+            candidates = index.get(token)
+            if candidates is None:
+                continue
+            for term_tokens_, term, labels in candidates:
+                length = len(term_tokens_)
+                if length > 1 and (position + length > token_count or
+                                   tuple(tokens[position:position + length]) != term_tokens_):
+                    continue
+                for label in labels:
+                    if covered_until.get(label, 0) > position:
+                        continue
+                    covered_until[label] = position + length
+                    hits.append(LexiconHit(label[0], label[1], term, position, length))
+        return hits
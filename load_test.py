@@ -0,0 +1,159 @@
+"""Load-test harness for the sentiment API.
+
+Opens ``--concurrency`` keep-alive connections, each sending POST /analyze
+requests back to back for ``--duration`` seconds, and reports throughput
+and latency percentiles. Pass several URLs to compare servers, e.g. the
+gunicorn setup from the Procfile against asgi_server.py:
+
+    gunicorn flask_server:app --workers 1 --threads 2 --bind :5000 &
+    python asgi_server.py --port 8000 &
+    python load_test.py http://localhost:5000 http://localhost:8000 -c 200 -d 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+from fast_tokenizer import SAMPLE_REVIEWS
+
+REVIEWS = [review for review in SAMPLE_REVIEWS if review]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    keep_alive = not status_line.startswith(b'HTTP/1.0')
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+        elif name == 'connection':
+            keep_alive = value.strip().lower() != 'close'
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is None:
+        # No length: the body runs until the server closes the connection
+        await reader.read()
+        keep_alive = False
+    else:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _client(url, deadline, latencies, errors, lightweight, unique, timeout):
+    parts = urlsplit(url)
+    path = (parts.path.rstrip('/') or '') + '/analyze'
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        review = random.choice(REVIEWS)
+        if unique:
+            # Defeat the server-side result cache
+            review = f"{review} {random.randrange(1 << 30)}"
+        body = json.dumps({'review': review, 'lightweight': lightweight}).encode('utf8')
+        request = (f"POST {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                   f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(parts.hostname, parts.port or 80), timeout)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, asyncio.TimeoutError,
+                ValueError, IndexError) as e:
+            kind = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'connection'
+            errors[kind] = errors.get(kind, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+            continue
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors[status] = errors.get(status, 0) + 1
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, concurrency, duration, lightweight=False, unique=True, timeout=30.0):
+    latencies = []
+    errors = {}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(_client(url, deadline, latencies, errors, lightweight, unique, timeout)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0
+    }
+
+
+def print_table(results):
+    columns = ('url', 'concurrency', 'requests', 'rps', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'errors')
+    print('  '.join(f"{column:>12}" if column != 'url' else f"{column:<32}" for column in columns))
+    for result in results:
+        print('  '.join(f"{str(result[column]):>12}" if column != 'url' else f"{result[column]:<32}"
+                        for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare latency and throughput of sentiment API servers")
+    parser.add_argument('urls', nargs='+', help="Base URLs, e.g. http://localhost:5000")
+    parser.add_argument('-c', '--concurrency', type=int, default=100, help="Concurrent connections")
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help="Seconds per server")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Seconds before a request counts as failed")
+    parser.add_argument('--lightweight', action='store_true', help="Request lightweight analysis")
+    parser.add_argument('--repeat-reviews', action='store_true', help="Allow result-cache hits")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for url in args.urls:
+        results.append(asyncio.run(run_load(url, args.concurrency, args.duration,
+                                            args.lightweight, not args.repeat_reviews, args.timeout)))
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
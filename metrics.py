@@ -0,0 +1,143 @@
+"""Per-stage latency histograms and outcome counters in Prometheus text format.
+
+Request threads record into their own histograms (a thread-local dict of
+bucket-count lists), so timing a stage takes no lock: one ``perf_counter``
+call, a bisect and two increments. The registry lock is only taken the
+first time a thread records and when ``/metrics`` is scraped; scrapes add
+up every thread's counts. When a thread exits, its counts are folded into
+a retired total so short-lived threads do not grow the registry.
+
+Counts are per process: with several gunicorn workers each one reports its
+own, and Prometheus sums them across scrape targets.
+
+    started = metrics.start()
+    sequences = tokenizer.texts_to_sequences(texts)
+    started = metrics.observe('tokenize', started)
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+# Upper bounds in seconds; stages range from microseconds (padding) to a batch forward pass
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0)
+OUTCOMES = ('full_model', 'lightweight', 'error_fallback')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Stage timers and outcome counters; ``enabled=False`` makes every call a no-op"""
+
+    def __init__(self, enabled=True, buckets=LATENCY_BUCKETS, namespace='sentiment'):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.namespace = namespace
+        self._local = threading.local()
+        # Reentrant: a thread's finalizer can run during a scrape's allocations
+        self._lock = threading.RLock()
+        self._stores = []
+        self._retired = self._new_store()
+
+    @staticmethod
+    def _new_store():
+        # stage -> [count per bucket (+Inf last)..., sum of seconds]; outcome -> count
+        return {'stages': {}, 'outcomes': {}}
+
+    def _store(self):
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = self._local.store = self._new_store()
+            with self._lock:
+                self._stores.append(store)
+            weakref.finalize(threading.current_thread(), self._retire, store)
+        return store
+
+    def _retire(self, store):
+        with self._lock:
+            self._merge(self._retired, store)
+            self._stores.remove(store)
+
+    def _merge(self, total, store):
+        for stage, values in list(store['stages'].items()):
+            merged = total['stages'].setdefault(stage, [0] * (len(self.buckets) + 1) + [0.0])
+            for index, value in enumerate(values):
+                merged[index] += value
+        for outcome, count in list(store['outcomes'].items()):
+            total['outcomes'][outcome] = total['outcomes'].get(outcome, 0) + count
+
+    def start(self):
+        """Timestamp to pass to ``observe``, or None when disabled"""
+        return time.perf_counter() if self.enabled else None
+
+    def observe(self, stage, started):
+        """Record the time since ``started``; returns a new start for the next stage"""
+        if started is None:
+            return None
+        now = time.perf_counter()
+        elapsed = now - started
+        stages = self._store()['stages']
+        values = stages.get(stage)
+        if values is None:
+            values = stages[stage] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect_left(self.buckets, elapsed)] += 1
+        values[-1] += elapsed
+        return now
+
+    def count(self, outcome, amount=1):
+        """Count analyses by method (full_model, lightweight or error_fallback)"""
+        if self.enabled and amount:
+            outcomes = self._store()['outcomes']
+            outcomes[outcome] = outcomes.get(outcome, 0) + amount
+
+    def snapshot(self):
+        """Counts summed over every thread so far"""
+        total = self._new_store()
+        with self._lock:
+            self._merge(total, self._retired)
+            for store in list(self._stores):
+                self._merge(total, store)
+        return total
+
+    def stats(self):
+        """Per-stage count and mean milliseconds plus outcome counts, for /health"""
+        if not self.enabled:
+            return {'enabled': False}
+        snapshot = self.snapshot()
+        stages = {}
+        for stage, values in snapshot['stages'].items():
+            count = sum(values[:-1])
+            stages[stage] = {'count': count, 'mean_ms': round(values[-1] / count * 1000, 4) if count else 0.0}
+        return {'enabled': True, 'stages': stages, 'outcomes': snapshot['outcomes']}
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.snapshot()
+        stage_metric = f"{self.namespace}_stage_duration_seconds"
+        outcome_metric = f"{self.namespace}_analyses_total"
+        lines = [
+            f"# HELP {self.namespace}_metrics_enabled Whether stage timing is being recorded.",
+            f"# TYPE {self.namespace}_metrics_enabled gauge",
+            f"{self.namespace}_metrics_enabled {int(self.enabled)}",
+            f"# HELP {stage_metric} Time spent in each request stage.",
+            f"# TYPE {stage_metric} histogram"
+        ]
+        for stage in sorted(snapshot['stages']):
+            values = snapshot['stages'][stage]
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values[:-1]):
+                cumulative += count
+                lines.append(f'{stage_metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{stage_metric}_sum{{stage="{stage}"}} {_format_value(values[-1])}')
+            lines.append(f'{stage_metric}_count{{stage="{stage}"}} {cumulative}')
+        lines += [
+            f"# HELP {outcome_metric} Reviews analyzed, by method.",
+            f"# TYPE {outcome_metric} counter"
+        ]
+        outcomes = snapshot['outcomes']
+        for outcome in OUTCOMES + tuple(sorted(set(outcomes) - set(OUTCOMES))):
+            lines.append(f'{outcome_metric}{{method="{outcome}"}} {outcomes.get(outcome, 0)}')
+        return '\n'.join(lines) + '\n'
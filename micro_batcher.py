@@ -0,0 +1,115 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-review predictions into one forward pass.
+
+    Request threads submit one padded sequence each and get a Future back.
+    A background thread collects whatever arrives within ``max_wait_ms`` of
+    the first queued item (or until ``max_batch_size`` items are waiting),
+    stacks them into one matrix and calls ``predict_fn`` once for the lot.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch_seen = 0
+        self._errors = 0
+        self._total_wait = 0.0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, sequence):
+        """Queue one padded sequence and return a Future for its score"""
+        if not self._running:
+            raise RuntimeError('MicroBatcher has been shut down')
+        future = Future()
+        self._queue.put((np.asarray(sequence), future, time.perf_counter()))
+        return future
+
+    def predict(self, sequence, timeout=None):
+        """Blocking helper: submit a sequence and wait for its score"""
+        return self.submit(sequence).result(timeout=timeout)
+
+    def _collect(self):
+        # Block for the first item, then keep taking items until the window closes
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the sentinel back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            started = time.perf_counter()
+            futures = [future for _, future, _ in batch]
+            try:
+                matrix = np.stack([sequence for sequence, _, _ in batch])
+                scores = self.predict_fn(matrix)
+                for future, score in zip(futures, scores):
+                    future.set_result(float(score))
+                failed = False
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                failed = True
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._max_batch_seen = max(self._max_batch_seen, len(batch))
+                self._total_wait += sum(started - queued_at for _, _, queued_at in batch)
+                if failed:
+                    self._errors += 1
+
+    def stats(self):
+        """Queue depth and batch-size counters for the health endpoint"""
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': batches,
+                'items': items,
+                'errors': self._errors,
+                'avg_batch_size': items / batches if batches else 0.0,
+                'max_batch_size_seen': self._max_batch_seen,
+                'avg_queue_wait_ms': (self._total_wait / items * 1000.0) if items else 0.0,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0
+            }
+
+    def shutdown(self, timeout=None):
+        """Stop accepting work and let the worker drain the queue"""
+        if self._running:
+            self._running = False
+            self._queue.put(None)
+            self._thread.join(timeout)
@@ -0,0 +1,232 @@
+"""Memory-mapped tokenizer vocabulary shared read-only across processes.
+
+The vocabulary is stored as an open-addressing hash table over a single
+UTF-8 string blob. Opening the file maps it instead of building a Python
+dict, so every gunicorn worker reads the same page-cache pages and the
+load is effectively instant.
+
+    python mmap_vocab.py build python/tokenizer.pkl python/vocab.bin
+    python mmap_vocab.py report python/tokenizer.pkl python/vocab.bin
+
+``build`` also accepts the ``vocab.json`` written by fast_tokenizer.
+The file uses native (little-endian on all supported hosts) int32 arrays.
+"""
+import argparse
+import json
+import mmap
+import struct
+import subprocess
+import sys
+import time
+import zlib
+
+from fast_tokenizer import FastTokenizer, load_keras_tokenizer
+
+MAGIC = b'MVOCAB01'
+# magic, word count, table size, string blob size, metadata size
+HEADER = struct.Struct('<8sIIII')
+LOAD_FACTOR = 0.5
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def write_vocab(tokenizer, path):
+    """Write a FastTokenizer's vocabulary as a memory-mappable file"""
+    words = sorted(tokenizer.word_index.items(), key=lambda item: item[1])
+    encoded = [word.encode('utf8') for word, _ in words]
+
+    table_size = 1
+    while table_size * LOAD_FACTOR < max(len(words), 1):
+        table_size *= 2
+    mask = table_size - 1
+
+    slots = [-1] * table_size
+    for entry, key in enumerate(encoded):
+        slot = zlib.crc32(key) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = entry
+
+    offsets = [0]
+    for key in encoded:
+        offsets.append(offsets[-1] + len(key))
+    blob = b''.join(encoded)
+
+    metadata = json.dumps({
+        'num_words': tokenizer.num_words,
+        'filters': tokenizer.filters,
+        'lower': tokenizer.lower,
+        'split': tokenizer.split,
+        'oov_index': tokenizer.oov_index
+    }).encode('utf8')
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(words), table_size, len(blob), len(metadata)))
+        f.write(metadata)
+        f.write(b'\0' * (_align(f.tell()) - f.tell()))
+        f.write(struct.pack(f'<{table_size}i', *slots))
+        f.write(struct.pack(f'<{len(offsets)}i', *offsets))
+        f.write(struct.pack(f'<{len(words)}i', *(index for _, index in words)))
+        f.write(blob)
+
+
+class MmapVocabulary:
+    """Read-only ``word -> index`` mapping backed by a memory-mapped file
+
+    Implements ``get`` so it can stand in for the ``word_index`` dict used
+    by FastTokenizer's encoding loop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, table_size, blob_size, metadata_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a memory-mapped vocabulary file")
+
+        self.metadata = json.loads(self._mmap[HEADER.size:HEADER.size + metadata_size])
+        self._count = count
+        self._mask = table_size - 1
+
+        view = memoryview(self._mmap)
+        start = _align(HEADER.size + metadata_size)
+        self._slots = view[start:start + 4 * table_size].cast('i')
+        start += 4 * table_size
+        self._offsets = view[start:start + 4 * (count + 1)].cast('i')
+        start += 4 * (count + 1)
+        self._ids = view[start:start + 4 * count].cast('i')
+        start += 4 * count
+        self._blob_start = start
+
+    def get(self, word, default=None):
+        key = word.encode('utf8')
+        slots = self._slots
+        offsets = self._offsets
+        blob = self._mmap
+        base = self._blob_start
+        mask = self._mask
+        slot = zlib.crc32(key) & mask
+        while True:
+            entry = slots[slot]
+            if entry < 0:
+                return default
+            if blob[base + offsets[entry]:base + offsets[entry + 1]] == key:
+                return self._ids[entry]
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, word):
+        index = self.get(word)
+        if index is None:
+            raise KeyError(word)
+        return index
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def __len__(self):
+        return self._count
+
+    def items(self):
+        base = self._blob_start
+        for entry in range(self._count):
+            word = self._mmap[base + self._offsets[entry]:base + self._offsets[entry + 1]]
+            yield word.decode('utf8'), self._ids[entry]
+
+
+def load_tokenizer(path):
+    """FastTokenizer whose vocabulary lookups read the memory-mapped file"""
+    vocabulary = MmapVocabulary(path)
+    metadata = vocabulary.metadata
+    return FastTokenizer(
+        vocabulary,
+        num_words=metadata['num_words'],
+        filters=metadata['filters'],
+        lower=metadata['lower'],
+        split=metadata['split'],
+        oov_index=metadata['oov_index']
+    )
+
+
+def _load_source(path):
+    if path.endswith('.json'):
+        return FastTokenizer.load(path)
+    return FastTokenizer.from_keras(load_keras_tokenizer(path))
+
+
+def _rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def _measure(kind, path):
+    # Runs in a fresh interpreter so each loader starts from the same baseline
+    before = _rss_kb()
+    started = time.perf_counter()
+    if kind == 'mmap':
+        tokenizer = load_tokenizer(path)
+    else:
+        tokenizer = _load_source(path)
+    load_time = time.perf_counter() - started
+    after = _rss_kb()
+
+    sample = "An absolutely wonderful film, the acting was superb but the plot dragged " * 4
+    started = time.perf_counter()
+    for _ in range(200):
+        tokenizer.encode_batch([sample] * 8)
+    encode_time = (time.perf_counter() - started) / 200
+    print(json.dumps({
+        'loader': kind,
+        'load_ms': load_time * 1000,
+        'rss_before_kb': before,
+        'rss_after_kb': after,
+        'rss_delta_kb': after - before,
+        'encode_batch8_ms': encode_time * 1000
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and inspect the memory-mapped vocabulary")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help="Convert tokenizer.pkl or vocab.json into vocab.bin")
+    build_parser.add_argument('source_path')
+    build_parser.add_argument('vocab_path')
+
+    report_parser = subparsers.add_parser('report', help="Compare load time and RSS of each loader")
+    report_parser.add_argument('source_path', help="tokenizer.pkl or vocab.json")
+    report_parser.add_argument('vocab_path', help="vocab.bin written by 'build'")
+
+    measure_parser = subparsers.add_parser('_measure')
+    measure_parser.add_argument('kind')
+    measure_parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        tokenizer = _load_source(args.source_path)
+        write_vocab(tokenizer, args.vocab_path)
+        print(f"Wrote {len(tokenizer.word_index)} words to {args.vocab_path}")
+        return
+
+    if args.command == '_measure':
+        _measure(args.kind, args.path)
+        return
+
+    for kind, path in (('source', args.source_path), ('mmap', args.vocab_path)):
+        output = subprocess.run(
+            [sys.executable, __file__, '_measure', kind, path],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{kind:>6} ({path}): load {result['load_ms']:.1f} ms, "
+              f"RSS {result['rss_before_kb']} -> {result['rss_after_kb']} kB "
+              f"(+{result['rss_delta_kb']} kB), encode x8 {result['encode_batch8_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
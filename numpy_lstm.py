@@ -0,0 +1,535 @@
+"""TensorFlow-free inference for the Embedding -> LSTM -> Dense sentiment model.
+
+The weights are read straight out of the Keras ``model.h5`` file with h5py
+and the forward pass runs as vectorized NumPy, so the serving process never
+has to import TensorFlow.
+
+Inputs are pre-padded to ``MAX_SEQUENCE_LENGTH``, so a short review is
+mostly leading zeros. With ``length_buckets`` each row only runs over the
+last ``bucket`` timesteps, starting from the LSTM state the model reaches
+after ``MAX_SEQUENCE_LENGTH - bucket`` padding tokens (computed once). That
+gives the same scores as full padding at a fraction of the cost.
+
+The prepared arrays can also be exported as a directory of ``.npy`` files.
+Loading that directory memory-maps the weights read-only, so every gunicorn
+worker (and the master, with --preload) shares one copy in the page cache.
+An export never rewrites mapped files: it is written to a new directory
+that then replaces the old one.
+
+Check parity against Keras (needs TensorFlow installed) and export with:
+
+    python numpy_lstm.py python/model.h5 --check
+    python numpy_lstm.py python/model.h5 --export python/model_weights
+    python numpy_lstm.py python/model.h5 --check-buckets
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+MAX_SEQUENCE_LENGTH = 200  # Must match the padding used at training time
+DEFAULT_BATCH_SIZE = 64
+PARITY_TOLERANCE = 1e-4
+WEIGHTS_FORMAT = 'numpy-lstm/1'
+QUANTIZATION_MODES = ('float16', 'int8')
+DEFAULT_LENGTH_BUCKETS = (32, 64, 128, 200)
+BUCKET_PARITY_TOLERANCE = 1e-5
+
+
+def pad_sequences(sequences, maxlen=MAX_SEQUENCE_LENGTH, dtype=np.int32):
+    """NumPy equivalent of Keras ``pad_sequences`` with its defaults
+
+    Sequences are pre-padded with zeros and pre-truncated, so the most
+    recent ``maxlen`` tokens are kept and right-aligned.
+    """
+    padded = np.zeros((len(sequences), maxlen), dtype=dtype)
+    for row, sequence in enumerate(sequences):
+        if not len(sequence):
+            continue
+        trimmed = sequence[-maxlen:]
+        padded[row, maxlen - len(trimmed):] = trimmed
+    return padded
+
+
+def _sigmoid(x):
+    # tanh form avoids overflow warnings for large negative inputs
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+def _linear(x):
+    return x
+
+
+def _softmax(x):
+    shifted = np.exp(x - x.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'sigmoid': _sigmoid,
+    'hard_sigmoid': _hard_sigmoid,
+    'tanh': np.tanh,
+    'relu': _relu,
+    'linear': _linear,
+    'softmax': _softmax
+}
+
+
+def _activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for the NumPy engine: {name}")
+    return ACTIVATIONS[name]
+
+
+def _decode(value):
+    return value.decode('utf8') if isinstance(value, bytes) else value
+
+
+def read_h5_weights(model_path):
+    """Return the layer configs and weight arrays stored in a Keras .h5 file"""
+    import h5py
+
+    with h5py.File(model_path, 'r') as f:
+        config = json.loads(_decode(f.attrs['model_config']))
+        weights_group = f['model_weights'] if 'model_weights' in f else f
+        layers = []
+        for layer in config['config']['layers']:
+            name = layer['config'].get('name')
+            weights = []
+            if name in weights_group:
+                group = weights_group[name]
+                for weight_name in group.attrs.get('weight_names', []):
+                    weights.append(np.asarray(group[_decode(weight_name)], dtype=np.float32))
+            layers.append((layer['class_name'], layer['config'], weights))
+    return layers
+
+
+def read_manifest(weights_dir):
+    """Manifest of a :meth:`NumpyLSTMEngine.save_weights` export"""
+    with open(os.path.join(weights_dir, 'manifest.json'), 'r', encoding='utf8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != WEIGHTS_FORMAT:
+        raise ValueError(f"{weights_dir} does not contain {WEIGHTS_FORMAT} weights")
+    return manifest
+
+
+def _replace_directory(staging, target):
+    """Rename ``staging`` to ``target``, moving any previous export out of the way first"""
+    retired = staging + '.old'
+    try:
+        os.replace(target, retired)
+    except FileNotFoundError:
+        retired = None
+    try:
+        os.replace(staging, target)
+    except OSError:
+        # Another process swapped in its export after ours moved the old one away
+        if not os.path.exists(os.path.join(target, 'manifest.json')):
+            raise
+    if retired:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+class NumpyLSTMEngine:
+    """Vectorized NumPy forward pass for the Keras sentiment model.
+
+    Exposes the same ``predict_scores``/``predict``/``warmup`` interface as
+    ``InferenceEngine`` so the serving code can switch between them.
+    The embedding table is pre-multiplied with the LSTM input kernel, so the
+    per-timestep input projection becomes a single row gather.
+    """
+
+    def __init__(self, input_projection, lstm_recurrent_kernel, dense_layers,
+                 max_sequence_length=MAX_SEQUENCE_LENGTH, batch_size=DEFAULT_BATCH_SIZE,
+                 activation='tanh', recurrent_activation='sigmoid', input_projection_scale=None,
+                 length_buckets=None):
+        self.max_sequence_length = max_sequence_length
+        self.batch_size = max(1, int(batch_size))
+        self.units = lstm_recurrent_kernel.shape[0]
+        # (vocab, 4 * units): embedding lookup and input projection in one step.
+        # Memory-mapped arrays are used as they are so they stay shared.
+        self.input_projection = input_projection
+        # Per-row scales when the projection is stored as int8
+        self.input_projection_scale = input_projection_scale
+        self.recurrent_kernel = lstm_recurrent_kernel
+        self.activation_name = activation
+        self.recurrent_activation_name = recurrent_activation
+        self.activation = _activation(activation)
+        self.recurrent_activation = _activation(recurrent_activation)
+        self.dense_layers = [(kernel, bias, _activation(name)) for kernel, bias, name in dense_layers]
+        self.dense_activation_names = [name for _, _, name in dense_layers]
+        self.source = None
+        # Bucket sizes in timesteps; the last one is always the full length
+        self.length_buckets = ()
+        if length_buckets:
+            self.length_buckets = tuple(sorted(
+                {int(size) for size in length_buckets if 0 < int(size) < max_sequence_length}
+                | {max_sequence_length}
+            ))
+        self._padding_states = None
+        self._bucket_lock = threading.Lock()
+        self._bucket_counts = {size: {'rows': 0, 'batches': 0} for size in self.length_buckets}
+
+    @classmethod
+    def from_h5(cls, model_path, **kwargs):
+        """Build the engine from a Keras ``model.h5`` file"""
+        embedding = None
+        lstm = None
+        dense_layers = []
+        for class_name, config, weights in read_h5_weights(model_path):
+            if class_name == 'Embedding':
+                embedding = weights[0]
+            elif class_name == 'LSTM':
+                if config.get('return_sequences') or config.get('go_backwards'):
+                    raise ValueError("The NumPy engine only supports a forward, last-state LSTM")
+                kernel, recurrent_kernel = weights[0], weights[1]
+                bias = weights[2] if len(weights) > 2 else np.zeros(kernel.shape[1], dtype=np.float32)
+                lstm = (kernel, recurrent_kernel, bias,
+                        config.get('activation', 'tanh'),
+                        config.get('recurrent_activation', 'sigmoid'))
+            elif class_name == 'Dense':
+                kernel = weights[0]
+                bias = weights[1] if len(weights) > 1 else np.zeros(kernel.shape[1], dtype=np.float32)
+                dense_layers.append((kernel, bias, config.get('activation', 'linear')))
+            elif class_name not in ('InputLayer', 'Dropout'):
+                raise ValueError(f"Unsupported layer for the NumPy engine: {class_name}")
+
+        if embedding is None or lstm is None or not dense_layers:
+            raise ValueError(f"{model_path} is not an Embedding -> LSTM -> Dense model")
+
+        kernel, recurrent_kernel, bias, activation, recurrent_activation = lstm
+        return cls((embedding @ kernel + bias).astype(np.float32),
+                   np.ascontiguousarray(recurrent_kernel, dtype=np.float32), dense_layers,
+                   activation=activation, recurrent_activation=recurrent_activation,
+                   **kwargs)
+
+    @property
+    def quantization(self):
+        if self.input_projection_scale is not None:
+            return 'int8'
+        return None if self.input_projection.dtype == np.float32 else str(self.input_projection.dtype)
+
+    def quantize(self, mode):
+        """Copy of the engine with the input projection stored as float16 or int8
+
+        The (vocab, 4 * units) projection holds nearly all of the weights.
+        The recurrent kernel stays float32: it is applied at every timestep,
+        so its rounding error would compound through the sequence.
+        """
+        projection = np.asarray(self.input_projection, dtype=np.float32)
+        scale = None
+        if mode == 'float16':
+            projection = projection.astype(np.float16)
+        elif mode == 'int8':
+            # Symmetric per-row quantization: one scale per vocabulary entry
+            scale = np.abs(projection).max(axis=1) / 127.0
+            scale[scale == 0] = 1.0
+            projection = np.clip(np.rint(projection / scale[:, np.newaxis]), -127, 127).astype(np.int8)
+            scale = scale.astype(np.float32)
+        else:
+            raise ValueError(f"Unknown quantization mode: {mode} (expected one of {QUANTIZATION_MODES})")
+        return self._copy(projection, scale, self.length_buckets)
+
+    def select_rows(self, token_ids):
+        """Copy of the engine keeping only these input projection rows
+
+        New token id ``i`` is old id ``token_ids[i]``; see prune_vocab.py.
+        """
+        token_ids = np.asarray(token_ids)
+        projection = np.ascontiguousarray(self.input_projection[token_ids])
+        scale = self.input_projection_scale[token_ids] if self.input_projection_scale is not None else None
+        return self._copy(projection, scale, self.length_buckets)
+
+    def with_length_buckets(self, length_buckets):
+        """Copy of the engine sharing the weights, with other (or no) length buckets"""
+        return self._copy(self.input_projection, self.input_projection_scale, length_buckets)
+
+    def _copy(self, projection, scale, length_buckets):
+        dense_layers = [(kernel, bias, name) for (kernel, bias, _), name
+                        in zip(self.dense_layers, self.dense_activation_names)]
+        engine = type(self)(projection, self.recurrent_kernel, dense_layers,
+                            max_sequence_length=self.max_sequence_length, batch_size=self.batch_size,
+                            activation=self.activation_name,
+                            recurrent_activation=self.recurrent_activation_name,
+                            input_projection_scale=scale, length_buckets=length_buckets)
+        engine.source = self.source
+        return engine
+
+    def save_weights(self, weights_dir, source=None):
+        """Export the prepared arrays as .npy files plus a manifest
+
+        ``source`` is stored in the manifest so callers can tell whether the
+        export is stale (e.g. a signature of the model.h5 it came from).
+        The files go to a staging directory next to ``weights_dir`` that is
+        then renamed into place: processes mapping the previous export keep
+        their (unlinked) files, whereas rewriting them in place would kill
+        those processes with SIGBUS.
+        """
+        weights_dir = os.path.abspath(weights_dir)
+        parent, name = os.path.split(weights_dir)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{name}.', dir=parent)
+        try:
+            os.chmod(staging, 0o755)  # mkdtemp creates it private
+            np.save(os.path.join(staging, 'input_projection.npy'), np.ascontiguousarray(self.input_projection))
+            if self.input_projection_scale is not None:
+                np.save(os.path.join(staging, 'input_projection_scale.npy'), self.input_projection_scale)
+            np.save(os.path.join(staging, 'recurrent_kernel.npy'), np.ascontiguousarray(self.recurrent_kernel))
+            for i, (kernel, bias, _) in enumerate(self.dense_layers):
+                np.save(os.path.join(staging, f'dense_{i}_kernel.npy'), kernel)
+                np.save(os.path.join(staging, f'dense_{i}_bias.npy'), bias)
+            with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf8') as f:
+                json.dump({
+                    'format': WEIGHTS_FORMAT,
+                    'source': source,
+                    'quantization': self.quantization,
+                    'activation': self.activation_name,
+                    'recurrent_activation': self.recurrent_activation_name,
+                    'dense_activations': self.dense_activation_names
+                }, f, indent=2)
+            _replace_directory(staging, weights_dir)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    @classmethod
+    def from_weights(cls, weights_dir, mmap=True, **kwargs):
+        """Load arrays written by :meth:`save_weights`, memory-mapped by default"""
+        manifest = read_manifest(weights_dir)
+
+        mmap_mode = 'r' if mmap else None
+
+        def load(name):
+            return np.load(os.path.join(weights_dir, f'{name}.npy'), mmap_mode=mmap_mode)
+
+        dense_layers = [(load(f'dense_{i}_kernel'), load(f'dense_{i}_bias'), name)
+                        for i, name in enumerate(manifest['dense_activations'])]
+        scale = load('input_projection_scale') if manifest.get('quantization') == 'int8' else None
+        engine = cls(load('input_projection'), load('recurrent_kernel'), dense_layers,
+                     activation=manifest['activation'],
+                     recurrent_activation=manifest['recurrent_activation'],
+                     input_projection_scale=scale, **kwargs)
+        engine.source = manifest.get('source')
+        return engine
+
+    def warmup(self, batch_sizes=(1,)):
+        """Run dummy batches so first-request timings match steady state"""
+        for size in batch_sizes:
+            self.predict_scores(np.zeros((size, self.max_sequence_length), dtype=np.int32))
+
+    def _project(self, padded_sequences):
+        # (batch, time, 4 * units) input projections, bias already included
+        projected = self.input_projection[padded_sequences]
+        if self.input_projection_scale is not None:
+            projected = projected * self.input_projection_scale[padded_sequences][..., np.newaxis]
+        elif projected.dtype != np.float32:
+            projected = projected.astype(np.float32)
+        return projected
+
+    def _step(self, z, c):
+        units = self.units
+        i = self.recurrent_activation(z[:, :units])
+        f = self.recurrent_activation(z[:, units:2 * units])
+        g = self.activation(z[:, 2 * units:3 * units])
+        o = self.recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * g
+        return o * self.activation(c), c
+
+    def _forward(self, padded_sequences, initial_state=None):
+        projected = self._project(padded_sequences)
+        if initial_state is None:
+            h = np.zeros((len(padded_sequences), self.units), dtype=np.float32)
+            c = np.zeros_like(h)
+        else:
+            h, c = (np.repeat(state[np.newaxis], len(padded_sequences), axis=0) for state in initial_state)
+        for t in range(padded_sequences.shape[1]):
+            h, c = self._step(projected[:, t] + h @ self.recurrent_kernel, c)
+
+        output = h
+        for kernel, bias, activation in self.dense_layers:
+            output = activation(output @ kernel + bias)
+        return output
+
+    def padding_states(self):
+        """(h, c) after 0..max_sequence_length leading padding tokens, each (L + 1, units)"""
+        if self._padding_states is None:
+            padding = self._project(np.zeros((1, 1), dtype=np.int32))[:, 0]
+            h = np.zeros((1, self.units), dtype=np.float32)
+            c = np.zeros_like(h)
+            hs, cs = [h[0]], [c[0]]
+            for _ in range(self.max_sequence_length):
+                h, c = self._step(padding + h @ self.recurrent_kernel, c)
+                hs.append(h[0])
+                cs.append(c[0])
+            self._padding_states = (np.stack(hs), np.stack(cs))
+        return self._padding_states
+
+    def sequence_lengths(self, padded_sequences):
+        """Tokens after the leading padding in each pre-padded row"""
+        nonzero = padded_sequences != 0
+        first = np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), padded_sequences.shape[1])
+        return padded_sequences.shape[1] - first
+
+    def _predict_bucketed(self, padded_sequences):
+        full = self.max_sequence_length
+        hs, cs = self.padding_states()
+        buckets = np.asarray(self.length_buckets)
+        assigned = buckets[np.searchsorted(buckets, self.sequence_lengths(padded_sequences))]
+        scores = np.empty(len(padded_sequences), dtype=np.float32)
+        counts = {}
+        for size in np.unique(assigned):
+            size = int(size)
+            rows = np.flatnonzero(assigned == size)
+            skipped = full - size
+            # Start from the state the padding would have produced
+            state = (hs[skipped], cs[skipped]) if skipped else None
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                scores[chunk] = self._forward(padded_sequences[chunk, skipped:], state)[:, 0]
+            counts[size] = (len(rows), -(-len(rows) // self.batch_size))
+        with self._bucket_lock:
+            for size, (rows, batches) in counts.items():
+                self._bucket_counts[size]['rows'] += rows
+                self._bucket_counts[size]['batches'] += batches
+        return scores
+
+    def predict_scores(self, padded_sequences):
+        """Return one float score per row of a padded sequence matrix"""
+        padded_sequences = np.asarray(padded_sequences, dtype=np.int32)
+        if padded_sequences.ndim == 1:
+            padded_sequences = padded_sequences[np.newaxis, :]
+        if len(padded_sequences) == 0:
+            return np.zeros(0, dtype=np.float32)
+        if self.length_buckets and padded_sequences.shape[1] == self.max_sequence_length:
+            return self._predict_bucketed(padded_sequences)
+
+        scores = []
+        for start in range(0, len(padded_sequences), self.batch_size):
+            scores.append(self._forward(padded_sequences[start:start + self.batch_size])[:, 0])
+        return np.concatenate(scores)
+
+    def bucket_stats(self):
+        """Bucket sizes and the rows/batches run in each"""
+        with self._bucket_lock:
+            return {
+                'buckets': list(self.length_buckets),
+                'counts': {str(size): dict(counts) for size, counts in self._bucket_counts.items()}
+            }
+
+    def predict(self, padded_sequences, batch_size=None, verbose=0):
+        """Drop-in replacement for ``model.predict`` returning shape (N, 1)"""
+        return self.predict_scores(padded_sequences)[:, np.newaxis]
+
+
+def check_parity(model_path, samples=256, tolerance=PARITY_TOLERANCE, seed=0):
+    """Compare NumPy and Keras outputs on random padded batches
+
+    Returns the maximum absolute difference and raises ``AssertionError``
+    if it exceeds ``tolerance``.
+    """
+    import tensorflow as tf
+
+    engine = NumpyLSTMEngine.from_h5(model_path)
+    keras_model = tf.keras.models.load_model(model_path, compile=False)
+    vocab_size = engine.input_projection.shape[0]
+
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, MAX_SEQUENCE_LENGTH + 1, size=samples)
+    sequences = [rng.integers(1, vocab_size, size=length) for length in lengths]
+    padded = pad_sequences(sequences, maxlen=MAX_SEQUENCE_LENGTH)
+
+    expected = keras_model.predict(padded, batch_size=DEFAULT_BATCH_SIZE, verbose=0)[:, 0]
+    actual = engine.predict_scores(padded)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    assert max_diff <= tolerance, f"NumPy engine differs from Keras by {max_diff:.2e} (> {tolerance:.0e})"
+    return max_diff
+
+
+def check_bucket_parity(engine, samples=512, length_buckets=DEFAULT_LENGTH_BUCKETS,
+                        tolerance=BUCKET_PARITY_TOLERANCE, seed=0):
+    """Compare length-bucketed scores with full padding on random pre-padded reviews
+
+    Lengths are drawn so every bucket (and the truncated, full-length case)
+    is covered. Returns the maximum absolute difference and raises
+    ``AssertionError`` if it exceeds ``tolerance``.
+    """
+    full = engine.with_length_buckets(None)
+    bucketed = engine.with_length_buckets(length_buckets)
+    vocab_size = engine.input_projection.shape[0]
+
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, engine.max_sequence_length + 50, size=samples)
+    sequences = [rng.integers(1, vocab_size, size=length) for length in lengths]
+    padded = pad_sequences(sequences, maxlen=engine.max_sequence_length)
+
+    max_diff = float(np.max(np.abs(full.predict_scores(padded) - bucketed.predict_scores(padded))))
+    assert max_diff <= tolerance, f"Bucketed scores differ from full padding by {max_diff:.2e} (> {tolerance:.0e})"
+    return max_diff, bucketed.bucket_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the NumPy LSTM engine on a Keras model.h5")
+    parser.add_argument('model_path', help="Path to the Keras model.h5 file")
+    parser.add_argument('--check', action='store_true', help="Verify parity against Keras (requires TensorFlow)")
+    parser.add_argument('--samples', type=int, default=256, help="Number of random reviews for the parity check")
+    parser.add_argument('--tolerance', type=float, default=PARITY_TOLERANCE)
+    parser.add_argument('--export', metavar='DIR', help="Write memory-mappable .npy weights to DIR")
+    parser.add_argument('--check-buckets', action='store_true',
+                        help="Verify length-bucketed scores match full padding and time both")
+    parser.add_argument('--buckets', default=','.join(map(str, DEFAULT_LENGTH_BUCKETS)),
+                        help="Bucket sizes for --check-buckets")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = NumpyLSTMEngine.from_h5(args.model_path)
+    print(f"Loaded {args.model_path} in {time.perf_counter() - started:.3f}s")
+
+    for size in (1, 32, 256):
+        batch = np.zeros((size, MAX_SEQUENCE_LENGTH), dtype=np.int32)
+        started = time.perf_counter()
+        engine.predict_scores(batch)
+        print(f"batch={size}: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.export:
+        engine.save_weights(args.export)
+        shared = NumpyLSTMEngine.from_weights(args.export)
+        batch = np.random.default_rng(0).integers(0, engine.input_projection.shape[0],
+                                                  size=(64, MAX_SEQUENCE_LENGTH), dtype=np.int32)
+        assert np.array_equal(engine.predict_scores(batch), shared.predict_scores(batch)), \
+            "Exported weights do not reproduce the model outputs"
+        print(f"Exported memory-mappable weights to {args.export}")
+
+    if args.check_buckets:
+        buckets = [int(size) for size in args.buckets.split(',') if size.strip()]
+        max_diff, stats = check_bucket_parity(engine, samples=args.samples, length_buckets=buckets)
+        print(f"Bucket parity OK: max |full - bucketed| = {max_diff:.2e}, rows per bucket "
+              + ', '.join(f"{size}: {counts['rows']}" for size, counts in stats['counts'].items()))
+        # Typical short reviews: 10-60 tokens
+        rng = np.random.default_rng(1)
+        short = pad_sequences([rng.integers(1, engine.input_projection.shape[0], size=length)
+                               for length in rng.integers(10, 60, size=256)])
+        for name, candidate in (('full', engine.with_length_buckets(None)),
+                                ('bucketed', engine.with_length_buckets(buckets))):
+            started = time.perf_counter()
+            candidate.predict_scores(short)
+            print(f"{name:>8}: 256 short reviews in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if args.check:
+        max_diff = check_parity(args.model_path, samples=args.samples, tolerance=args.tolerance)
+        print(f"Parity OK: max |keras - numpy| = {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-process memory figures for checking what gunicorn workers share.
+
+RSS counts every resident page a process maps, so pages shared between the
+master and its workers are counted once per process. PSS splits each shared
+page evenly between the processes mapping it, so the PSS of all workers adds
+up to the real memory in use. Both come from /proc (Linux only).
+
+    python process_memory.py <gunicorn master pid>
+"""
+import os
+import sys
+
+# smaps_rollup fields reported, in kB
+SMAPS_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb'
+}
+
+
+def process_memory(pid='self'):
+    """RSS/PSS breakdown for a process, or just RSS where smaps_rollup is missing"""
+    memory = {'pid': os.getpid() if pid == 'self' else int(pid)}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                field, _, value = line.partition(':')
+                if field in SMAPS_FIELDS:
+                    memory[SMAPS_FIELDS[field]] = int(value.split()[0])
+        return memory
+    except OSError:
+        pass
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    memory['rss_kb'] = int(line.split()[1])
+    except OSError:
+        memory['error'] = 'memory statistics are not available on this platform'
+    return memory
+
+
+def child_pids(pid):
+    """Direct children of a process (the workers of a gunicorn master)"""
+    children = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children', 'r') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return sorted(set(children))
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.strip().splitlines()[-1].strip())
+        sys.exit(1)
+    master = int(sys.argv[1])
+    rows = [('master', process_memory(master))]
+    rows += [('worker', process_memory(child)) for child in child_pids(master)]
+
+    print(f"{'role':<8}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}")
+    totals = {'rss_kb': 0, 'pss_kb': 0}
+    for role, memory in rows:
+        shared = memory.get('shared_clean_kb', 0) + memory.get('shared_dirty_kb', 0)
+        private = memory.get('private_clean_kb', 0) + memory.get('private_dirty_kb', 0)
+        for key in totals:
+            totals[key] += memory.get(key, 0)
+        print(f"{role:<8}{memory['pid']:>8}{memory.get('rss_kb', 0) / 1024:>10.1f}"
+              f"{memory.get('pss_kb', 0) / 1024:>10.1f}{shared / 1024:>11.1f}{private / 1024:>12.1f}")
+    print(f"{'total':<16}{totals['rss_kb'] / 1024:>10.1f}{totals['pss_kb'] / 1024:>10.1f}")
+    print("PSS total is the actual memory used; RSS total double-counts shared pages.")
+
+
+if __name__ == "__main__":
+    main()
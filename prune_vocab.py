@@ -0,0 +1,201 @@
+"""Prune the model's vocabulary to the tokens a reference corpus actually uses.
+
+Token frequencies are counted over a reference corpus with the serving
+tokenizer. The top-K tokens keep their rows of the NumPy engine's input
+projection (embedding x LSTM input kernel); every other word becomes
+out-of-vocabulary, exactly as an unknown word would: mapped to the
+tokenizer's OOV index if it has one, dropped otherwise. Nothing is trained.
+
+The output directory is a NumPy weights directory plus:
+
+    vocab.json    the tokenizer with word_index remapped to the new ids
+    remap.npy     old token id -> new token id (int32, pruned ids -> OOV/0)
+    pruning.json  corpus coverage, sizes, load times and the accuracy check
+
+Serve it with INFERENCE_BACKEND=numpy PRUNED_MODEL_DIR=<dir>; the tokenizer
+and weights are then both loaded from the directory so they always match.
+
+    python prune_vocab.py python/model.h5 IMDB_Dataset.csv python/model_pruned --top-k 2000
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+from bulk_score import input_format_for, open_rows
+from fast_tokenizer import FastTokenizer, load_keras_tokenizer
+from numpy_lstm import MAX_SEQUENCE_LENGTH, QUANTIZATION_MODES, NumpyLSTMEngine
+from quantize_model import POSITIVE_THRESHOLD, directory_size
+
+DEFAULT_EVAL_FRACTION = 0.2
+
+
+def load_serving_tokenizer(path):
+    """FastTokenizer from vocab.json or a pickled Keras tokenizer"""
+    if path.endswith('.json'):
+        return FastTokenizer.load(path)
+    return FastTokenizer.from_keras(load_keras_tokenizer(path))
+
+
+def read_corpus(path, limit=None):
+    """(texts, labels) from a CSV/JSONL/Parquet file; labels is None without a sentiment column"""
+    texts, labels = [], []
+    input_format = input_format_for(path)
+    for index, _, review in open_rows(path, input_format):
+        if limit and index >= limit:
+            break
+        texts.append(review if isinstance(review, str) else '')
+    if input_format == 'csv':
+        import csv
+        with open(path, newline='', encoding='utf8', errors='replace') as f:
+            reader = csv.DictReader(f)
+            if 'sentiment' in (reader.fieldnames or []):
+                labels = [row['sentiment'].strip().lower() == 'positive'
+                          for _, row in zip(range(len(texts)), reader)]
+    return texts, (np.array(labels) if len(labels) == len(texts) else None)
+
+
+def token_frequencies(tokenizer, texts):
+    """Count token ids as the model sees them (after truncation to MAX_SEQUENCE_LENGTH)"""
+    counts = Counter()
+    for text in texts:
+        counts.update(tokenizer.encode(text)[-MAX_SEQUENCE_LENGTH:])
+    return counts
+
+
+def build_remap(counts, vocab_size, top_k, oov_index=None):
+    """Old-to-new id table and the kept old ids (new id i is old id kept[i])
+
+    Id 0 (padding) stays 0 and the OOV index, if any, is always kept; the
+    remaining slots go to the most frequent tokens.
+    """
+    reserved = [0] + ([oov_index] if oov_index is not None else [])
+    ranked = [index for index, _ in counts.most_common() if index not in reserved and index < vocab_size]
+    kept = reserved + sorted(ranked[:top_k])
+    # Pruned ids go to the new OOV id (1, right after padding) or to 0, which
+    # prune_tokenizer turns into dropping the word
+    remap = np.full(vocab_size, 1 if oov_index is not None else 0, dtype=np.int32)
+    remap[np.asarray(kept)] = np.arange(len(kept), dtype=np.int32)
+    return remap, np.asarray(kept, dtype=np.int64)
+
+
+def prune_tokenizer(tokenizer, remap):
+    """Tokenizer emitting new ids; pruned words fall back to OOV or are dropped"""
+    oov_index = int(remap[tokenizer.oov_index]) if tokenizer.oov_index is not None else None
+    word_index = {word: int(remap[index]) for word, index in tokenizer.word_index.items()
+                  if index < len(remap) and remap[index] and remap[index] != oov_index}
+    return FastTokenizer(word_index, num_words=int(remap.max()) + 1, filters=tokenizer.filters,
+                         lower=tokenizer.lower, split=tokenizer.split, oov_index=oov_index)
+
+
+def evaluate(engine, tokenizer, pruned_engine, pruned_tokenizer, texts, labels):
+    full_scores = engine.predict_scores(tokenizer.encode_batch(texts, MAX_SEQUENCE_LENGTH))
+    pruned_scores = pruned_engine.predict_scores(pruned_tokenizer.encode_batch(texts, MAX_SEQUENCE_LENGTH))
+    full_labels = full_scores > POSITIVE_THRESHOLD
+    pruned_labels = pruned_scores > POSITIVE_THRESHOLD
+    result = {
+        'reviews': len(texts),
+        'label_agreement': float(np.mean(full_labels == pruned_labels)),
+        'max_abs_diff': float(np.max(np.abs(full_scores - pruned_scores))),
+        'mean_abs_diff': float(np.mean(np.abs(full_scores - pruned_scores)))
+    }
+    if labels is not None:
+        result['accuracy_full'] = float(np.mean(full_labels == labels))
+        result['accuracy_pruned'] = float(np.mean(pruned_labels == labels))
+        result['accuracy_drop'] = result['accuracy_full'] - result['accuracy_pruned']
+    return result
+
+
+def time_load(load, repeats=5):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        load()
+    return round((time.perf_counter() - started) / repeats * 1000, 2)
+
+
+def prune(model_path, tokenizer_path, corpus_path, output_dir, top_k, eval_fraction=DEFAULT_EVAL_FRACTION,
+          limit=None, quantization=None):
+    tokenizer = load_serving_tokenizer(tokenizer_path)
+    engine = NumpyLSTMEngine.from_h5(model_path)
+    texts, labels = read_corpus(corpus_path, limit)
+    split = int(len(texts) * (1 - eval_fraction))
+    if not 0 < split < len(texts):
+        raise ValueError(f"{corpus_path} has too few reviews to split for evaluation ({len(texts)})")
+
+    # Frequencies from the reference part only, so the check runs on unseen reviews
+    counts = token_frequencies(tokenizer, texts[:split])
+    vocab_size = engine.input_projection.shape[0]
+    remap, kept = build_remap(counts, vocab_size, top_k, tokenizer.oov_index)
+    pruned_engine = engine.select_rows(kept)
+    if quantization:
+        pruned_engine = pruned_engine.quantize(quantization)
+    pruned_tokenizer = prune_tokenizer(tokenizer, remap)
+
+    pruned_engine.save_weights(output_dir)
+    pruned_tokenizer.save(os.path.join(output_dir, 'vocab.json'))
+    np.save(os.path.join(output_dir, 'remap.npy'), remap)
+
+    total = sum(counts.values())
+    kept_set = set(kept.tolist())
+    report = {
+        'model_path': model_path,
+        'top_k': top_k,
+        'quantization': quantization,
+        'vocab_size': vocab_size,
+        'kept_rows': len(kept),
+        'corpus_token_coverage': sum(count for index, count in counts.items() if index in kept_set) / max(total, 1),
+        'size_mb': {
+            'model_h5': round(os.path.getsize(model_path) / 1e6, 3),
+            'pruned_weights': round(directory_size(output_dir) / 1e6, 3)
+        },
+        'load_ms': {
+            'model_h5': time_load(lambda: NumpyLSTMEngine.from_h5(model_path)),
+            'pruned_weights': time_load(lambda: (NumpyLSTMEngine.from_weights(output_dir, mmap=False),
+                                                 FastTokenizer.load(os.path.join(output_dir, 'vocab.json'))))
+        },
+        'evaluation': evaluate(engine, tokenizer, pruned_engine, pruned_tokenizer,
+                               texts[split:], labels[split:] if labels is not None else None)
+    }
+    with open(os.path.join(output_dir, 'pruning.json'), 'w', encoding='utf8') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    root = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Prune the embedding rows to the top-K corpus tokens")
+    parser.add_argument('model_path')
+    parser.add_argument('corpus', help="Reference reviews (CSV, JSONL or Parquet)")
+    parser.add_argument('output_dir')
+    parser.add_argument('--top-k', type=int, required=True, help="Tokens to keep besides padding/OOV")
+    parser.add_argument('--tokenizer', default=os.path.join(root, 'python', 'vocab.json'),
+                        help="vocab.json or tokenizer.pkl used for serving")
+    parser.add_argument('--eval-fraction', type=float, default=DEFAULT_EVAL_FRACTION,
+                        help="Tail of the corpus held out for the accuracy check")
+    parser.add_argument('--limit', type=int, help="Only read the first N reviews")
+    parser.add_argument('--quantize', choices=QUANTIZATION_MODES, help="Also quantize the kept rows")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01,
+                        help="Fail if accuracy (or label agreement without labels) drops by more")
+    args = parser.parse_args()
+
+    report = prune(args.model_path, args.tokenizer, args.corpus, args.output_dir, args.top_k,
+                   args.eval_fraction, args.limit, args.quantize)
+    evaluation = report['evaluation']
+    print(f"Kept {report['kept_rows']} of {report['vocab_size']} rows "
+          f"({report['corpus_token_coverage']:.1%} of corpus tokens)")
+    print(f"Size: model.h5 {report['size_mb']['model_h5']} MB -> {report['size_mb']['pruned_weights']} MB")
+    print(f"Load: model.h5 {report['load_ms']['model_h5']} ms -> {report['load_ms']['pruned_weights']} ms")
+    print(f"Held-out {evaluation['reviews']} reviews: label agreement {evaluation['label_agreement']:.2%}, "
+          f"max |diff| {evaluation['max_abs_diff']:.3f}")
+    drop = evaluation.get('accuracy_drop', 1.0 - evaluation['label_agreement'])
+    if 'accuracy_drop' in evaluation:
+        print(f"Accuracy {evaluation['accuracy_full']:.2%} -> {evaluation['accuracy_pruned']:.2%}")
+    if drop > args.max_accuracy_drop:
+        raise SystemExit(f"Accuracy loss {drop:.2%} exceeds --max-accuracy-drop {args.max_accuracy_drop:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,19 @@
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Reduce TensorFlow warnings
 
+import sys
 import tensorflow as tf
 import joblib
 import pickle
 from tensorflow.keras.preprocessing.sequence import pad_sequences
-import numpy as np
-import re
-from collections import Counter
-import json
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
+# Make the shared serving modules in the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference_engine import InferenceEngine
+from text_analysis import AnalyzedText, REVIEW_ASPECTS, as_analyzed
+
 # Create a custom unpickler to handle module remapping
 class CustomUnpickler(pickle.Unpickler):
     def find_class(self, module, name):
@@ -49,6 +51,10 @@ except ValueError as e:
         custom_objects={'LSTM': CompatibleLSTM}
     )
 
+# Serve through a traced tf.function instead of model.predict
+engine = InferenceEngine(model, max_sequence_length=200)
+engine.warmup()
+
 # Load tokenizer with error handling
 try:
     tokenizer = joblib.load("tokenizer.pkl")
@@ -65,54 +71,15 @@ except Exception as e:
         print("Creating a new tokenizer. This may not match the original exactly.")
         tokenizer = Tokenizer(num_words=5000)
 
-def clean_text(text):
-    """Clean and preprocess text for word cloud"""
-    # Remove special characters and numbers
-    text = re.sub(r'[^a-zA-Z\s]', '', text.lower())
-    # Remove common English stopwords
-    stopwords = {'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 
-                'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against', 'between',
-                'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to',
-                'from', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again',
-                'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how',
-                'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such',
-                'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's',
-                't', 'can', 'will', 'just', 'don', 'should', 'now', 'movie', 'film', 'watch'}
-    return ' '.join(word for word in text.split() if word not in stopwords)
-
 def extract_key_phrases(text, sentiment):
     """Extract key phrases that contribute to sentiment"""
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-    
-    # Get word counts
-    word_counts = Counter(words)
-    
-    # Positive and negative sentiment words
-    positive_words = {'good', 'great', 'excellent', 'amazing', 'wonderful', 'best', 'love', 
-                     'awesome', 'fantastic', 'enjoyed', 'favorite', 'perfect', 'brilliant',
-                     'superb', 'outstanding', 'masterpiece', 'beautiful', 'recommend'}
-    
-    negative_words = {'bad', 'worst', 'terrible', 'awful', 'boring', 'waste', 'poor', 
-                     'disappointing', 'horrible', 'hate', 'stupid', 'ridiculous', 'worse',
-                     'dull', 'mediocre', 'fails', 'avoid', 'mess', 'disaster'}
-    
-    neutral_words = {'okay', 'average', 'decent', 'fine', 'alright', 'fair', 'moderate',
-                    'passable', 'acceptable', 'ordinary', 'standard', 'middle', 'mixed',
-                    'balanced', 'neutral', 'so-so', 'neither', 'somewhat'}
-    
-    # Find matching sentiment words
-    if sentiment == "positive":
-        target_words = positive_words
-    elif sentiment == "negative":
-        target_words = negative_words
-    else:  # neutral
-        target_words = neutral_words
-        
-    found_words = [word for word in words if word in target_words]
+    analyzed = as_analyzed(text, REVIEW_ASPECTS)
     
-    # Get most common words (excluding stopwords)
-    common_words = [word for word, count in word_counts.most_common(10)]
+    # Find matching sentiment words (neutral for anything else)
+    found_words = analyzed.lexicon_hits.get(sentiment, analyzed.lexicon_hits['neutral'])
+    
+    # Get most common words (excluding stopwords and the words found above)
+    common_words = analyzed.common_words(10, covered=found_words)
     
     # Combine results
     key_phrases = list(set(found_words + common_words))[:5]
@@ -124,24 +91,13 @@ def extract_key_phrases(text, sentiment):
 
 def analyze_sentiment_aspects(text, sentiment_score):
     """Analyze different aspects of sentiment in the text"""
-    # Clean the text
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-    
-    # Define aspect categories and their associated words
-    aspects = {
-        'Emotional Impact': ['emotional', 'moving', 'touching', 'powerful', 'sad', 'happy', 'feel', 'felt', 'heart', 'tears'],
-        'Acting Quality': ['acting', 'actor', 'actress', 'performance', 'cast', 'played', 'role', 'character'],
-        'Plot & Story': ['plot', 'story', 'script', 'screenplay', 'narrative', 'twist', 'ending', 'predictable'],
-        'Visual Appeal': ['visual', 'cinematography', 'beautiful', 'stunning', 'effects', 'cgi', 'scene', 'shot'],
-        'Entertainment Value': ['entertaining', 'enjoyable', 'fun', 'boring', 'exciting', 'thrill', 'laugh', 'comedy']
-    }
+    analyzed = as_analyzed(text, REVIEW_ASPECTS)
     
     # Calculate aspect scores
     aspect_scores = {}
-    for aspect, aspect_words in aspects.items():
+    for aspect, matches in analyzed.aspect_hits.items():
         # Count occurrences of aspect words
-        aspect_word_count = sum(1 for word in words if word in aspect_words)
+        aspect_word_count = len(matches)
         
         # Base score on word presence and overall sentiment
         if aspect_word_count > 0:
@@ -165,8 +121,7 @@ def analyze_review(review):
     # Process the review
     sequences = tokenizer.texts_to_sequences([review])
     padded_sequence = pad_sequences(sequences, maxlen=200)
-    prediction = model.predict(padded_sequence, verbose=0)
-    confidence = float(prediction[0][0])
+    confidence = float(engine.predict_scores(padded_sequence)[0])
     
     # Updated sentiment classification to include neutral
     if confidence > 0.55:
@@ -176,11 +131,14 @@ def analyze_review(review):
     else:
         sentiment = "neutral"
     
+    # Clean and match the review once for both text features
+    analyzed = AnalyzedText(review, REVIEW_ASPECTS)
+    
     # Analyze sentiment aspects
-    aspect_scores = analyze_sentiment_aspects(review, confidence)
+    aspect_scores = analyze_sentiment_aspects(analyzed, confidence)
     
     # Extract key phrases
-    key_phrases = extract_key_phrases(review, sentiment)
+    key_phrases = extract_key_phrases(analyzed, sentiment)
     
     # Prepare response
     response = {
@@ -0,0 +1,313 @@
+"""Render-once chart templates for the Gradio app.
+
+Each chart is drawn on a figure that is built once per thread and then only
+has its data-bearing artists updated (gauge wedge and labels, radar polygon,
+frequency bars, word-cloud image) before being written out as PNG bytes.
+Figures are created with the object-oriented API on an Agg canvas, so
+pyplot never tracks them and nothing accumulates between requests.
+
+Rendered PNGs are cached in a bounded LRU keyed on the rounded inputs, so
+repeated scores (the aspect scores move in steps of 0.1) skip drawing.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Wedge
+
+CHART_CACHE_MAX_ENTRIES = int(os.environ.get('CHART_CACHE_MAX_ENTRIES', 512))
+CHART_CACHE_MAX_BYTES = int(os.environ.get('CHART_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+CHART_DPI = int(os.environ.get('CHART_DPI', 100))
+PNG_COMPRESS_LEVEL = 1  # zlib level: larger files, much faster encoding than the default 6
+FREQUENCY_SLOTS = 9  # Up to three words each for positive, neutral and negative
+
+
+def gauge_style(sentiment_score):
+    """Colour and label of the gauge for a score"""
+    if sentiment_score < 0.45:
+        return '#FF6B6B', "NEGATIVE"  # Red for negative
+    if sentiment_score < 0.55:
+        return '#FFCC00', "NEUTRAL"  # Yellow for neutral
+    return '#4CAF50', "POSITIVE"  # Green for positive
+
+
+def _new_figure(figsize):
+    figure = Figure(figsize=figsize, dpi=CHART_DPI)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _png(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=CHART_DPI, pil_kwargs={'compress_level': PNG_COMPRESS_LEVEL})
+    return buffer.getvalue()
+
+
+class GaugeTemplate:
+    center_x = 0.5
+    center_y = 0.5
+    gauge_width = 0.8
+    gauge_height = 0.35
+
+    def __init__(self):
+        self.figure = _new_figure((8, 4))
+        ax = self.figure.add_subplot()
+        ax.set_axis_off()
+        cx, cy, width = self.center_x, self.center_y, self.gauge_width
+
+        # Background arc (gray) and the coloured arc that follows the score
+        ax.add_patch(Wedge((cx, cy), width, 180, 0, width=self.gauge_height,
+                           facecolor='#EEEEEE', edgecolor='gray', linewidth=1))
+        self.foreground = Wedge((cx, cy), width, 180, 180, width=self.gauge_height,
+                                edgecolor='gray', linewidth=1)
+        ax.add_patch(self.foreground)
+        self.score_text = ax.text(cx, cy - 0.15, '', ha='center', va='center', fontsize=24, fontweight='bold')
+        self.label_text = ax.text(cx, cy + 0.15, '', ha='center', va='center', fontsize=18, fontweight='bold')
+
+        ax.text(cx - width - 0.05, cy, "0.0", ha='right', va='center', fontsize=12, color='gray')
+        ax.text(cx, cy - width - 0.05, "0.5", ha='center', va='top', fontsize=12, color='gray')
+        ax.text(cx + width + 0.05, cy, "1.0", ha='left', va='center', fontsize=12, color='gray')
+        ax.text(cx, cy - width - 0.2, "Sentiment Confidence", ha='center', va='center',
+                fontsize=14, fontweight='bold')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+
+    def render(self, sentiment_score, style):
+        color, label = style
+        self.foreground.set_theta2(180 - 180 * sentiment_score)
+        self.foreground.set_facecolor(color)
+        self.score_text.set_text(f"{sentiment_score:.2f}")
+        self.score_text.set_color(color)
+        self.label_text.set_text(label)
+        self.label_text.set_color(color)
+        return _png(self.figure)
+
+
+class RadarTemplate:
+    def __init__(self, categories):
+        self.figure = _new_figure((8, 8))
+        ax = self.figure.add_subplot(polar=True)
+        count = len(categories)
+        self.angles = [n / float(count) * 2 * np.pi for n in range(count)]
+        closed_angles = self.angles + self.angles[:1]
+        zeros = [0.0] * len(closed_angles)
+
+        self.line, = ax.plot(closed_angles, zeros, linewidth=2, linestyle='solid', color='#1967D2')
+        self.area = ax.fill(closed_angles, zeros, color='#1967D2', alpha=0.4)[0]
+        ax.set_xticks(self.angles)
+        ax.set_xticklabels(categories, size=12)
+        self.value_texts = [
+            ax.text(angle, 0.1, '', horizontalalignment='center', size=10,
+                    bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
+            for angle in self.angles
+        ]
+        ax.set_ylim(0, 1)
+        ax.set_yticks([0.2, 0.4, 0.6, 0.8, 1.0])
+        ax.set_yticklabels(['0.2', '0.4', '0.6', '0.8', '1.0'], color="grey", size=10)
+        ax.set_title('Sentiment Analysis by Aspect', size=15, y=1.1)
+
+    def render(self, values):
+        closed_angles = self.angles + self.angles[:1]
+        closed_values = list(values) + list(values[:1])
+        self.line.set_data(closed_angles, closed_values)
+        self.area.set_xy(np.column_stack([closed_angles, closed_values]))
+        for text, angle, value in zip(self.value_texts, self.angles, values):
+            text.set_position((angle, value + 0.1))
+            text.set_text(f"{value:.2f}")
+        return _png(self.figure)
+
+
+class FrequencyTemplate:
+    """Horizontal bars for the top positive, neutral and negative words"""
+
+    def __init__(self):
+        self.figure = _new_figure((10, 8))
+        ax = self.ax = self.figure.add_subplot()
+        self.bars = ax.barh(range(FREQUENCY_SLOTS), [0] * FREQUENCY_SLOTS, alpha=0.7, height=0.4)
+        self.count_texts = [ax.text(0, slot, '', va='center', fontsize=10) for slot in range(FREQUENCY_SLOTS)]
+        ax.set_title('Frequency of Sentiment Words', fontsize=14)
+        ax.set_xlabel('Count', fontsize=12)
+        # Fixed margins instead of tight_layout on every render
+        self.figure.subplots_adjust(left=0.2, right=0.95, top=0.93, bottom=0.08)
+
+    def render(self, rows):
+        """``rows`` is a list of (label, count, colour) from bottom to top"""
+        for slot, (bar, text) in enumerate(zip(self.bars, self.count_texts)):
+            if slot < len(rows):
+                _, count, color = rows[slot]
+                bar.set_width(count)
+                bar.set_facecolor(color)
+                bar.set_visible(True)
+                text.set_position((count + 0.1, slot))
+                text.set_text(f"{int(count)}" if count > 0 else '')
+            else:
+                bar.set_visible(False)
+                text.set_text('')
+        self.ax.set_yticks(range(len(rows)))
+        self.ax.set_yticklabels([label for label, _, _ in rows])
+        self.ax.set_ylim(-0.5, len(rows) - 0.5)
+        self.ax.set_xlim(0, max([count for _, count, _ in rows] + [1]) * 1.1)
+        return _png(self.figure)
+
+
+class ImageTemplate:
+    """Word-cloud image (or a text message when there is nothing to show)"""
+
+    def __init__(self):
+        self.figure = _new_figure((10, 5))
+        ax = self.ax = self.figure.add_subplot()
+        self.image = ax.imshow(np.zeros((1, 1, 3), dtype=np.uint8), interpolation='bilinear')
+        self.message = ax.text(0.5, 0.5, '', ha='center', va='center', fontsize=12, transform=ax.transAxes)
+        ax.axis('off')
+        self.title = ax.set_title('', fontsize=16, pad=20)
+        for spine in ax.spines.values():
+            spine.set_visible(True)
+            spine.set_color('lightgray')
+
+    def render(self, image=None, title='', message=''):
+        if image is not None:
+            height, width = image.shape[:2]
+            self.image.set_data(image)
+            self.image.set_extent((-0.5, width - 0.5, height - 0.5, -0.5))
+            self.ax.set_xlim(-0.5, width - 0.5)
+            self.ax.set_ylim(height - 0.5, -0.5)
+        self.image.set_visible(image is not None)
+        self.message.set_text(message)
+        self.title.set_text(title)
+        return _png(self.figure)
+
+
+class ChartRenderer:
+    """Thread-safe entry point: per-thread templates plus a shared PNG cache"""
+
+    def __init__(self, max_entries=CHART_CACHE_MAX_ENTRIES, max_bytes=CHART_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'templates_built': 0}
+
+    def _template(self, name, factory):
+        # Figures are not thread-safe, so every thread draws on its own set
+        templates = getattr(self._local, 'templates', None)
+        if templates is None:
+            templates = self._local.templates = {}
+        template = templates.get(name)
+        if template is None:
+            template = templates[name] = factory()
+            with self._lock:
+                self._counters['templates_built'] += 1
+        return template
+
+    def _cached(self, key, render):
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+                self._counters['hits'] += 1
+                return png
+            self._counters['misses'] += 1
+        png = render()
+        if self.max_entries <= 0:
+            return png
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = png
+                self._bytes += len(png)
+            while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._cache.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._counters['evictions'] += 1
+        return png
+
+    def gauge(self, sentiment_score):
+        # The gauge prints two decimals; the colour still follows the exact score
+        rounded = round(float(sentiment_score), 2)
+        style = gauge_style(sentiment_score)
+        return self._cached(('gauge', rounded, style),
+                            lambda: self._template('gauge', GaugeTemplate).render(rounded, style))
+
+    def radar(self, aspect_scores):
+        categories = tuple(aspect_scores)
+        values = tuple(round(float(value), 2) for value in aspect_scores.values())
+        return self._cached(('radar', categories, values),
+                            lambda: self._template(('radar', categories),
+                                                   lambda: RadarTemplate(categories)).render(values))
+
+    def word_frequency(self, positive, neutral, negative):
+        """Top (word, count) lists per polarity; empty lists show '(none found)'"""
+        rows = []
+        for prefix, words, color in (('+', positive, '#4CAF50'), ('=', neutral, '#FFCC00'),
+                                     ('-', negative, '#FF6B6B')):
+            for word, count in (words or [("(none found)", 0)])[:3]:
+                rows.append((f"{prefix} {word}", count, color))
+        rows = tuple(rows)
+        return self._cached(('frequency', rows),
+                            lambda: self._template('frequency', FrequencyTemplate).render(rows))
+
+    def image(self, key, make_image, title=''):
+        """Cached image chart; ``make_image`` only runs on a miss"""
+        return self._cached(('image', key, title),
+                            lambda: self._template('image', ImageTemplate).render(make_image(), title))
+
+    def message(self, text):
+        return self._cached(('message', text),
+                            lambda: self._template('image', ImageTemplate).render(message=text))
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._cache), bytes=self._bytes)
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def main():
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="Render synthetic requests and report time and memory")
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--no-cache', action='store_true', help="Render every chart (cache disabled)")
+    args = parser.parse_args()
+
+    renderer = ChartRenderer(max_entries=0 if args.no_cache else CHART_CACHE_MAX_ENTRIES)
+    aspects = ('Emotional Impact', 'Acting Quality', 'Plot & Story', 'Visual Appeal', 'Entertainment Value')
+    words = ['great', 'superb', 'boring', 'awful', 'decent', 'fine']
+    rng = random.Random(0)
+    started = time.perf_counter()
+    rss_start = None
+    for i in range(args.requests):
+        score = rng.random()
+        renderer.gauge(score)
+        # Aspects without matching words score 0.5, the rest move in steps of 0.1
+        renderer.radar({aspect: 0.5 + (rng.choice((-2, -1, 1, 2)) * 0.1 if rng.random() < 0.3 else 0.0)
+                        for aspect in aspects})
+        counts = [(word, rng.randint(1, 4)) for word in rng.sample(words, rng.randint(0, 3))]
+        renderer.word_frequency(counts[:1], counts[1:2], counts[2:])
+        if i == 99:
+            # Measure growth after the templates and first cache entries exist
+            rss_start = _rss_mb()
+        if (i + 1) % 1000 == 0:
+            print(f"{i + 1} requests: {(time.perf_counter() - started) / (i + 1) * 1000:.2f} ms/request, "
+                  f"RSS {_rss_mb():.1f} MB")
+    print(f"RSS growth after warmup: {_rss_mb() - (rss_start or _rss_mb()):+.1f} MB; cache {renderer.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,20 @@ import joblib
 import pickle
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 import gradio as gr
+import io
 import sys
-import matplotlib.pyplot as plt
-import numpy as np
-from wordcloud import WordCloud
+from PIL import Image
 import re
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
-import matplotlib.cm as cm
-from matplotlib.patches import Circle, Wedge, Rectangle
+from chart_renderer import ChartRenderer
+from wordcloud_engine import WordCloudEngine, word_frequencies
+
+# Make the shared serving modules in the repository root importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference_engine import InferenceEngine
 
 # Create a custom unpickler to handle module remapping
 class CustomUnpickler(pickle.Unpickler):
@@ -54,6 +58,10 @@ except ValueError as e:
         custom_objects={'LSTM': CompatibleLSTM}
     )
 
+# Serve through a traced tf.function instead of model.predict
+engine = InferenceEngine(model, max_sequence_length=200)
+engine.warmup()
+
 # Load tokenizer with error handling
 try:
     tokenizer = joblib.load("tokenizer.pkl")
@@ -73,6 +81,20 @@ except Exception as e:
 # Store analysis history
 analysis_history = []
 
+# Reused figure templates and a PNG cache for the charts
+renderer = ChartRenderer()
+
+# Reused WordCloud instances and a layout cache keyed on the word counts
+wordclouds = WordCloudEngine()
+
+# Charts render in parallel after the sentiment is shown (templates are per thread)
+CHART_WORKERS = int(os.environ.get('CHART_WORKERS', 4))
+chart_executor = ThreadPoolExecutor(max_workers=CHART_WORKERS, thread_name_prefix='charts')
+
+def as_image(png):
+    """PIL image for a rendered PNG (what the gr.Image outputs take)"""
+    return Image.open(io.BytesIO(png))
+
 def clean_text(text):
     """Clean and preprocess text for word cloud"""
     # Remove special characters and numbers
@@ -88,31 +110,18 @@ def clean_text(text):
                 't', 'can', 'will', 'just', 'don', 'should', 'now', 'movie', 'film', 'watch'}
     return ' '.join(word for word in text.split() if word not in stopwords)
 
+def render_wordcloud(cleaned_text, style, title):
+    """Word cloud image for cleaned text, drawn only when its word counts are new"""
+    frequencies = word_frequencies(cleaned_text)
+    key = wordclouds.signature(frequencies, style)
+    if not key[-1]:
+        # If no words are left after removing stopwords, return a simple message
+        return as_image(renderer.message("Not enough meaningful words to generate a word cloud"))
+    return as_image(renderer.image(key, lambda: wordclouds.render(frequencies, style), title))
+
 def generate_wordcloud(text):
     """Generate word cloud from text"""
-    cleaned_text = clean_text(text)
-    if not cleaned_text.strip():
-        # If text is empty after cleaning, return a simple message
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.text(0.5, 0.5, "Not enough meaningful words to generate a word cloud", 
-                ha='center', va='center', fontsize=12)
-        ax.axis('off')
-        return fig
-    
-    # Generate word cloud
-    wordcloud = WordCloud(width=800, height=400, 
-                         background_color='white', 
-                         max_words=100,
-                         colormap='viridis',
-                         contour_width=1, 
-                         contour_color='steelblue').generate(cleaned_text)
-    
-    # Display the word cloud
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-    ax.set_title('Key Words in Review')
-    return fig
+    return render_wordcloud(clean_text(text), 'plain', 'Key Words in Review')
 
 def extract_key_phrases(text, sentiment):
     """Extract key phrases that contribute to sentiment"""
@@ -192,160 +201,20 @@ def analyze_sentiment_aspects(text, sentiment_score):
 
 def create_radar_chart(aspect_scores):
     """Create a radar chart for sentiment aspects"""
-    # Prepare data
-    categories = list(aspect_scores.keys())
-    values = list(aspect_scores.values())
-    
-    # Number of variables
-    N = len(categories)
-    
-    # Create angles for each category
-    angles = [n / float(N) * 2 * np.pi for n in range(N)]
-    angles += angles[:1]  # Close the loop
-    
-    # Add the values for the last point to close the loop
-    values += values[:1]
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
-    
-    # Draw the chart
-    ax.plot(angles, values, linewidth=2, linestyle='solid', color='#1967D2')
-    ax.fill(angles, values, color='#1967D2', alpha=0.4)
-    
-    # Add category labels
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(categories, size=12)
-    
-    # Add value labels at each point
-    for angle, value, category in zip(angles[:-1], values[:-1], categories):
-        ax.text(angle, value + 0.1, f"{value:.2f}", 
-                horizontalalignment='center', size=10, 
-                bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
-    
-    # Set y-axis limits
-    ax.set_ylim(0, 1)
-    ax.set_yticks([0.2, 0.4, 0.6, 0.8, 1.0])
-    ax.set_yticklabels(['0.2', '0.4', '0.6', '0.8', '1.0'], color="grey", size=10)
-    
-    # Add title
-    plt.title('Sentiment Analysis by Aspect', size=15, y=1.1)
-    
-    return fig
+    return as_image(renderer.radar(aspect_scores))
 
 def create_gauge_chart(sentiment_score):
     """Create a gauge chart for sentiment score"""
-    fig, ax = plt.subplots(figsize=(8, 4), subplot_kw=dict(polar=False))
-    
-    # Hide axis
-    ax.set_axis_off()
-    
-    # Define gauge properties
-    gauge_height = 0.35
-    gauge_width = 0.8
-    center_x = 0.5
-    center_y = 0.5
-    
-    # Create background arc (gray)
-    background = Wedge((center_x, center_y), gauge_width, 180, 0, width=gauge_height, 
-                      facecolor='#EEEEEE', edgecolor='gray', linewidth=1)
-    ax.add_patch(background)
-    
-    # Create colored arc based on sentiment score
-    angle = 180 - 180 * sentiment_score
-    
-    # Define color gradient based on sentiment score
-    if sentiment_score < 0.45:
-        color = '#FF6B6B'  # Red for negative
-        sentiment_label = "NEGATIVE"
-    elif sentiment_score < 0.55:
-        color = '#FFCC00'  # Yellow for neutral
-        sentiment_label = "NEUTRAL"
-    else:
-        color = '#4CAF50'  # Green for positive
-        sentiment_label = "POSITIVE"
-    
-    # Create foreground arc (colored)
-    foreground = Wedge((center_x, center_y), gauge_width, 180, angle, width=gauge_height, 
-                      facecolor=color, edgecolor='gray', linewidth=1)
-    ax.add_patch(foreground)
-    
-    # Add score text
-    ax.text(center_x, center_y - 0.15, f"{sentiment_score:.2f}", 
-            ha='center', va='center', fontsize=24, fontweight='bold', color=color)
-    
-    # Add sentiment label
-    ax.text(center_x, center_y + 0.15, sentiment_label, 
-            ha='center', va='center', fontsize=18, fontweight='bold', color=color)
-    
-    # Add gauge labels
-    ax.text(center_x - gauge_width - 0.05, center_y, "0.0", 
-            ha='right', va='center', fontsize=12, color='gray')
-    ax.text(center_x, center_y - gauge_width - 0.05, "0.5", 
-            ha='center', va='top', fontsize=12, color='gray')
-    ax.text(center_x + gauge_width + 0.05, center_y, "1.0", 
-            ha='left', va='center', fontsize=12, color='gray')
-    
-    # Add title
-    ax.text(center_x, center_y - gauge_width - 0.2, "Sentiment Confidence", 
-            ha='center', va='center', fontsize=14, fontweight='bold')
-    
-    # Set limits
-    ax.set_xlim(0, 1)
-    ax.set_ylim(0, 1)
-    
-    return fig
+    return as_image(renderer.gauge(sentiment_score))
 
 def generate_enhanced_wordcloud(text, sentiment):
     """Generate an enhanced word cloud from text"""
-    cleaned_text = clean_text(text)
-    if not cleaned_text.strip():
-        # If text is empty after cleaning, return a simple message
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.text(0.5, 0.5, "Not enough meaningful words to generate a word cloud", 
-                ha='center', va='center', fontsize=12)
-        ax.axis('off')
-        return fig
-    
-    # Define color map based on sentiment
-    if sentiment == "positive":
-        colormap = cm.get_cmap('YlGn')  # Yellow-Green for positive
-        background_color = '#F0FFF0'  # Light green background
-    else:
-        colormap = cm.get_cmap('OrRd')  # Orange-Red for negative
-        background_color = '#FFF0F0'  # Light red background
-    
-    # Generate word cloud with custom settings
-    wordcloud = WordCloud(
-        width=800, 
-        height=400,
-        background_color=background_color,
-        max_words=100,
-        colormap=colormap,
-        contour_width=1,
-        contour_color='steelblue',
-        prefer_horizontal=0.9,
-        relative_scaling=0.7,
-        min_font_size=10,
-        max_font_size=80,
-        random_state=42
-    ).generate(cleaned_text)
-    
-    # Display the word cloud
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
+    # Yellow-Green on light green for positive, Orange-Red on light red otherwise
+    style = 'positive' if sentiment == 'positive' else 'negative'
     
     # Add a title with sentiment information
     title = f"Key Words in {'Positive' if sentiment == 'positive' else 'Negative'} Review"
-    ax.set_title(title, fontsize=16, pad=20)
-    
-    # Add a subtle border
-    for spine in ax.spines.values():
-        spine.set_visible(True)
-        spine.set_color('lightgray')
-    
-    return fig
+    return render_wordcloud(clean_text(text), style, title)
 
 def create_word_frequency_chart(text, sentiment):
     """Create a bar chart of most frequent positive and negative words"""
@@ -378,62 +247,28 @@ def create_word_frequency_chart(text, sentiment):
     neg_words = sorted(neg_word_counts.items(), key=lambda x: x[1], reverse=True)[:3]
     neu_words = sorted(neu_word_counts.items(), key=lambda x: x[1], reverse=True)[:3]
     
-    # If no words found, add placeholder
-    if not pos_words:
-        pos_words = [("(none found)", 0)]
-    if not neg_words:
-        neg_words = [("(none found)", 0)]
-    if not neu_words:
-        neu_words = [("(none found)", 0)]
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(10, 8))
-    
-    # Plot positive words
-    pos_labels = [word for word, _ in pos_words]
-    pos_values = [count for _, count in pos_words]
-    pos_bars = ax.barh([f"+ {label}" for label in pos_labels], pos_values, color='#4CAF50', alpha=0.7, height=0.4)
-    
-    # Plot neutral words
-    neu_labels = [word for word, _ in neu_words]
-    neu_values = [count for _, count in neu_words]
-    neu_bars = ax.barh([f"= {label}" for label in neu_labels], neu_values, color='#FFCC00', alpha=0.7, height=0.4)
-    
-    # Plot negative words
-    neg_labels = [word for word, _ in neg_words]
-    neg_values = [count for _, count in neg_words]
-    neg_bars = ax.barh([f"- {label}" for label in neg_labels], neg_values, color='#FF6B6B', alpha=0.7, height=0.4)
-    
-    # Add count labels
-    for bars in [pos_bars, neu_bars, neg_bars]:
-        for bar in bars:
-            width = bar.get_width()
-            if width > 0:
-                ax.text(width + 0.1, bar.get_y() + bar.get_height()/2, f"{int(width)}", 
-                        va='center', fontsize=10)
-    
-    # Set title and labels
-    ax.set_title('Frequency of Sentiment Words', fontsize=14)
-    ax.set_xlabel('Count', fontsize=12)
-    
-    # Adjust layout
-    plt.tight_layout()
-    
-    return fig
+    # Empty groups are drawn as "(none found)"
+    return as_image(renderer.word_frequency(pos_words, neu_words, neg_words))
 
 def predictive_system(review):
-    """Analyze sentiment of a movie review"""
+    """Analyze sentiment of a movie review
+    
+    Yields the sentiment, detailed analysis and history as soon as the model
+    has scored the review, then yields again as each chart finishes
+    rendering on chart_executor, so the slow word cloud no longer holds up
+    the result.
+    """
     global analysis_history
     
     # Check if review is empty
     if not review or not review.strip():
-        return "Please enter a review to analyze.", None, None, None, None, None, "No review provided.", []
+        yield "Please enter a review to analyze.", None, None, None, None, "No review provided.", []
+        return
     
     # Process the review
     sequences = tokenizer.texts_to_sequences([review])
     padded_sequence = pad_sequences(sequences, maxlen=200)
-    prediction = model.predict(padded_sequence, verbose=0)
-    confidence = float(prediction[0][0])
+    confidence = float(engine.predict_scores(padded_sequence)[0])
     
     # Updated sentiment classification to include neutral
     if confidence > 0.55:
@@ -446,18 +281,6 @@ def predictive_system(review):
     # Analyze sentiment aspects
     aspect_scores = analyze_sentiment_aspects(review, confidence)
     
-    # Create radar chart for sentiment aspects
-    radar_fig = create_radar_chart(aspect_scores)
-    
-    # Create gauge chart for sentiment confidence
-    gauge_fig = create_gauge_chart(confidence)
-    
-    # Generate enhanced word cloud
-    wordcloud_fig = generate_enhanced_wordcloud(review, sentiment)
-    
-    # Create word frequency chart
-    word_freq_fig = create_word_frequency_chart(review, sentiment)
-    
     # Extract key phrases
     key_phrases = extract_key_phrases(review, sentiment)
     
@@ -489,7 +312,24 @@ def predictive_system(review):
 This review expresses a {sentiment} sentiment toward the movie with {confidence:.2f} confidence.
 """
     
-    return sentiment, gauge_fig, radar_fig, wordcloud_fig, word_freq_fig, detailed_analysis, analysis_history
+    # Show the result first; the chart tabs stay empty until they are ready
+    charts = [None, None, None, None]
+    yield (sentiment, *charts, detailed_analysis, analysis_history)
+    
+    # Gauge, radar, word cloud and word frequency, rendered concurrently
+    futures = {
+        chart_executor.submit(create_gauge_chart, confidence): 0,
+        chart_executor.submit(create_radar_chart, aspect_scores): 1,
+        chart_executor.submit(generate_enhanced_wordcloud, review, sentiment): 2,
+        chart_executor.submit(create_word_frequency_chart, review, sentiment): 3
+    }
+    for future in as_completed(futures):
+        try:
+            charts[futures[future]] = future.result()
+        except Exception as e:
+            print(f"Error rendering chart: {e}")
+            continue
+        yield (sentiment, *charts, detailed_analysis, analysis_history)
 
 # Create custom CSS for better styling
 css = """
@@ -542,16 +382,16 @@ with gr.Blocks(css=css, theme=gr.themes.Soft()) as app:
             
             with gr.Tabs():
                 with gr.TabItem("Gauge Meter"):
-                    gauge_plot = gr.Plot(label="Sentiment Gauge")
+                    gauge_plot = gr.Image(type="pil", label="Sentiment Gauge")
                 
                 with gr.TabItem("Aspect Analysis"):
-                    radar_plot = gr.Plot(label="Sentiment Aspects")
+                    radar_plot = gr.Image(type="pil", label="Sentiment Aspects")
                 
                 with gr.TabItem("Word Cloud"):
-                    wordcloud_plot = gr.Plot(label="Word Cloud")
+                    wordcloud_plot = gr.Image(type="pil", label="Word Cloud")
                 
                 with gr.TabItem("Word Frequency"):
-                    word_freq_plot = gr.Plot(label="Sentiment Word Frequency")
+                    word_freq_plot = gr.Image(type="pil", label="Sentiment Word Frequency")
                 
                 with gr.TabItem("Detailed Analysis"):
                     detailed_output = gr.Markdown()
@@ -588,5 +428,6 @@ with gr.Blocks(css=css, theme=gr.themes.Soft()) as app:
     example2_btn.click(lambda: negative_example, outputs=review_input)
     example3_btn.click(lambda: mixed_example, outputs=review_input)
 
-# Launch the app
+# Launch the app (the queue is what lets predictive_system stream its results)
+app.queue()
 app.launch()
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""Word clouds laid out from word frequencies, with reused WordCloud instances.
+
+``WordCloud(...).generate(text)`` rebuilds the configuration, tokenizes the
+text (including a collocation pass) and runs the full layout search on every
+review. Here the configured instances are kept per style and thread (they
+are not thread-safe: ``generate_from_frequencies`` stores its result on the
+instance) and are fed the word ``Counter`` directly.
+
+The layout search is the expensive part, so finished layouts are cached per
+frequency signature: the style, the resolution and the top ``max_words``
+(word, count) pairs. Reviews with the same word counts share a layout, and
+drawing a cached layout only renders the text.
+
+Preview resolution runs the layout on a canvas ``PREVIEW_SCALE`` times
+smaller and draws it scaled back up, so the image keeps its size but the
+search covers a quarter of the pixels.
+
+    python wordcloud_engine.py --reviews 100
+"""
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from wordcloud import STOPWORDS, WordCloud
+
+WORDCLOUD_WIDTH = 800
+WORDCLOUD_HEIGHT = 400
+WORDCLOUD_PREVIEW = os.environ.get('WORDCLOUD_PREVIEW', '0') == '1'
+WORDCLOUD_LAYOUT_CACHE_ENTRIES = int(os.environ.get('WORDCLOUD_LAYOUT_CACHE_ENTRIES', 1024))
+PREVIEW_SCALE = 2
+
+# Same settings the app used to pass to WordCloud; sizes are for the full canvas
+WORDCLOUD_STYLES = {
+    'plain': dict(background_color='white', max_words=100, colormap='viridis',
+                  contour_width=1, contour_color='steelblue'),
+    'positive': dict(background_color='#F0FFF0', max_words=100, colormap='YlGn',
+                     contour_width=1, contour_color='steelblue', prefer_horizontal=0.9,
+                     relative_scaling=0.7, min_font_size=10, max_font_size=80, random_state=42),
+    'negative': dict(background_color='#FFF0F0', max_words=100, colormap='OrRd',
+                     contour_width=1, contour_color='steelblue', prefer_horizontal=0.9,
+                     relative_scaling=0.7, min_font_size=10, max_font_size=80, random_state=42),
+}
+
+
+def word_frequencies(cleaned_text):
+    """Word counts as WordCloud.generate would see them (its stopwords removed)"""
+    return Counter(word for word in cleaned_text.split() if word not in STOPWORDS)
+
+
+def _new_wordcloud(style, preview):
+    settings = dict(WORDCLOUD_STYLES[style])
+    scale = PREVIEW_SCALE if preview else 1
+    for key in ('min_font_size', 'max_font_size'):
+        if key in settings:
+            settings[key] = max(1, settings[key] // scale)
+    return WordCloud(width=WORDCLOUD_WIDTH // scale, height=WORDCLOUD_HEIGHT // scale,
+                     scale=scale, **settings)
+
+
+class WordCloudEngine:
+    """Thread-safe word clouds: per-thread WordCloud instances plus a shared layout cache"""
+
+    def __init__(self, max_layouts=WORDCLOUD_LAYOUT_CACHE_ENTRIES, preview=WORDCLOUD_PREVIEW):
+        self.max_layouts = max_layouts
+        self.preview = preview
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'instances_built': 0}
+
+    def _wordcloud(self, style, preview):
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        wordcloud = instances.get((style, preview))
+        if wordcloud is None:
+            wordcloud = instances[(style, preview)] = _new_wordcloud(style, preview)
+            with self._lock:
+                self._counters['instances_built'] += 1
+        return wordcloud
+
+    def signature(self, frequencies, style, preview=None):
+        """Cache key for a layout; ties are ordered by word so equal counts always match"""
+        preview = self.preview if preview is None else preview
+        max_words = WORDCLOUD_STYLES[style]['max_words']
+        words = sorted(((word, count) for word, count in frequencies.items() if count > 0),
+                       key=lambda item: (-item[1], item[0]))
+        return style, preview, tuple(words[:max_words])
+
+    def render(self, frequencies, style='plain', preview=None):
+        """RGB array for a word ``Counter``, or None when there are no words"""
+        key = self.signature(frequencies, style, preview)
+        _, preview, words = key
+        if not words:
+            return None
+        wordcloud = self._wordcloud(style, preview)
+        with self._lock:
+            layout = self._layouts.get(key)
+            if layout is not None:
+                self._layouts.move_to_end(key)
+                self._counters['hits'] += 1
+            else:
+                self._counters['misses'] += 1
+        if layout is None:
+            # generate_from_frequencies keeps its (stable) sort, so pass the canonical order
+            layout = wordcloud.generate_from_frequencies(dict(words)).layout_
+            if self.max_layouts > 0:
+                with self._lock:
+                    self._layouts[key] = layout
+                    while len(self._layouts) > self.max_layouts:
+                        self._layouts.popitem(last=False)
+                        self._counters['evictions'] += 1
+        wordcloud.layout_ = layout
+        return wordcloud.to_array()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, layouts=len(self._layouts), preview=self.preview)
+
+
+def main():
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser(description="Time word clouds: per-review WordCloud vs the cached engine")
+    parser.add_argument('--reviews', type=int, default=50)
+    parser.add_argument('--words', type=int, default=120, help="Words per synthetic review")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = ['story', 'acting', 'great', 'boring', 'plot', 'characters', 'brilliant', 'awful',
+                  'scenes', 'music', 'ending', 'director', 'performance', 'beautiful', 'slow',
+                  'funny', 'script', 'cast', 'visual', 'effects', 'dialogue', 'predictable',
+                  'masterpiece', 'terrible', 'emotional', 'thrilling', 'dull', 'stunning']
+    # Zipf-like weights so every review has a few dominant words, like real ones
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    texts = [' '.join(rng.choices(vocabulary, weights, k=args.words)) for _ in range(args.reviews)]
+
+    def timed(label, render):
+        started = time.perf_counter()
+        for text in texts:
+            render(text)
+        print(f"{label:<28}{(time.perf_counter() - started) / len(texts) * 1000:>9.1f} ms/review")
+
+    style = WORDCLOUD_STYLES['positive']
+    timed('WordCloud().generate', lambda text: WordCloud(
+        width=WORDCLOUD_WIDTH, height=WORDCLOUD_HEIGHT, **style).generate(text).to_array())
+    for preview in (False, True):
+        engine = WordCloudEngine(max_layouts=0, preview=preview)
+        timed(f"engine {'preview' if preview else 'full'} (no cache)",
+              lambda text: engine.render(word_frequencies(text), 'positive'))
+        engine = WordCloudEngine(preview=preview)
+        for text in texts:
+            engine.render(word_frequencies(text), 'positive')
+        timed(f"engine {'preview' if preview else 'full'} (cached)",
+              lambda text: engine.render(word_frequencies(text), 'positive'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Quantized variants of the sentiment model and a comparison report.
+
+``build`` writes NumPy weight directories with the input projection (the
+fused embedding x LSTM input kernel, nearly all of the parameters) stored
+as float16 or per-row int8, plus an optional dynamic-range int8 TFLite
+model when TensorFlow is available. ``report`` compares every variant
+against the float32 model on accuracy, agreement, latency and size.
+
+    python quantize_model.py build python/model.h5 --tflite
+    python quantize_model.py report python/model.h5 --csv IMDB_Dataset.csv --limit 2000
+
+The server picks a variant with MODEL_QUANTIZATION=float16|int8 (NumPy
+backend); the directories are created on first use if missing.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from fast_tokenizer import SAMPLE_REVIEWS, FastTokenizer
+from numpy_lstm import MAX_SEQUENCE_LENGTH, QUANTIZATION_MODES, NumpyLSTMEngine
+
+POSITIVE_THRESHOLD = 0.5  # IMDB labels are binary
+LATENCY_REPEATS = 20
+
+
+def weights_dir_for(base_dir, mode):
+    """Directory holding the weights for a quantization mode ('none' is float32)"""
+    return base_dir if mode in (None, 'none') else f"{base_dir}_{mode}"
+
+
+def tflite_path_for(model_path):
+    return os.path.splitext(model_path)[0] + '_int8.tflite'
+
+
+def build_variants(model_path, weights_dir, modes=QUANTIZATION_MODES, source=None):
+    """Export float32 and quantized weight directories; returns {mode: dir}"""
+    engine = NumpyLSTMEngine.from_h5(model_path)
+    written = {'none': weights_dir}
+    engine.save_weights(weights_dir, source=source)
+    for mode in modes:
+        path = weights_dir_for(weights_dir, mode)
+        engine.quantize(mode).save_weights(path, source=source)
+        written[mode] = path
+    return written
+
+
+def build_tflite(model_path, output_path):
+    """Dynamic-range int8 TFLite conversion (requires TensorFlow)"""
+    import tensorflow as tf
+
+    from inference_engine import load_keras_model
+
+    model = load_keras_model(model_path)
+    # A fixed-shape trace lets the converter fuse the LSTM into one builtin op
+    # (the dynamic Keras graph needs tensor-list ops TFLite cannot lower)
+    forward = tf.function(lambda sequences: model(sequences, training=False))
+    concrete = forward.get_concrete_function(tf.TensorSpec([1, MAX_SEQUENCE_LENGTH], tf.int32))
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    flatbuffer = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(flatbuffer)
+    return output_path
+
+
+class TFLiteScorer:
+    """Minimal batch-1 TFLite runner used by the report"""
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self.interpreter = tf.lite.Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.input_dtype = self.interpreter.get_input_details()[0]['dtype']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+
+    def predict_scores(self, padded_sequences):
+        scores = []
+        for row in padded_sequences:
+            self.interpreter.set_tensor(self.input_index, row[np.newaxis].astype(self.input_dtype))
+            self.interpreter.invoke()
+            scores.append(float(self.interpreter.get_tensor(self.output_index)[0, 0]))
+        return np.asarray(scores, dtype=np.float32)
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def load_sample(csv_path, limit, tokenizer):
+    """Padded sequences and 0/1 labels (None without a CSV)"""
+    if csv_path:
+        import csv
+        with open(csv_path, newline='', encoding='utf8') as f:
+            rows = [row for _, row in zip(range(limit), csv.DictReader(f))]
+        texts = [row['review'] for row in rows]
+        labels = np.array([row['sentiment'].strip().lower() == 'positive' for row in rows])
+        return tokenizer.encode_batch(texts, MAX_SEQUENCE_LENGTH), labels
+
+    # No labelled data: the sample reviews plus random token sequences still
+    # show how far each variant drifts from the float32 scores
+    padded = tokenizer.encode_batch([text for text in SAMPLE_REVIEWS if text], MAX_SEQUENCE_LENGTH)
+    rng = np.random.default_rng(0)
+    vocab_size = tokenizer.num_words or 5000
+    random_rows = rng.integers(1, vocab_size, size=(min(limit, 500), MAX_SEQUENCE_LENGTH), dtype=np.int32)
+    lengths = rng.integers(5, MAX_SEQUENCE_LENGTH + 1, size=len(random_rows))
+    random_rows[np.arange(MAX_SEQUENCE_LENGTH) < (MAX_SEQUENCE_LENGTH - lengths)[:, np.newaxis]] = 0
+    return np.concatenate([padded, random_rows]), None
+
+
+def measure(scorer, padded, labels, reference):
+    started = time.perf_counter()
+    scores = np.asarray(scorer.predict_scores(padded), dtype=np.float32)
+    batch_seconds = time.perf_counter() - started
+
+    single = padded[:1]
+    started = time.perf_counter()
+    for _ in range(LATENCY_REPEATS):
+        scorer.predict_scores(single)
+    latency_ms = (time.perf_counter() - started) / LATENCY_REPEATS * 1000
+
+    predicted = scores > POSITIVE_THRESHOLD
+    result = {
+        'latency_ms_batch1': round(latency_ms, 2),
+        'reviews_per_s': round(len(padded) / batch_seconds, 1),
+        'max_abs_diff': float(np.max(np.abs(scores - reference))) if reference is not None else 0.0,
+        'label_agreement': float(np.mean(predicted == (reference > POSITIVE_THRESHOLD)))
+        if reference is not None else 1.0
+    }
+    if labels is not None:
+        result['accuracy'] = float(np.mean(predicted == labels))
+    return result, scores
+
+
+def report(model_path, weights_dir, tokenizer, csv_path=None, limit=2000, tflite_path=None):
+    padded, labels = load_sample(csv_path, limit, tokenizer)
+    rows = {}
+    reference = None
+    for mode in ('none',) + QUANTIZATION_MODES:
+        path = weights_dir_for(weights_dir, mode)
+        if not os.path.exists(os.path.join(path, 'manifest.json')):
+            continue
+        engine = NumpyLSTMEngine.from_weights(path, mmap=False)
+        engine.warmup()
+        rows[mode], scores = measure(engine, padded, labels, reference)
+        rows[mode]['size_mb'] = round(directory_size(path) / 1e6, 2)
+        if mode == 'none':
+            reference = scores
+    if tflite_path and os.path.exists(tflite_path):
+        rows['tflite_int8'], _ = measure(TFLiteScorer(tflite_path), padded, labels, reference)
+        rows['tflite_int8']['size_mb'] = round(directory_size(tflite_path) / 1e6, 2)
+    rows['_sample'] = {'reviews': len(padded), 'labelled': labels is not None}
+    return rows
+
+
+def print_report(rows):
+    sample = rows.pop('_sample')
+    print(f"Sample: {sample['reviews']} reviews" + ('' if sample['labelled'] else ' (unlabelled, no accuracy)'))
+    columns = ('size_mb', 'latency_ms_batch1', 'reviews_per_s', 'accuracy', 'label_agreement', 'max_abs_diff')
+    print(f"{'variant':<12}" + ''.join(f"{column:>19}" for column in columns))
+    for name, row in rows.items():
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            cells.append(f"{'-':>19}" if value is None else f"{value:>19.4g}")
+        print(f"{'float32' if name == 'none' else name:<12}" + ''.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and compare quantized model variants")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    default_weights = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python', 'model_weights')
+
+    build_parser = subparsers.add_parser('build', help="Write float16/int8 weights (and optionally TFLite)")
+    build_parser.add_argument('model_path')
+    build_parser.add_argument('--weights-dir', default=default_weights)
+    build_parser.add_argument('--tflite', action='store_true', help="Also convert to dynamic-range int8 TFLite")
+
+    report_parser = subparsers.add_parser('report', help="Compare variants against the float32 model")
+    report_parser.add_argument('model_path')
+    report_parser.add_argument('--weights-dir', default=default_weights)
+    report_parser.add_argument('--vocab', default=os.path.join(os.path.dirname(default_weights), 'vocab.json'))
+    report_parser.add_argument('--csv', help="Held-out IMDB CSV with 'review' and 'sentiment' columns")
+    report_parser.add_argument('--limit', type=int, default=2000)
+    report_parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        for mode, path in build_variants(args.model_path, args.weights_dir).items():
+            print(f"{mode:<8} {path} ({directory_size(path) / 1e6:.2f} MB)")
+        if args.tflite:
+            path = build_tflite(args.model_path, tflite_path_for(args.model_path))
+            print(f"tflite   {path} ({directory_size(path) / 1e6:.2f} MB)")
+        return
+
+    rows = report(args.model_path, args.weights_dir, FastTokenizer.load(args.vocab),
+                  args.csv, args.limit, tflite_path_for(args.model_path))
+    if args.json:
+        with open(args.json, 'w', encoding='utf8') as f:
+            json.dump(rows, f, indent=2)
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Keras turns tabs and newlines into spaces before splitting on ' ', and
+# both the tokenizer and clean_text lowercase first, so these edits never
+# change an analysis result
+_WHITESPACE_TABLE = str.maketrans({'\t': ' ', '\n': ' '})
+
+
+def normalize_review(text):
+    """Canonical form of a review used for cache keys"""
+    return ' '.join(word for word in text.lower().translate(_WHITESPACE_TABLE).split(' ') if word)
+
+
+class ResultCache:
+    """Bounded LRU + TTL cache for analysis results.
+
+    Entries are evicted when either ``max_entries`` or ``max_bytes`` (the
+    JSON size of the cached results) is exceeded. When ``disk_path`` is set,
+    results are also written through to a SQLite file, which is consulted on
+    memory misses and survives restarts. ``max_entries=0`` disables caching.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=16 * 1024 * 1024,
+                 ttl_seconds=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'disk_hits': 0,
+            'disk_writes': 0,
+            'disk_errors': 0
+        }
+        self._db = None
+        self._db_pid = None
+
+    def _connection(self):
+        # Opened lazily and per process: SQLite handles must not cross a fork
+        if not self.disk_path or not self.enabled:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(text, method, model_version):
+        """Hash of the normalized review, analysis method and model version"""
+        digest = hashlib.sha256(normalize_review(text).encode('utf8'))
+        digest.update(f'\0{method}\0{model_version}'.encode('utf8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+                self._counters['expirations'] += 1
+
+            value = self._disk_get(key, now)
+            if value is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['hits'] += 1
+            self._counters['disk_hits'] += 1
+            self._store(key, value, now)
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            serialized = self._store(key, value, now)
+            self._disk_put(key, serialized, now + self.ttl_seconds)
+
+    def _store(self, key, value, now):
+        # Caller holds the lock
+        serialized = json.dumps(value, separators=(',', ':'))
+        size = len(serialized) + len(key)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[2]
+        self._entries[key] = (value, now + self.ttl_seconds, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._counters['evictions'] += 1
+        return serialized
+
+    def _disk_get(self, key, now):
+        try:
+            db = self._connection()
+            if db is None:
+                return None
+            row = db.execute(
+                'SELECT value FROM results WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+        except sqlite3.Error:
+            self._counters['disk_errors'] += 1
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _disk_put(self, key, serialized, expires_at):
+        try:
+            db = self._connection()
+            if db is None:
+                return
+            db.execute(
+                'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, serialized, expires_at)
+            )
+            db.commit()
+            self._counters['disk_writes'] += 1
+        except sqlite3.Error:
+            self._counters['disk_errors'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            db = self._connection()
+            if db is not None:
+                db.execute('DELETE FROM results')
+                db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return dict(
+                self._counters,
+                enabled=self.enabled,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                ttl_seconds=self.ttl_seconds,
+                hit_rate=self._counters['hits'] / lookups if lookups else 0.0,
+                disk_tier=bool(self.disk_path) and self.enabled
+            )
@@ -0,0 +1,21 @@
+import { NextRequest, NextResponse } from 'next/server';
+import axios from 'axios';
+
+// This is a proxy API route for batch analysis in development
+export async function POST(request: NextRequest) {
+  try {
+    const data = await request.json();
+    
+    // In development, proxy to local Flask server
+    // In production, this route won't be used (direct API calls)
+    const response = await axios.post('http://localhost:5000/analyze/batch', data);
+    
+    return NextResponse.json(response.data);
+  } catch (error) {
+    console.error('Error in batch sentiment analysis API route:', error);
+    return NextResponse.json(
+      { error: 'Failed to analyze sentiment batch' },
+      { status: 500 }
+    );
+  }
+}
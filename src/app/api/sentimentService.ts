@@ -56,6 +56,39 @@ export async function analyzeSentiment(data: ReviewSubmission): Promise<Sentimen
   }
 }
 
+// Determine the batch API URL the same way as API_URL
+const BATCH_API_URL = process.env.NODE_ENV === 'production'
+  ? 'https://imdb-sentiment-api.onrender.com/analyze/batch'
+  : '/api/analyze-sentiment/batch';
+
+export interface BatchSentimentResponse {
+  results: (SentimentResponse | { error: string })[];
+  count: number;
+  method?: string;
+}
+
+/**
+ * Analyzes many reviews with a single request to the batch endpoint
+ * @param reviews The review submissions to score
+ * @returns Promise with one result per submission, in the same order
+ */
+export async function analyzeSentimentBatch(reviews: ReviewSubmission[]): Promise<SentimentResponse[]> {
+  try {
+    const response = await axios.post<BatchSentimentResponse>(BATCH_API_URL, { reviews }, {
+      timeout: 60000 // Batches take longer than a single review
+    });
+    return response.data.results.map((result, index): SentimentResponse =>
+      'sentiment' in result ? result : { sentiment: 'neutral', confidence: 0.5, error: result.error ?? `Review ${index + 1} could not be analyzed` }
+    );
+  } catch (error) {
+    console.error('Error analyzing sentiment batch:', error);
+    
+    // Fall back to mock data if the API is not available (in any environment)
+    console.warn('API unavailable. Using mock data for batch sentiment analysis');
+    return Promise.all(reviews.map(review => mockAnalyzeSentiment(review)));
+  }
+}
+
 // Mock implementation for when API is unavailable
 export async function mockAnalyzeSentiment(reviewData: ReviewSubmission): Promise<SentimentResponse> {
   // Simulate API delay
@@ -3,7 +3,10 @@
 import { useState } from 'react';
 import { v4 as uuidv4 } from 'uuid';
 import { FaFileUpload, FaSpinner } from 'react-icons/fa';
-import { analyzeSentiment } from '../api/sentimentService';
+import { analyzeSentimentBatch, ReviewSubmission } from '../api/sentimentService';
+
+// Number of reviews sent per /analyze/batch request
+const BATCH_CHUNK_SIZE = 250;
 
 interface BatchAnalysisProps {
   onBatchComplete: (results: BatchResult[]) => void;
@@ -45,8 +48,8 @@ export default function BatchAnalysis({ onBatchComplete }: BatchAnalysisProps) {
       throw new Error('Could not find a review column in the CSV file');
     }
     
-    // Process each line (skip header)
-    const results: BatchResult[] = [];
+    // Collect every review first (skip header)
+    const submissions: Required<ReviewSubmission>[] = [];
     const dataLines = lines.slice(1).filter(line => line.trim() !== '');
     
     for (let i = 0; i < dataLines.length; i++) {
@@ -61,27 +64,38 @@ export default function BatchAnalysis({ onBatchComplete }: BatchAnalysisProps) {
         : `Review #${i+1}`;
       
       if (review) {
-        try {
-          // Update progress
-          setProgress(Math.round((i / dataLines.length) * 100));
-          
-          // Call API for sentiment analysis
-          const result = await analyzeSentiment({ 
-            review, 
-            movieTitle 
-          });
-          
+        submissions.push({ review, movieTitle });
+      }
+    }
+    
+    // Send the reviews in chunks so the server can score each chunk in one pass
+    const results: BatchResult[] = [];
+    for (let start = 0; start < submissions.length; start += BATCH_CHUNK_SIZE) {
+      const chunk = submissions.slice(start, start + BATCH_CHUNK_SIZE);
+      
+      // Update progress
+      setProgress(Math.round((start / submissions.length) * 100));
+      
+      try {
+        // Call API for sentiment analysis
+        const chunkResults = await analyzeSentimentBatch(chunk);
+        
+        chunkResults.forEach((result, index) => {
+          if (result.error) {
+            console.error(`Error analyzing review: ${chunk[index].review}`, result.error);
+            return;
+          }
           results.push({
             id: uuidv4(),
-            movieTitle,
-            review,
+            movieTitle: chunk[index].movieTitle,
+            review: chunk[index].review,
             sentiment: result.sentiment,
             confidence: result.confidence,
             timestamp: new Date()
           });
-        } catch (error) {
-          console.error(`Error analyzing review: ${review}`, error);
-        }
+        });
+      } catch (error) {
+        console.error('Error analyzing review batch', error);
       }
     }
     
@@ -0,0 +1,31 @@
+"""Parity of the TensorFlow-free serving paths with Keras (skipped without TensorFlow or model.h5)."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODEL_PATH = os.path.join(ROOT, 'python', 'model.h5')
+
+
+def require(path):
+    if not os.path.exists(path):
+        pytest.skip(f"{os.path.relpath(path, ROOT)} is not available")
+    return path
+
+
+def test_numpy_engine_matches_keras():
+    pytest.importorskip('tensorflow')
+    from numpy_lstm import PARITY_TOLERANCE, check_parity
+
+    assert check_parity(require(MODEL_PATH), samples=64) <= PARITY_TOLERANCE
+
+
+def test_fast_tokenizer_matches_keras():
+    pytest.importorskip('tensorflow')
+    from fast_tokenizer import SAMPLE_REVIEWS, check_parity, load_keras_tokenizer
+
+    keras_tokenizer = load_keras_tokenizer(require(os.path.join(ROOT, 'python', 'tokenizer.pkl')))
+    assert check_parity(keras_tokenizer, SAMPLE_REVIEWS) == 0
@@ -0,0 +1,30 @@
+"""Key phrases built from the lexicon scan and the cleaned word counts."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from text_analysis import AnalyzedText  # noqa: E402
+
+
+def test_hyphenated_lexicon_term_is_not_repeated_as_a_cleaned_word():
+    analyzed = AnalyzedText("so-so acting, terrible plot")
+    found_words = analyzed.lexicon_hits['neutral']
+
+    assert found_words == ['so-so']
+    assert 'soso' in analyzed.word_counts
+    assert 'soso' not in analyzed.common_words(10, covered=found_words)
+    assert sorted(set(found_words + analyzed.common_words(10, covered=found_words))) == \
+        ['acting', 'plot', 'so-so', 'terrible']
+
+
+def test_extract_key_phrases_lists_a_hyphenated_term_once():
+    pytest.importorskip('flask')
+    import flask_server
+
+    key_phrases = flask_server.extract_key_phrases("so-so acting, terrible plot", 'neutral')
+
+    assert sorted(key_phrases) == ['acting', 'plot', 'so-so', 'terrible']
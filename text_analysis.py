@@ -0,0 +1,154 @@
+import json
+import os
+import re
+from collections import Counter
+from types import MappingProxyType
+
+from lexicon_matcher import LexiconMatcher
+
+# Compiled once: strip everything except letters and whitespace
+CLEAN_PATTERN = re.compile(r'[^a-zA-Z\s]')
+
+# Common English stopwords (plus domain words that carry no sentiment)
+STOPWORDS = frozenset({
+    'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until',
+    'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against', 'between',
+    'into', 'through', 'during', 'before', 'after', 'above', 'below', 'to',
+    'from', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again',
+    'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how',
+    'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such',
+    'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's',
+    't', 'can', 'will', 'just', 'don', 'should', 'now', 'movie', 'film', 'watch'
+})
+
+POSITIVE_WORDS = frozenset({
+    'good', 'great', 'excellent', 'amazing', 'wonderful', 'best', 'love',
+    'awesome', 'fantastic', 'enjoyed', 'favorite', 'perfect', 'brilliant',
+    'superb', 'outstanding', 'masterpiece', 'beautiful', 'recommend'
+})
+
+NEGATIVE_WORDS = frozenset({
+    'bad', 'worst', 'terrible', 'awful', 'boring', 'waste', 'poor',
+    'disappointing', 'horrible', 'hate', 'stupid', 'ridiculous', 'worse',
+    'dull', 'mediocre', 'fails', 'avoid', 'mess', 'disaster'
+})
+
+NEUTRAL_WORDS = frozenset({
+    'okay', 'average', 'decent', 'fine', 'alright', 'fair', 'moderate',
+    'passable', 'acceptable', 'ordinary', 'standard', 'middle', 'mixed',
+    'balanced', 'neutral', 'so-so', 'neither', 'somewhat'
+})
+
+SENTIMENT_LEXICONS = MappingProxyType({
+    'positive': POSITIVE_WORDS,
+    'negative': NEGATIVE_WORDS,
+    'neutral': NEUTRAL_WORDS
+})
+
+# Aspect categories reported by the Flask API (flask_server.py)
+SERVER_ASPECTS = MappingProxyType({
+    'Emotional Impact': ('emotional', 'moving', 'touching', 'powerful', 'sad', 'happy', 'feel', 'felt', 'heart', 'tears'),
+    'Acting Quality': ('acting', 'actor', 'actress', 'performance', 'cast', 'played', 'role', 'character'),
+    'Plot & Story': ('plot', 'story', 'script', 'screenplay', 'narrative', 'writing', 'written', 'storyline'),
+    'Visual Elements': ('visual', 'effects', 'cinematography', 'beautiful', 'stunning', 'cgi', 'scene', 'scenes'),
+    'Direction': ('director', 'directed', 'direction', 'filmmaker', 'vision', 'pacing', 'editing')
+})
+
+# Aspect categories scored by python/api.py and the Gradio app
+REVIEW_ASPECTS = MappingProxyType({
+    'Emotional Impact': ('emotional', 'moving', 'touching', 'powerful', 'sad', 'happy', 'feel', 'felt', 'heart', 'tears'),
+    'Acting Quality': ('acting', 'actor', 'actress', 'performance', 'cast', 'played', 'role', 'character'),
+    'Plot & Story': ('plot', 'story', 'script', 'screenplay', 'narrative', 'twist', 'ending', 'predictable'),
+    'Visual Appeal': ('visual', 'cinematography', 'beautiful', 'stunning', 'effects', 'cgi', 'scene', 'shot'),
+    'Entertainment Value': ('entertaining', 'enjoyable', 'fun', 'boring', 'exciting', 'thrill', 'laugh', 'comedy')
+})
+
+
+def _merge_lexicon_file(path):
+    """Overlay categories from a lexicon JSON file onto the built-in ones
+
+    ``sentiment`` categories apply everywhere, ``aspects`` replace the server
+    aspect table and ``review_aspects`` the python/api.py one.
+    """
+    with open(path, 'r', encoding='utf8') as f:
+        data = json.load(f)
+    sentiment = dict(SENTIMENT_LEXICONS, **{k: frozenset(v) for k, v in data.get('sentiment', {}).items()})
+    server = dict(SERVER_ASPECTS, **{k: tuple(v) for k, v in data.get('aspects', {}).items()})
+    review = dict(REVIEW_ASPECTS, **{k: tuple(v) for k, v in data.get('review_aspects', {}).items()})
+    return MappingProxyType(sentiment), MappingProxyType(server), MappingProxyType(review)
+
+
+# Optional lexicon file (see lexicon_matcher.py for the format)
+LEXICON_PATH = os.environ.get('LEXICON_PATH')
+if LEXICON_PATH:
+    SENTIMENT_LEXICONS, SERVER_ASPECTS, REVIEW_ASPECTS = _merge_lexicon_file(LEXICON_PATH)
+
+
+def _build_matcher(aspects):
+    return LexiconMatcher({'sentiment': SENTIMENT_LEXICONS, 'aspects': aspects})
+
+
+_MATCHERS = {id(SERVER_ASPECTS): _build_matcher(SERVER_ASPECTS),
+             id(REVIEW_ASPECTS): _build_matcher(REVIEW_ASPECTS)}
+
+
+def matcher_for(aspects):
+    """Compiled matcher for the sentiment lexicons plus an aspect table"""
+    matcher = _MATCHERS.get(id(aspects))
+    if matcher is None:
+        matcher = _MATCHERS[id(aspects)] = _build_matcher(aspects)
+    return matcher
+
+
+def clean_text(text):
+    """Clean and preprocess text for word cloud"""
+    # Remove special characters and numbers, then common English stopwords
+    text = CLEAN_PATTERN.sub('', text.lower())
+    return ' '.join(word for word in text.split() if word not in STOPWORDS)
+
+
+class AnalyzedText:
+    """Everything the text features need, computed in one pass per review.
+
+    ``words`` are the cleaned, stopword-free tokens; ``hits`` are the lexicon
+    matches (single words and phrases) found in one scan, and
+    ``lexicon_hits``/``aspect_hits`` list the matched terms per category in
+    text order.
+    """
+
+    __slots__ = ('text', 'words', 'word_counts', 'hits', 'lexicon_hits', 'aspect_hits')
+
+    def __init__(self, text, aspects=SERVER_ASPECTS):
+        lowered = text.lower()
+        self.text = text
+        self.words = [word for word in CLEAN_PATTERN.sub('', lowered).split() if word not in STOPWORDS]
+        self.word_counts = Counter(self.words)
+
+        # Hyphens separate tokens here so "so-so" can match as a phrase
+        matcher = matcher_for(aspects)
+        self.hits = matcher.match(CLEAN_PATTERN.sub('', lowered.replace('-', ' ')).split())
+        self.lexicon_hits = {category: [] for category in matcher.groups['sentiment']}
+        self.aspect_hits = {aspect: [] for aspect in matcher.groups['aspects']}
+        for hit in self.hits:
+            if hit.group == 'sentiment':
+                self.lexicon_hits[hit.category].append(hit.term)
+            else:
+                self.aspect_hits[hit.category].append(hit.term)
+
+    @property
+    def cleaned_text(self):
+        return ' '.join(self.words)
+
+    def common_words(self, count=10, covered=()):
+        """Most frequent cleaned words, skipping the cleaned form of the ``covered`` terms
+
+        Cleaning drops hyphens, so a lexicon hit such as "so-so" is also
+        counted as the word "soso"; pass the hits to avoid listing it twice.
+        """
+        covered = {CLEAN_PATTERN.sub('', term) for term in covered}
+        return [word for word, _ in self.word_counts.most_common(count) if word not in covered]
+
+
+def as_analyzed(text, aspects=SERVER_ASPECTS):
+    """Accept either raw text or an existing AnalyzedText"""
+    return text if isinstance(text, AnalyzedText) else AnalyzedText(text, aspects)
@@ -0,0 +1,285 @@
+"""TFLite inference backend (XNNPACK on CPU).
+
+model.h5 is converted once per batch size and the flatbuffers are cached
+next to it (``model.b1.tflite``, ``model.b64.tflite``, ...); they are
+converted again when model.h5 is newer. The LSTM converts to a single fused
+op whose state tensors are sized for the conversion batch, so an
+interpreter cannot be resized to an arbitrary batch after the fact.
+Instead each request is split into chunks of the largest batch size and
+every chunk runs on the smallest converted batch that holds it, padded
+with empty rows.
+
+Interpreters are not thread-safe, so each thread lazily builds its own set
+from the flatbuffer bytes held in memory. ``tflite_runtime`` is used when
+installed, otherwise ``tf.lite``; TensorFlow itself is only needed to
+convert.
+
+    python tflite_engine.py convert python/model.h5
+    python tflite_engine.py bench python/model.h5 --threads 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+MAX_SEQUENCE_LENGTH = 200  # Must match the padding used at training time
+DEFAULT_BATCH_SIZES = (1, 8, 64)
+BENCH_REPEATS = 50
+
+
+def tflite_path_for(model_path, batch_size):
+    """Cached flatbuffer for one batch size, next to model.h5"""
+    return f"{os.path.splitext(model_path)[0]}.b{batch_size}.tflite"
+
+
+def convert_h5(model_path, output_path, batch_size=1, max_sequence_length=MAX_SEQUENCE_LENGTH):
+    """Convert model.h5 to a fixed-batch float32 TFLite flatbuffer (requires TensorFlow)
+
+    Weights stay float32: dynamic-range quantization of the fused LSTM moves
+    scores by up to ~0.5 (quantize_model.py has an int8 variant that keeps
+    the recurrence in float).
+    """
+    import tensorflow as tf
+
+    from inference_engine import load_keras_model
+
+    trained = load_keras_model(model_path)
+    config = trained.get_config()
+    for layer in config['layers']:
+        layer_config = layer['config']
+        # Dropout is inactive at inference and stops the converter fusing the LSTM
+        for key in ('dropout', 'recurrent_dropout'):
+            if key in layer_config:
+                layer_config[key] = 0.0
+        if 'batch_input_shape' in layer_config:
+            layer_config['batch_input_shape'] = [batch_size, max_sequence_length]
+    inference_model = tf.keras.Sequential.from_config(config)
+    inference_model.set_weights(trained.get_weights())
+
+    flatbuffer = tf.lite.TFLiteConverter.from_keras_model(inference_model).convert()
+    with open(output_path + '.tmp', 'wb') as f:
+        f.write(flatbuffer)
+    os.replace(output_path + '.tmp', output_path)
+    return output_path
+
+
+def ensure_tflite(model_path, batch_sizes=DEFAULT_BATCH_SIZES, max_sequence_length=MAX_SEQUENCE_LENGTH):
+    """Convert any missing or stale flatbuffers; returns {batch_size: path}"""
+    model_mtime = os.path.getmtime(model_path) if os.path.exists(model_path) else 0
+    paths = {}
+    for batch_size in sorted(set(batch_sizes)):
+        path = tflite_path_for(model_path, batch_size)
+        if not os.path.exists(path) or os.path.getmtime(path) < model_mtime:
+            started = time.perf_counter()
+            convert_h5(model_path, path, batch_size, max_sequence_length)
+            print(f"Converted {model_path} to {path} in {time.perf_counter() - started:.1f}s")
+        paths[batch_size] = path
+    return paths
+
+
+def interpreter_class():
+    """tflite_runtime's Interpreter if installed, else TensorFlow's"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteEngine:
+    """Run fixed-batch TFLite models with the ``InferenceEngine`` interface"""
+
+    def __init__(self, model_files, num_threads=1, max_sequence_length=MAX_SEQUENCE_LENGTH):
+        self.max_sequence_length = max_sequence_length
+        self.num_threads = max(1, int(num_threads))
+        self._contents = {}
+        for size, path in model_files.items():
+            with open(path, 'rb') as f:
+                self._contents[int(size)] = f.read()
+        self.batch_sizes = tuple(sorted(self._contents))
+        # Chunks never exceed the largest converted batch
+        self.batch_size = self.batch_sizes[-1]
+        self._interpreter_class = interpreter_class()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.interpreters_created = 0
+
+    @classmethod
+    def from_h5(cls, model_path, batch_sizes=DEFAULT_BATCH_SIZES, num_threads=1,
+                max_sequence_length=MAX_SEQUENCE_LENGTH, batch_size=None):
+        """Load the cached flatbuffers for model.h5, converting them first if needed"""
+        if batch_size:
+            batch_sizes = tuple(size for size in batch_sizes if size <= batch_size) + (batch_size,)
+        files = ensure_tflite(model_path, batch_sizes, max_sequence_length)
+        return cls(files, num_threads=num_threads, max_sequence_length=max_sequence_length)
+
+    def _interpreter(self, size):
+        interpreters = getattr(self._local, 'interpreters', None)
+        if interpreters is None:
+            interpreters = self._local.interpreters = {}
+        entry = interpreters.get(size)
+        if entry is None:
+            # XNNPACK is the default CPU delegate and uses num_threads
+            interpreter = self._interpreter_class(model_content=self._contents[size],
+                                                  num_threads=self.num_threads)
+            interpreter.allocate_tensors()
+            input_details = interpreter.get_input_details()[0]
+            entry = interpreters[size] = (interpreter, input_details['index'], input_details['dtype'],
+                                          interpreter.get_output_details()[0]['index'])
+            with self._lock:
+                self.interpreters_created += 1
+        return entry
+
+    def _bucket_for(self, rows):
+        for size in self.batch_sizes:
+            if size >= rows:
+                return size
+        return self.batch_sizes[-1]
+
+    def warmup(self, batch_sizes=(1,)):
+        """Build this thread's interpreters and run every converted batch once"""
+        for size in self.batch_sizes:
+            self.predict_scores(np.zeros((size, self.max_sequence_length), dtype=np.int32))
+
+    def predict_scores(self, padded_sequences):
+        """Return one float score per row of a padded sequence matrix"""
+        padded_sequences = np.asarray(padded_sequences, dtype=np.int32)
+        if padded_sequences.ndim == 1:
+            padded_sequences = padded_sequences[np.newaxis, :]
+        if len(padded_sequences) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        scores = []
+        for start in range(0, len(padded_sequences), self.batch_size):
+            chunk = padded_sequences[start:start + self.batch_size]
+            size = self._bucket_for(len(chunk))
+            interpreter, input_index, input_dtype, output_index = self._interpreter(size)
+            batch = np.zeros((size, self.max_sequence_length), dtype=input_dtype)
+            batch[:len(chunk)] = chunk
+            interpreter.set_tensor(input_index, batch)
+            interpreter.invoke()
+            scores.append(interpreter.get_tensor(output_index)[:len(chunk), 0].copy())
+        return np.concatenate(scores)
+
+    def predict(self, padded_sequences, batch_size=None, verbose=0):
+        """Drop-in replacement for ``model.predict`` returning shape (N, 1)"""
+        return self.predict_scores(padded_sequences)[:, np.newaxis]
+
+    def stats(self):
+        return {
+            'batch_sizes': list(self.batch_sizes),
+            'num_threads': self.num_threads,
+            'interpreters_created': self.interpreters_created
+        }
+
+
+def _load_backend(backend, model_path, threads, batch_size):
+    if backend == 'tflite':
+        return TFLiteEngine.from_h5(model_path, num_threads=threads, batch_size=batch_size)
+    if backend == 'numpy':
+        from numpy_lstm import NumpyLSTMEngine
+        return NumpyLSTMEngine.from_h5(model_path, batch_size=batch_size)
+    import tensorflow as tf
+
+    from inference_engine import InferenceEngine, load_keras_model
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    return InferenceEngine(load_keras_model(model_path), batch_size=batch_size)
+
+
+def _measure(backend, model_path, threads, batch_size):
+    # Runs in a fresh interpreter so every backend pays its own import and load
+    started = time.perf_counter()
+    engine = _load_backend(backend, model_path, threads, batch_size)
+    load_s = time.perf_counter() - started
+    rng = np.random.default_rng(0)
+    single = rng.integers(1, 500, size=(1, MAX_SEQUENCE_LENGTH), dtype=np.int32)
+    batch = rng.integers(1, 500, size=(batch_size, MAX_SEQUENCE_LENGTH), dtype=np.int32)
+
+    started = time.perf_counter()
+    engine.predict_scores(single)
+    first_s = time.perf_counter() - started
+    engine.warmup((1, batch_size))
+
+    latencies = []
+    for _ in range(BENCH_REPEATS):
+        started = time.perf_counter()
+        engine.predict_scores(single)
+        latencies.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    for _ in range(max(1, BENCH_REPEATS // 5)):
+        engine.predict_scores(batch)
+    batch_s = (time.perf_counter() - started) / max(1, BENCH_REPEATS // 5)
+    latencies.sort()
+    print(json.dumps({
+        'backend': backend,
+        'cold_start_s': round(load_s + first_s, 3),
+        'load_s': round(load_s, 3),
+        'first_inference_s': round(first_s, 3),
+        'p50_batch1_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_batch1_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        f'batch{batch_size}_ms': round(batch_s * 1000, 2),
+        'sample_scores': [round(float(score), 5) for score in engine.predict_scores(batch[:3])]
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert model.h5 to TFLite and benchmark the backends")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help="Write the cached .tflite files next to model.h5")
+    convert_parser.add_argument('model_path')
+    convert_parser.add_argument('--batch-sizes', default=','.join(map(str, DEFAULT_BATCH_SIZES)))
+
+    bench_parser = subparsers.add_parser('bench', help="Cold start and steady-state latency per backend")
+    bench_parser.add_argument('model_path')
+    bench_parser.add_argument('--backends', default='keras,tflite,numpy')
+    bench_parser.add_argument('--threads', type=int, default=1)
+    bench_parser.add_argument('--batch-size', type=int, default=64)
+    bench_parser.add_argument('--json', help="Also write the results to this file")
+
+    measure_parser = subparsers.add_parser('_measure')
+    measure_parser.add_argument('backend')
+    measure_parser.add_argument('model_path')
+    measure_parser.add_argument('threads', type=int)
+    measure_parser.add_argument('batch_size', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        sizes = [int(size) for size in args.batch_sizes.split(',') if size.strip()]
+        for size, path in ensure_tflite(args.model_path, sizes).items():
+            print(f"batch {size:<4} {path} ({os.path.getsize(path) / 1e6:.2f} MB)")
+        return
+
+    if args.command == '_measure':
+        _measure(args.backend, args.model_path, args.threads, args.batch_size)
+        return
+
+    # Convert up front so the TFLite cold start is measured from the cache
+    ensure_tflite(args.model_path, tuple(size for size in DEFAULT_BATCH_SIZES if size <= args.batch_size)
+                  + (args.batch_size,))
+    results = []
+    for backend in args.backends.split(','):
+        output = subprocess.run(
+            [sys.executable, __file__, '_measure', backend, args.model_path, str(args.threads), str(args.batch_size)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = ('cold_start_s', 'load_s', 'first_inference_s', 'p50_batch1_ms', 'p99_batch1_ms',
+               f'batch{args.batch_size}_ms')
+    print(f"{'backend':<8}" + ''.join(f"{column:>19}" for column in columns))
+    for result in results:
+        print(f"{result['backend']:<8}" + ''.join(f"{result[column]:>19}" for column in columns))
+    if args.json:
+        with open(args.json, 'w', encoding='utf8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()